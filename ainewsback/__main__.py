@@ -0,0 +1,5 @@
+import sys
+
+from ainewsback.cli import main
+
+sys.exit(main())
@@ -1,7 +1,17 @@
+import os
+
+from ainewsback.api.v1.deps import require_monitoring_access
 from ainewsback.core.config import settings
-from fastapi import APIRouter, HTTPException, Depends
+from ainewsback.core.database import get_pool_stats
+from ainewsback.core.logger import get_logging_stats
+from ainewsback.core.responses import FastJSONRoute
+from ainewsback.repositories.user_repository import \
+    user_auth_cache_stats, user_cache_stats
+from ainewsback.core.metrics import registry
+from ainewsback.core.reids import near_cache
+from fastapi import APIRouter, HTTPException, Depends, Response
 from pydantic import BaseModel
-from ainewsback.utils.jwt import JWTUtils
+from ainewsback.utils.jwt import JWTUtils, token_cache
 from fastapi.security import OAuth2PasswordBearer
 
 # 模拟验证码存储
@@ -20,7 +30,7 @@ class LoginResponse(BaseModel):
     access_token: str
     token_type: str = "bearer"
 
-router = APIRouter()
+router = APIRouter(route_class=FastJSONRoute)
 
 @router.get("/")
 async def root():
@@ -44,6 +54,26 @@ async def info():
     }
 
 
+@router.get("/stats", dependencies=[Depends(require_monitoring_access)])
+async def stats():
+    """运行时指标（连接池等），供监控抓取；多 worker 时为处理该请求的进程的数据"""
+    return {
+        "worker": {"pid": os.getpid(), "workers": settings.SERVER_WORKERS},
+        "db_pool": get_pool_stats(),
+        "jwt_cache": token_cache.stats(),
+        "logging": get_logging_stats(),
+        "user_cache": user_cache_stats.stats(),
+        "user_auth_cache": user_auth_cache_stats.stats(),
+        "redis_near_cache": near_cache.stats(),
+    }
+
+
+@router.get("/metrics", dependencies=[Depends(require_monitoring_access)])
+async def metrics():
+    """Prometheus 文本格式指标"""
+    return Response(registry.render(),
+                    media_type="text/plain; version=0.0.4; charset=utf-8")
+
 
 # 示例接口：校验 JWT
 @router.get("/protected")
@@ -1,21 +1,57 @@
+import hmac
+import ipaddress
+
 import redis
-from fastapi import Depends
-from sqlmodel import Session
+from fastapi import Depends, HTTPException, Request
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from ainewsback.core.database import get_session
+from ainewsback.core.config import settings
+from ainewsback.core.database import get_async_session
 from ainewsback.core.reids import get_redis
+from ainewsback.repositories.unit_of_work import UnitOfWork
+from ainewsback.repositories.user_repository import UserCache
+from ainewsback.services.notification_outbox import NotificationOutbox
 from ainewsback.services.user_service import UserService
 from ainewsback.services.verification import VerificationService
 
 
+async def require_monitoring_access(request: Request) -> None:
+    """监控接口访问控制: 白名单地址或 Bearer 监控令牌，否则返回 403"""
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if (settings.MONITORING_TOKEN and scheme.lower() == "bearer"
+            and hmac.compare_digest(token.encode("utf-8"),
+                                    settings.MONITORING_TOKEN.encode("utf-8"))):
+        return
+
+    host = request.client.host if request.client else ""
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        address = None
+    if address is not None and any(
+            address in ipaddress.ip_network(network, strict=False)
+            for network in settings.MONITORING_ALLOWED_NETWORKS):
+        return
+    raise HTTPException(status_code=403, detail="禁止访问监控接口")
+
+
 async def get_verification(
         r: redis.Redis = Depends(get_redis)) -> VerificationService:
-    return VerificationService(r)
+    outbox = NotificationOutbox(r) if settings.NOTIFY_OUTBOX_ENABLED else None
+    return VerificationService(r, outbox)
+
+
+async def get_unit_of_work(
+        session: AsyncSession = Depends(get_async_session)) -> UnitOfWork:
+    """请求级工作单元，与同一请求内的其他依赖共享会话"""
+    return UnitOfWork(session)
 
 
-def get_user_service(
-        session: Session = Depends(get_session),
-        verification: VerificationService = Depends(get_verification)
+async def get_user_service(
+        uow: UnitOfWork = Depends(get_unit_of_work),
+        verification: VerificationService = Depends(get_verification),
+        r: redis.Redis = Depends(get_redis)
 ) -> UserService:
     """获取用户服务依赖"""
-    return UserService(session, verification)
+    cache = UserCache(r) if settings.USER_CACHE_ENABLED else None
+    return UserService(uow, verification, cache)
@@ -1,10 +1,11 @@
 from fastapi import APIRouter
-from ainewsback.api.v1.user import logon_router
+from ainewsback.api.v1.user import logon_router, users_router
 from ainewsback.api.v1.base import root_router
 
 # 用户端路由
 user_router = APIRouter(prefix='/user/api/v1')
 user_router.include_router(logon_router)
+user_router.include_router(users_router)
 
 # 基础路由
 base_router = APIRouter()
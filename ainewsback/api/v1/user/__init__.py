@@ -1,5 +1,7 @@
 from ainewsback.api.v1.user.login import router as logon_router
+from ainewsback.api.v1.user.users import router as users_router
 
 __all__ = [
-    "logon_router"
-]
\ No newline at end of file
+    "logon_router",
+    "users_router"
+]
@@ -1,12 +1,14 @@
 from fastapi import APIRouter, Depends, Query
 
 from ainewsback.api.v1.deps import get_user_service
+from ainewsback.core.responses import FastJSONRoute
 from ainewsback.schemas.base import resp, resp_200, resp_500
 from ainewsback.schemas.user import LoginAuthRequest, LoginAuthResponse, \
-    LoginCodeRequest
+    LoginCodeRequest, UserRead
 from ainewsback.services.user_service import UserService
 
-router = APIRouter(prefix="/login", tags=["login"])
+router = APIRouter(prefix="/login", tags=["login"],
+                   route_class=FastJSONRoute)
 
 
 @router.post("/login_auth")
@@ -15,7 +17,7 @@ async def login_auth(
         user_service: UserService = Depends(get_user_service)
 ):
     """用户密码登录"""
-    user, token, error_msg = user_service.authenticate_by_password(
+    user, token, error_msg = await user_service.authenticate_by_password(
         phone=item.phone,
         password=item.password
     )
@@ -23,7 +25,8 @@ async def login_auth(
     if error_msg:
         return resp(code=500, message=error_msg)
 
-    return resp_200(LoginAuthResponse(user=user, token=token))
+    return resp_200(LoginAuthResponse(
+        user=UserRead.model_validate(user), token=token))
 
 
 @router.get("/send_code")
@@ -57,4 +60,5 @@ async def login_code(
     if msg:
         return resp(code=500, message=msg)
 
-    return resp_200(LoginAuthResponse(user=user, token=token))
+    return resp_200(LoginAuthResponse(
+        user=UserRead.model_validate(user), token=token))
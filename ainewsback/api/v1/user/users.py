@@ -0,0 +1,39 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+
+from ainewsback.api.v1.deps import get_user_service
+from ainewsback.core.responses import FastJSONRoute
+from ainewsback.schemas.base import CursorPage, resp, resp_200
+from ainewsback.schemas.user import UserPublic
+from ainewsback.services.user_service import UserService
+
+router = APIRouter(prefix="/users", tags=["users"],
+                   route_class=FastJSONRoute)
+
+
+@router.get("")
+async def list_users(
+        keyword: Optional[str] = Query(
+            None, max_length=50, title="关键字",
+            description="手机号前缀或用户名，为空时按 id 列出"
+        ),
+        cursor: Optional[str] = Query(
+            None, max_length=512, description="上一页返回的 next_cursor"
+        ),
+        limit: int = Query(20, ge=1, le=100),
+        user_service: UserService = Depends(get_user_service),
+):
+    """用户列表/搜索（游标分页）"""
+    try:
+        if keyword:
+            page = await user_service.search_users(keyword, limit, cursor)
+        else:
+            page = await user_service.list_users(limit, cursor)
+    except ValueError as e:
+        return resp(code=400, message=str(e))
+
+    return resp_200(CursorPage[UserPublic](
+        items=[UserPublic.model_validate(u) for u in page.items],
+        next_cursor=page.next_cursor,
+    ))
@@ -0,0 +1,119 @@
+"""
+命令行入口
+
+用法:
+    ainewsback migrate               创建数据表并升级已有表结构（每次部署启动服务前执行）
+    ainewsback serve --workers 4     启动生产服务（多进程）
+"""
+import argparse
+import os
+import sys
+from importlib.util import find_spec
+from typing import Optional, Sequence
+
+
+def migrate(args: argparse.Namespace) -> int:
+    """创建数据表并升级已有表结构，结束后释放连接池"""
+    from ainewsback.core.database import create_db_and_tables, get_engine
+
+    try:
+        create_db_and_tables()
+    except RuntimeError as e:
+        print(f"迁移失败: {e}", file=sys.stderr)
+        return 1
+    finally:
+        get_engine().dispose()
+    print("数据表创建/升级完成")
+    return 0
+
+
+def resolve_implementation(choice: str, preferred: str, fallback: str) -> str:
+    """auto 时已安装 preferred 则使用，否则回退 fallback"""
+    if choice != "auto":
+        return choice
+    return preferred if find_spec(preferred) is not None else fallback
+
+
+def serve(args: argparse.Namespace) -> int:
+    """
+    启动 uvicorn
+
+    每个 worker 是独立进程，各自执行 lifespan 并创建自己的数据库/Redis 连接池；
+    进程数经环境变量传给 worker，用于均分 DB_MAX_CONNECTIONS 等上限。
+    """
+    import uvicorn
+
+    from ainewsback.core.config import settings
+
+    if args.reload and args.workers > 1:
+        print("--reload 不能与多个 worker 同时使用")
+        return 2
+
+    os.environ["SERVER_WORKERS"] = str(args.workers)
+    settings.SERVER_WORKERS = args.workers
+    loop = resolve_implementation(args.loop, "uvloop", "asyncio")
+    http = resolve_implementation(args.http, "httptools", "h11")
+    print(f"启动服务 {args.host}:{args.port} workers={args.workers} "
+          f"loop={loop} http={http}")
+
+    uvicorn.run(
+        "ainewsback.main:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers if args.workers > 1 else None,
+        loop=loop,
+        http=http,
+        backlog=args.backlog,
+        timeout_keep_alive=args.keep_alive,
+        limit_concurrency=args.limit_concurrency,
+        timeout_graceful_shutdown=args.graceful_timeout,
+        reload=args.reload,
+        # 日志与访问日志由应用自身配置
+        log_config=None,
+        access_log=False,
+    )
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    from ainewsback.core.config import settings
+
+    parser = argparse.ArgumentParser(
+        prog="ainewsback", description=__doc__,
+        formatter_class=argparse.RawTextHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("migrate", help="创建数据表并升级表结构").set_defaults(
+        handler=migrate)
+
+    server = commands.add_parser(
+        "serve", help="启动服务",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    server.set_defaults(handler=serve)
+    server.add_argument("--host", default=settings.HOST)
+    server.add_argument("--port", type=int, default=settings.PORT)
+    server.add_argument("-w", "--workers", type=int,
+                        default=settings.SERVER_WORKERS,
+                        help="worker 进程数，一般取容器可用 CPU 核数")
+    server.add_argument("--backlog", type=int, default=settings.SERVER_BACKLOG,
+                        help="listen 队列长度")
+    server.add_argument("--keep-alive", type=int,
+                        default=settings.SERVER_KEEP_ALIVE,
+                        help="空闲长连接保持秒数，应小于前置代理的超时")
+    server.add_argument("--limit-concurrency", type=int,
+                        default=settings.SERVER_LIMIT_CONCURRENCY,
+                        help="每个 worker 的并发上限，超过返回 503")
+    server.add_argument("--graceful-timeout", type=int,
+                        default=settings.SERVER_GRACEFUL_TIMEOUT,
+                        help="关闭时等待在途请求的秒数")
+    server.add_argument("--loop", choices=("auto", "asyncio", "uvloop"),
+                        default=settings.SERVER_LOOP)
+    server.add_argument("--http", choices=("auto", "h11", "httptools"),
+                        default=settings.SERVER_HTTP)
+    server.add_argument("--reload", action="store_true",
+                        help="代码变更时自动重启（仅开发环境）")
+    return parser
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
@@ -1,5 +1,5 @@
-import tomllib
-from functools import lru_cache
+from email.utils import parseaddr
+from importlib.metadata import PackageNotFoundError, metadata
 from pathlib import Path
 from typing import Any, Dict, Literal, Optional
 
@@ -7,68 +7,88 @@ from pydantic import PostgresDsn, computed_field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
-class PyProjectConfig:
-    """读取 pyproject.toml 的辅助类"""
+class PackageMetadata:
+    """
+    项目元数据
+
+    优先读取已安装包的元数据（wheel 部署时没有 pyproject.toml），
+    仅在未安装的源码目录中回退解析 pyproject.toml。
+    """
+
+    DISTRIBUTION = "ainewsback"
 
     _cache: Optional[Dict[str, Any]] = None
 
     @classmethod
     def load(cls) -> Dict[str, Any]:
-        """加载并缓存 pyproject.toml"""
-        if cls._cache is not None:
-            return cls._cache
+        """加载并缓存元数据"""
+        if cls._cache is None:
+            try:
+                cls._cache = cls._from_distribution()
+            except PackageNotFoundError:
+                cls._cache = cls._from_pyproject()
+        return cls._cache
+
+    @classmethod
+    def _from_distribution(cls) -> Dict[str, Any]:
+        meta = metadata(cls.DISTRIBUTION)
+        name, email = parseaddr(meta.get("Author-email") or "")
+        return {
+            "name": meta["Name"],
+            "version": meta["Version"],
+            "description": meta.get("Summary") or "Unknown",
+            "author": {"name": meta.get("Author") or name or None,
+                       "email": email or None},
+            "license": (meta.get("License-Expression")
+                        or meta.get("License") or "Unknown"),
+        }
 
+    @classmethod
+    def _from_pyproject(cls) -> Dict[str, Any]:
         pyproject_path = Path(
             __file__).parent.parent.parent / "pyproject.toml"
+        project: Dict[str, Any] = {}
+        if pyproject_path.exists():
+            import tomllib
 
-        if not pyproject_path.exists():
-            raise FileNotFoundError(
-                f"pyproject.toml not found at {pyproject_path}")
+            with open(pyproject_path, "rb") as f:
+                project = tomllib.load(f).get("project", {})
 
-        with open(pyproject_path, "rb") as f:
-            cls._cache = tomllib.load(f)
-
-        return cls._cache
-
-    @classmethod
-    def get_poetry_config(cls) -> Dict[str, Any]:
-        """获取 Poetry 配置"""
-        return cls.load().get("project", {})
+        authors = project.get("authors") or [{}]
+        author = authors[0] if isinstance(authors[0], dict) else {}
+        return {
+            "name": project.get("name", cls.DISTRIBUTION),
+            "version": project.get("version", "0.0.0"),
+            "description": project.get("description", "Unknown"),
+            "author": {"name": author.get("name"),
+                       "email": author.get("email")},
+            "license": project.get("license", "Unknown"),
+        }
 
     @classmethod
     def get_name(cls) -> str:
         """获取项目名称"""
-        return cls.get_poetry_config().get("name", "Unknown")
+        return cls.load()["name"]
 
     @classmethod
     def get_version(cls) -> str:
         """获取项目版本"""
-        return cls.get_poetry_config().get("version", "0.0.0")
+        return cls.load()["version"]
 
     @classmethod
     def get_description(cls) -> str:
         """获取项目描述"""
-        return cls.get_poetry_config().get("description", "Unknown")
+        return cls.load()["description"]
 
     @classmethod
     def get_first_author_contact(cls) -> dict:
-        """
-        获取项目第一个作者的 name 和 email（用于 FastAPI contact）
-        """
-        authors = cls.get_poetry_config().get("authors", [])
-        author_obj = authors[0] if authors else {}
-        if isinstance(author_obj, dict):
-            return {
-                "name": author_obj.get("name"),
-                "email": author_obj.get("email"),
-            }
-        return {}
+        """获取项目第一个作者的 name 和 email（用于 FastAPI contact）"""
+        return dict(cls.load()["author"])
 
     @classmethod
     def get_license(cls) -> dict:
         """获取项目许可证"""
-        license_info = cls.get_poetry_config().get("license", "Unknow")
-
+        license_info = cls.load()["license"]
         return {
             "name": license_info,
             "identifier": license_info,
@@ -81,11 +101,11 @@ class Settings(BaseSettings):
                                       env_file_encoding="utf-8")
 
     # 项目元数据
-    APP_NAME: str = PyProjectConfig.get_name()
-    APP_VERSION: str = PyProjectConfig.get_version()
-    APP_DESCRIPTION: str = PyProjectConfig.get_description()
-    ADMIN_CONTACT: dict = PyProjectConfig.get_first_author_contact()
-    APP_LICENSE: dict = PyProjectConfig.get_license()
+    APP_NAME: str = PackageMetadata.get_name()
+    APP_VERSION: str = PackageMetadata.get_version()
+    APP_DESCRIPTION: str = PackageMetadata.get_description()
+    ADMIN_CONTACT: dict = PackageMetadata.get_first_author_contact()
+    APP_LICENSE: dict = PackageMetadata.get_license()
 
     # 应用配置
     APP_ENV: Literal["dev", "pro", "test"] = "dev"
@@ -99,6 +119,9 @@ class Settings(BaseSettings):
     LOG_FILE_MAX_BYTES: int = 10485760  # 10MB
     LOG_FILE_BACKUP_COUNT: int = 10
     LOG_FORMAT: Literal["json", "text", "colored"] = "json"
+    # 日志经有界队列交给后台线程写出，队列满时丢弃
+    LOG_QUEUE_ENABLED: bool = True
+    LOG_QUEUE_SIZE: int = 10000
 
     # Access Log
     ENABLE_ACCESS_LOG: bool = True
@@ -108,21 +131,51 @@ class Settings(BaseSettings):
     ENABLE_SQL_LOG: bool = False
     SQL_LOG_LEVEL: str = "INFO"
 
+    # 监控接口（/metrics、/stats）: 来源地址在白名单内或携带 Bearer 监控令牌才可访问。
+    # 经反向代理的公网请求来源是代理地址，不要把代理所在网段加入白名单
+    MONITORING_ALLOWED_NETWORKS: list[str] = ["127.0.0.1/32", "::1/128"]
+    MONITORING_TOKEN: str = ""
+
     # 服务器配置
     HOST: str = "0.0.0.0"
     PORT: int = 8080
 
+    # `ainewsback serve` 参数（命令行参数优先）
+    SERVER_WORKERS: int = 1
+    SERVER_BACKLOG: int = 2048
+    SERVER_KEEP_ALIVE: int = 5
+    # 同时处理的连接与请求上限，超过时直接返回 503，None 为不限制
+    SERVER_LIMIT_CONCURRENCY: Optional[int] = None
+    # 优雅关闭等待在途请求的秒数
+    SERVER_GRACEFUL_TIMEOUT: int = 30
+    # auto: 已安装 uvloop/httptools 时使用，否则回退 asyncio/h11
+    SERVER_LOOP: Literal["auto", "asyncio", "uvloop"] = "auto"
+    SERVER_HTTP: Literal["auto", "h11", "httptools"] = "auto"
+
     DB_SERVER: str = ""
     DB_PORT: int = 0
     DB_USER: str = ""
     DB_PASSWORD: str = ""
     DB_NAME: str = ""
 
-    @computed_field  # type: ignore[prop-decorator]
-    @property
-    def SQLALCHEMY_DATABASE_URI(self) -> PostgresDsn:
+    # 数据库连接池（每个进程独立计算，
+    # 进程数 × (DB_POOL_SIZE + DB_MAX_OVERFLOW) 不应超过 Postgres max_connections）
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 5
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_RECYCLE: int = 1800
+    # 所有 worker 共用的连接上限，大于 0 时按 SERVER_WORKERS 均分，
+    # 每个进程的 DB_POOL_SIZE + DB_MAX_OVERFLOW 不超过均分后的份额
+    DB_MAX_CONNECTIONS: int = 0
+
+    def per_worker(self, total: int) -> int:
+        """把所有 worker 共用的上限均分到当前进程（至少为 1）"""
+        return max(1, total // max(1, self.SERVER_WORKERS))
+
+    def _build_database_uri(self, scheme: str) -> PostgresDsn:
         return PostgresDsn.build(
-            scheme="postgresql+psycopg2",
+            scheme=scheme,
             username=self.DB_USER,
             password=self.DB_PASSWORD,
             host=self.DB_SERVER,
@@ -130,9 +183,40 @@ class Settings(BaseSettings):
             path=self.DB_NAME,
         )
 
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def SQLALCHEMY_DATABASE_URI(self) -> PostgresDsn:
+        """同步驱动(psycopg2)，仅供脚本使用"""
+        return self._build_database_uri("postgresql+psycopg2")
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def SQLALCHEMY_ASYNC_DATABASE_URI(self) -> PostgresDsn:
+        """异步驱动(asyncpg)，供 API 使用"""
+        return self._build_database_uri("postgresql+asyncpg")
+
     # 钉钉机器人配置
     DINGTALK_WEBHOOK_URL: str = ""
     DINGTALK_SECRET: str = ""
+    # 多个机器人轮询发送: [{"webhook_url": "...", "secret": "..."}]，为空时使用上面的单个机器人
+    DINGTALK_ROBOTS: list[dict] = []
+    # 每个机器人每分钟最多发送的消息数
+    DINGTALK_RATE_LIMIT_PER_MINUTE: int = 20
+    # true: 限流额度存于 Redis，所有 worker 与实例共享；
+    # false 或 Redis 不可用时每个 worker 按 SERVER_WORKERS 均分额度
+    DINGTALK_RATE_LIMIT_SHARED: bool = True
+    # 合并发送: 在窗口内收集验证码合并为一条 Markdown 消息
+    DINGTALK_BATCH_ENABLED: bool = False
+    DINGTALK_BATCH_WINDOW_SECONDS: float = 2.0
+    DINGTALK_BATCH_MAX_SIZE: int = 20
+
+    # 对外 HTTP 客户端（钉钉等），应用生命周期内复用
+    HTTP_MAX_CONNECTIONS: int = 10
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    HTTP_KEEPALIVE_EXPIRY: float = 60.0
+    HTTP_TIMEOUT: float = 10.0
+    HTTP_CONNECT_TIMEOUT: float = 3.0
+    HTTP_POOL_TIMEOUT: float = 5.0
 
     # 验证码设置
     CODE_LENGTH: int = 0
@@ -140,12 +224,58 @@ class Settings(BaseSettings):
     CODE_RATE_LIMIT: int = 0
     MAX_VERIFY_ATTEMPTS: int = 0
 
+    # 验证码通知发件箱（异步投递）
+    NOTIFY_OUTBOX_ENABLED: bool = True
+    NOTIFY_OUTBOX_CONCURRENCY: int = 5
+    NOTIFY_OUTBOX_MAX_ATTEMPTS: int = 5
+    NOTIFY_OUTBOX_RETRY_BASE_SECONDS: float = 1.0
+    NOTIFY_OUTBOX_RETRY_MAX_SECONDS: float = 60.0
+    NOTIFY_OUTBOX_STATUS_TTL: int = 86400
+    # worker 心跳有效期（秒）: 超时未续期视为已退出，其处理中消息由其他 worker 回收
+    NOTIFY_OUTBOX_WORKER_TTL: int = 30
+
     # Redis
     REDIS_HOST: str = ""
     REDIS_PORT: int = 0
     REDIS_DB: int = 0
     REDIS_PASSWORD: str = ""
     REDIS_DECODE_RESPONSES: bool = True
+    # standalone: 单机; sentinel: 经哨兵发现主节点; cluster: Redis Cluster
+    REDIS_MODE: Literal["standalone", "sentinel", "cluster"] = "standalone"
+    # 哨兵地址 ["host:port", ...] 与主节点名称
+    REDIS_SENTINELS: list[str] = []
+    REDIS_SENTINEL_SERVICE: str = "mymaster"
+    REDIS_SENTINEL_PASSWORD: str = ""
+    # 集群启动节点 ["host:port", ...]，为空时使用 REDIS_HOST:REDIS_PORT
+    REDIS_CLUSTER_NODES: list[str] = []
+    # 所有 worker 共用的连接上限，按 SERVER_WORKERS 均分
+    # （集群模式下为每个节点的上限）
+    REDIS_MAX_CONNECTIONS: int = 50
+    # 连接池耗尽时等待空闲连接的秒数，超时抛出 ConnectionError
+    REDIS_POOL_TIMEOUT: float = 5.0
+    REDIS_SOCKET_CONNECT_TIMEOUT: float = 5.0
+    # 需大于阻塞命令（BLMOVE 等）的超时
+    REDIS_SOCKET_TIMEOUT: float = 5.0
+    REDIS_HEALTH_CHECK_INTERVAL: int = 30
+    # 连接错误/超时的重试次数与指数退避（带抖动）
+    REDIS_RETRY_ATTEMPTS: int = 3
+    REDIS_RETRY_BACKOFF_BASE: float = 0.05
+    REDIS_RETRY_BACKOFF_CAP: float = 1.0
+    # 单条命令超过该毫秒数时记录警告日志，0 为关闭
+    REDIS_SLOW_COMMAND_MS: float = 0
+
+    # 近端缓存: 进程内保存热点 key（GET/TTL 读取），由 CLIENT TRACKING
+    # 广播失效保持一致；写入仍直达 Redis。不支持集群模式
+    REDIS_NEAR_CACHE_ENABLED: bool = False
+    # 缓存的 key 前缀，也是服务端广播失效的前缀
+    REDIS_NEAR_CACHE_PREFIXES: list[str] = ["cache:user",
+                                            "verification:rate_limit:"]
+    REDIS_NEAR_CACHE_MAX_KEYS: int = 10000
+    REDIS_NEAR_CACHE_MAX_BYTES: int = 16 * 1024 * 1024
+    # 超过该大小的值不进入近端缓存
+    REDIS_NEAR_CACHE_MAX_ENTRY_BYTES: int = 64 * 1024
+    # 条目最长存活秒数（失效通知丢失时的兜底）
+    REDIS_NEAR_CACHE_TTL_SECONDS: float = 60.0
 
     # JWT 配置
     SECRET_KEY: str = ""
@@ -155,12 +285,34 @@ class Settings(BaseSettings):
     TOKEN_AUDIENCE: list[str] = []
     ACCESS_TOKEN_ISSUER: list[str] = []
 
+    # 密码哈希（新密码使用该算法，历史 MD5 与其他算法在登录成功后自动升级）
+    PASSWORD_HASH_SCHEME: Literal["bcrypt", "argon2"] = "bcrypt"
+    PASSWORD_BCRYPT_ROUNDS: int = 12
+    PASSWORD_ARGON2_TIME_COST: int = 3
+    PASSWORD_ARGON2_MEMORY_COST: int = 65536
+    PASSWORD_ARGON2_PARALLELISM: int = 4
+    # 哈希计算线程数，0 表示 CPU 核数
+    PASSWORD_HASH_WORKERS: int = 0
+
+    # 已验证 Token 缓存
+    JWT_CACHE_ENABLED: bool = True
+    JWT_CACHE_MAX_SIZE: int = 10000
+    JWT_CACHE_TTL_SECONDS: int = 300
+
+    # 用户读穿缓存（Redis）
+    USER_CACHE_ENABLED: bool = True
+    USER_CACHE_TTL_SECONDS: int = 600
+    # 不存在的用户缓存秒数
+    USER_CACHE_NEGATIVE_TTL_SECONDS: int = 30
+    # 写入后墓碑保留秒数，期间读取回源且不回填，应大于一次回源查询的最长耗时
+    USER_CACHE_TOMBSTONE_TTL_SECONDS: int = 10
+
 
 # 创建全局配置实例
 settings = Settings()
 
 
 # 导出便捷函数
-@lru_cache
 def get_settings() -> Settings:
-    return Settings()
+    """返回全局配置实例（不重复解析环境变量）"""
+    return settings
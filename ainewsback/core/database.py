@@ -1,17 +1,336 @@
+import time
+from typing import Dict, Iterable, List, Optional, Type
+
+from sqlalchemy import Connection, Engine, Index, Table, event, exc, func, \
+    inspect, select, text
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, \
+    create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+from sqlalchemy.schema import CreateIndex
 from sqlmodel import SQLModel, Session, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from .config import settings
+from .metrics import CollectedMetric, Sample, registry
+
+POOL_CHECKOUT_WAIT = registry.histogram(
+    "db_pool_checkout_wait_seconds", "获取连接耗时（含排队等待）", ("pool",))
+POOL_CONNECT_LATENCY = registry.histogram(
+    "db_pool_connect_seconds", "新建物理连接耗时", ("pool",))
+QUERY_LATENCY = registry.histogram(
+    "db_query_duration_seconds", "SQL 语句执行耗时", ("pool", "operation"))
+QUERY_ERRORS = registry.counter(
+    "db_query_errors_total", "SQL 语句执行失败次数", ("pool",))
+
+
+class PoolMonitor:
+    """连接池监控：获取连接耗时、建连耗时、超时次数及实时占用"""
+
+    def __init__(self, name: str):
+        self.name = name
+        # 获取连接耗时（含排队等待与溢出时新建连接）
+        self.checkout_wait = POOL_CHECKOUT_WAIT.labels(name)
+        # 新建物理连接耗时
+        self.connect_latency = POOL_CONNECT_LATENCY.labels(name)
+        self.checkout_timeouts = 0
+        self.engine: Optional[Engine] = None
+
+    def instrument(self, pool_cls: Type[Pool]) -> Type[Pool]:
+        """生成记录获取连接耗时的连接池类"""
+        monitor = self
+
+        class InstrumentedPool(pool_cls):  # type: ignore[valid-type,misc]
+            def _do_get(self):
+                start = time.perf_counter()
+                try:
+                    return super()._do_get()
+                except exc.TimeoutError:
+                    monitor.checkout_timeouts += 1
+                    raise
+                finally:
+                    monitor.checkout_wait.observe(time.perf_counter() - start)
+
+        InstrumentedPool.__name__ = f"Instrumented{pool_cls.__name__}"
+        return InstrumentedPool
+
+    def attach(self, engine: Engine) -> None:
+        """挂载建连耗时与语句耗时监听"""
+        self.engine = engine
+
+        @event.listens_for(engine, "do_connect")
+        def _timed_connect(dialect, conn_rec, cargs, cparams):
+            start = time.perf_counter()
+            try:
+                return dialect.connect(*cargs, **cparams)
+            finally:
+                self.connect_latency.observe(time.perf_counter() - start)
+
+        # 子指标预先取出，事件回调中只做属性读写
+        latency = {op: QUERY_LATENCY.labels(self.name, op)
+                   for op in ("select", "insert", "update", "delete")}
+        errors = QUERY_ERRORS.labels(self.name)
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def _query_start(conn, cursor, statement, parameters, context,
+                         executemany):
+            context._query_start = time.perf_counter()
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def _query_end(conn, cursor, statement, parameters, context,
+                       executemany):
+            if context.isinsert:
+                op = "insert"
+            elif context.isupdate:
+                op = "update"
+            elif context.isdelete:
+                op = "delete"
+            else:
+                op = "select"
+            latency[op].observe(time.perf_counter() - context._query_start)
+
+        @event.listens_for(engine, "handle_error")
+        def _query_error(exception_context):
+            errors.inc()
+
+    def stats(self) -> Dict[str, object]:
+        """导出连接池快照"""
+        pool = self.engine.pool if self.engine is not None else None
+        return {
+            "pool_size": pool.size() if pool else 0,
+            "checked_in": pool.checkedin() if pool else 0,
+            "checked_out": pool.checkedout() if pool else 0,
+            "overflow": pool.overflow() if pool else 0,
+            "checkout_timeouts": self.checkout_timeouts,
+            "checkout_wait_seconds": self.checkout_wait.snapshot(),
+            "connect_latency_seconds": self.connect_latency.snapshot(),
+        }
+
+
+def _engine_options() -> dict:
+    """从配置读取引擎与连接池参数（多 worker 时按进程均分连接上限）"""
+    pool_size, max_overflow = settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW
+    if settings.DB_MAX_CONNECTIONS:
+        budget = settings.per_worker(settings.DB_MAX_CONNECTIONS)
+        pool_size = min(pool_size, budget)
+        max_overflow = min(max_overflow, budget - pool_size)
+    return {
+        "echo": settings.ENABLE_SQL_LOG,
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+    }
+
+
+sync_pool_monitor = PoolMonitor("sync")
+async_pool_monitor = PoolMonitor("async")
+
+# 引擎在首次使用时创建，导入本模块不解析连接串、不建连接池
+_engine: Optional[Engine] = None
+_async_engine: Optional[AsyncEngine] = None
+_async_session_factory: Optional[async_sessionmaker[AsyncSession]] = None
+
+
+def get_engine() -> Engine:
+    """同步数据库引擎（仅供脚本使用）"""
+    global _engine
+    if _engine is None:
+        _engine = create_engine(
+            str(settings.SQLALCHEMY_DATABASE_URI),
+            poolclass=sync_pool_monitor.instrument(QueuePool),
+            **_engine_options())
+        sync_pool_monitor.attach(_engine)
+    return _engine
+
+
+def get_async_engine() -> AsyncEngine:
+    """异步数据库引擎（API 请求路径使用，不阻塞事件循环）"""
+    global _async_engine
+    if _async_engine is None:
+        _async_engine = create_async_engine(
+            str(settings.SQLALCHEMY_ASYNC_DATABASE_URI),
+            poolclass=async_pool_monitor.instrument(AsyncAdaptedQueuePool),
+            **_engine_options())
+        async_pool_monitor.attach(_async_engine.sync_engine)
+    return _async_engine
+
+
+def get_async_session_factory() -> async_sessionmaker[AsyncSession]:
+    """异步会话工厂"""
+    global _async_session_factory
+    if _async_session_factory is None:
+        _async_session_factory = async_sessionmaker(
+            get_async_engine(), class_=AsyncSession, expire_on_commit=False)
+    return _async_session_factory
+
+
+# (指标名, 说明, 类型, 取值)
+_POOL_GAUGES = (
+    ("db_pool_size", "连接池大小", "gauge",
+     lambda monitor, pool: pool.size()),
+    ("db_pool_checked_out", "已借出连接数", "gauge",
+     lambda monitor, pool: pool.checkedout()),
+    ("db_pool_overflow", "溢出连接数", "gauge",
+     lambda monitor, pool: pool.overflow()),
+    ("db_pool_checkout_timeouts_total", "获取连接超时次数", "counter",
+     lambda monitor, pool: monitor.checkout_timeouts),
+)
+
 
-# 创建数据库引擎
-engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI), echo=True)
+def _collect_pool_metrics() -> Iterable[CollectedMetric]:
+    """抓取时读取连接池实时占用"""
+    monitors = [m for m in (async_pool_monitor, sync_pool_monitor)
+                if m.engine is not None]
+    for name, help_text, kind, read in _POOL_GAUGES:
+        yield CollectedMetric(name, help_text, kind, [
+            Sample({"pool": m.name}, read(m, m.engine.pool))
+            for m in monitors])
+
+
+registry.register_collector(_collect_pool_metrics)
+
+
+def get_pool_stats() -> Dict[str, object]:
+    """获取连接池监控数据"""
+    return {
+        "async": async_pool_monitor.stats(),
+        "sync": sync_pool_monitor.stats(),
+    }
+
+
+def _import_models() -> None:
+    """导入模型模块，使表与建表事件（如 pg_trgm）注册到 SQLModel.metadata"""
+    import ainewsback.models.user  # noqa: F401
+
+
+def widen_column_statements(table: Table,
+                            existing: List[dict]) -> List[str]:
+    """
+    生成放宽字符串列长度的 ALTER 语句（PostgreSQL）
+
+    Args:
+        table: 模型中的表定义
+        existing: 数据库中现有的列（Inspector.get_columns 的结果）
+    """
+    lengths = {column["name"]: getattr(column["type"], "length", None)
+               for column in existing}
+    statements = []
+    for column in table.columns:
+        # SQLModel 的 str 字段为 AutoString（TypeDecorator），按 length 判断
+        length = getattr(column.type, "length", None)
+        current = lengths.get(column.name)
+        if length and current is not None and current < length:
+            statements.append(
+                f"ALTER TABLE {table.name} ALTER COLUMN {column.name} "
+                f"TYPE varchar({length})")
+    return statements
+
+
+def _upgrade_tables(conn: Connection) -> None:
+    """
+    升级已存在的表
+
+    create_all 只创建缺失的表，不会修改已有表结构；
+    历史库 ap_user.password 为 varchar(32)，放不下 bcrypt 哈希（60 字符）。
+    """
+    if conn.dialect.name != "postgresql":
+        # SQLite 不限制 varchar 长度，也不支持修改列类型
+        return
+    inspector = inspect(conn)
+    for table in SQLModel.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        for statement in widen_column_statements(
+                table, inspector.get_columns(table.name)):
+            conn.execute(text(statement))
+
+
+def _check_unique(conn: Connection, index: Index) -> None:
+    """
+    创建唯一索引前检查重复值
+
+    Raises:
+        RuntimeError: 存在重复值，需要先人工清理
+    """
+    columns = list(index.columns)
+    duplicates = conn.execute(
+        select(*columns)
+        .where(*(column.is_not(None) for column in columns))
+        .group_by(*columns)
+        .having(func.count() > 1)
+        .limit(5)
+    ).all()
+    if duplicates:
+        names = ", ".join(column.name for column in columns)
+        values = ", ".join(str(tuple(row)) for row in duplicates)
+        raise RuntimeError(
+            f"{index.table.name}({names}) 存在重复值，无法创建唯一索引 "
+            f"{index.name}，请先清理重复数据: {values}")
+
+
+def _create_missing_indexes(conn: Connection) -> None:
+    """
+    为已存在的表补建模型中声明的索引
+
+    ap_user.phone 唯一索引同时是 ON CONFLICT (phone) 的冲突目标。
+    """
+    inspector = inspect(conn)
+    missing = []
+    for table in SQLModel.metadata.sorted_tables:
+        existing = {index["name"]
+                    for index in inspector.get_indexes(table.name)}
+        missing.extend(index for index in sorted(
+            table.indexes, key=lambda i: i.name) if index.name not in existing)
+    # 先检查全部唯一索引，有重复值时不执行任何 DDL
+    for index in missing:
+        if index.unique:
+            _check_unique(conn, index)
+
+    if conn.dialect.name == "postgresql":
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    for index in missing:
+        conn.execute(CreateIndex(index, if_not_exists=True))
+
+
+def _migrate(conn: Connection) -> None:
+    SQLModel.metadata.create_all(conn)
+    _upgrade_tables(conn)
+    _create_missing_indexes(conn)
 
 
 def create_db_and_tables():
-    """创建数据库和表"""
-    SQLModel.metadata.create_all(engine)
+    """创建数据库和表并升级已有表（由 `ainewsback migrate` 调用，启动时不执行）"""
+    _import_models()
+    with get_engine().begin() as conn:
+        _migrate(conn)
+
+
+async def create_db_and_tables_async():
+    """创建数据库和表并升级已有表（异步）"""
+    _import_models()
+    async with get_async_engine().begin() as conn:
+        await conn.run_sync(_migrate)
+
+
+async def dispose_engines():
+    """释放已创建的数据库连接池"""
+    global _engine, _async_engine, _async_session_factory
+    if _async_engine is not None:
+        await _async_engine.dispose()
+    if _engine is not None:
+        _engine.dispose()
+    _engine = _async_engine = _async_session_factory = None
+    sync_pool_monitor.engine = async_pool_monitor.engine = None
 
 
 def get_session():
-    """获取数据库会话"""
-    with Session(engine) as session:
+    """获取数据库会话（同步，仅供脚本使用）"""
+    with Session(get_engine()) as session:
+        yield session
+
+
+async def get_async_session():
+    """获取异步数据库会话"""
+    async with get_async_session_factory()() as session:
         yield session
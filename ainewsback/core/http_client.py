@@ -0,0 +1,36 @@
+from typing import Optional
+
+import httpx
+
+from ainewsback.core.config import settings
+
+
+class AsyncHttpClient:
+    """HTTP 客户端单例（应用生命周期内复用连接池与长连接）"""
+    _instance: Optional[httpx.AsyncClient] = None
+
+    @classmethod
+    async def get_client(cls) -> httpx.AsyncClient:
+        """获取 HTTP 客户端实例"""
+        if cls._instance is None:
+            cls._instance = httpx.AsyncClient(
+                # max_connections 同时限制对外并发请求数，超出时排队等待
+                limits=httpx.Limits(
+                    max_connections=settings.HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+                ),
+                timeout=httpx.Timeout(
+                    settings.HTTP_TIMEOUT,
+                    connect=settings.HTTP_CONNECT_TIMEOUT,
+                    pool=settings.HTTP_POOL_TIMEOUT,
+                ),
+            )
+        return cls._instance
+
+    @classmethod
+    async def close(cls):
+        """关闭 HTTP 客户端"""
+        if cls._instance:
+            await cls._instance.aclose()
+            cls._instance = None
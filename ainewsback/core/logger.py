@@ -1,29 +1,75 @@
+import copy
 import logging
 import logging.handlers
+import queue
 import sys
-from datetime import UTC, datetime
+import time
 from pathlib import Path
 
 import colorlog
-from pythonjsonlogger.json import JsonFormatter
 
 from ainewsback.core.config import settings
+from ainewsback.utils.fast_json import dumps
 
+# LogRecord 自带属性，其余属性视为 extra 字段
+_RECORD_ATTRS = frozenset(
+    vars(logging.LogRecord("", 0, "", 0, "", (), None))
+) | {"message", "asctime", "taskName"}
 
-class CustomJsonFormatter(JsonFormatter):
-    """自定义 JSON 格式化器，用于扩展日志字段，便于日志分析和追踪。"""
 
-    def add_fields(self, log_record, record, message_dict):
-        super(CustomJsonFormatter, self).add_fields(log_record, record, message_dict)
-        log_record['timestamp'] = datetime.now(UTC).isoformat()
-        log_record['level'] = record.levelname
-        log_record['logger'] = record.name
-        log_record['module'] = record.module
-        log_record['function'] = record.funcName
-        log_record['line'] = record.lineno
-        log_record['env'] = settings.APP_ENV
-        log_record['app'] = settings.APP_NAME
-        log_record['version'] = settings.APP_VERSION
+class CustomJsonFormatter(logging.Formatter):
+    """
+    自定义 JSON 格式化器，用于扩展日志字段，便于日志分析和追踪。
+
+    时间戳取自 record.created（每秒只格式化一次），环境/应用/版本等静态字段
+    在创建时计算，extra 字段原样保留，使用 orjson（可用时）序列化。
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._static_fields = {
+            "env": settings.APP_ENV,
+            "app": settings.APP_NAME,
+            "version": settings.APP_VERSION,
+        }
+        # (秒, 该秒的 ISO 前缀)
+        self._second_cache = (-1, "")
+
+    def _timestamp(self, created: float) -> str:
+        second = int(created)
+        cached_second, prefix = self._second_cache
+        if second != cached_second:
+            prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(second))
+            self._second_cache = (second, prefix)
+        return f"{prefix}.{int((created - second) * 1e6):06d}+00:00"
+
+    def format(self, record: logging.LogRecord) -> str:
+        log_record = {
+            "timestamp": self._timestamp(record.created),
+            "level": record.levelname,
+            "name": record.name,
+            "message": record.getMessage(),
+        }
+
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS:
+                log_record[key] = value
+
+        # 经队列的记录只带 exc_text（见 BoundedQueueHandler.prepare），
+        # 直接输出时与 logging.Formatter 一样缓存到 exc_text 供其他处理器复用
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            log_record["exc_info"] = record.exc_text
+        if record.stack_info:
+            log_record["stack_info"] = self.formatStack(record.stack_info)
+
+        log_record["logger"] = record.name
+        log_record["module"] = record.module
+        log_record["function"] = record.funcName
+        log_record["line"] = record.lineno
+        log_record.update(self._static_fields)
+        return dumps(log_record)
 
 
 class ColoredFormatter(colorlog.ColoredFormatter):
@@ -63,6 +109,104 @@ class PlainFormatter(logging.Formatter):
         )
 
 
+# 入队前生成异常文本（与 logging.Formatter 默认输出一致）
+_exc_formatter = logging.Formatter()
+
+
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """有界队列处理器: 调用方只入队，队列满时丢弃并计数，不阻塞事件循环"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        入队前只合并参数并生成异常文本，格式化交给监听线程的处理器
+
+        默认实现会在调用方线程格式化整条日志并清空 exc_info/exc_text，
+        导致 JSON 日志丢失 exc_info 字段、堆栈被并入 message。
+        异常文本必须在此生成（traceback 引用的栈帧随后会变化），
+        副本不携带 exc_info，避免队列中的记录持有栈帧。
+        """
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = _exc_formatter.formatException(
+                    record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+# (日志记录器, 队列处理器, 后台写日志的监听线程)
+_queues: list[tuple[logging.Logger, BoundedQueueHandler,
+                    logging.handlers.QueueListener]] = []
+
+
+def _attach_handlers(logger: logging.Logger,
+                     handlers: list[logging.Handler]) -> None:
+    """将处理器挂到日志记录器；启用队列时放到后台线程执行格式化与文件 I/O"""
+    if not handlers:
+        return
+    if not settings.LOG_QUEUE_ENABLED:
+        for handler in handlers:
+            logger.addHandler(handler)
+        return
+
+    queue_handler = BoundedQueueHandler(queue.Queue(settings.LOG_QUEUE_SIZE))
+    listener = logging.handlers.QueueListener(
+        queue_handler.queue, *handlers, respect_handler_level=True)
+    listener.start()
+    logger.addHandler(queue_handler)
+    _queues.append((logger, queue_handler, listener))
+
+
+def _stop_queues(restore: bool) -> None:
+    """
+    停止后台日志线程并写出队列中剩余的日志
+
+    Args:
+        restore: 是否把原处理器直接挂回日志记录器（否则关闭原处理器）
+    """
+    while _queues:
+        logger, queue_handler, listener = _queues.pop()
+        logger.removeHandler(queue_handler)
+        listener.stop()
+        for handler in listener.handlers:
+            handler.flush()
+            if restore:
+                logger.addHandler(handler)
+            else:
+                handler.close()
+
+
+def shutdown_logging() -> None:
+    """
+    停止后台日志线程并写出队列中剩余的日志
+
+    原处理器直接挂回日志记录器，之后的日志（如 uvicorn 的
+    "Application shutdown complete"）同步写出，不会进入无人消费的队列。
+    """
+    _stop_queues(restore=True)
+
+
+def get_logging_stats() -> dict:
+    """日志队列统计"""
+    return {
+        "queue_enabled": settings.LOG_QUEUE_ENABLED,
+        "queued": sum(h.queue.qsize() for _, h, _ in _queues),
+        "dropped": sum(h.dropped for _, h, _ in _queues),
+    }
+
+
 def print_startup_banner():
     """打印启动欢迎图案"""
     banner = r"""
@@ -83,7 +227,7 @@ def print_startup_banner():
 def get_formatter(for_console=False):
     """根据环境和输出目标获取合适的格式化器"""
     if settings.LOG_FORMAT == "json" and not for_console:
-        return CustomJsonFormatter('%(timestamp)s %(level)s %(name)s %(message)s')
+        return CustomJsonFormatter()
     elif for_console and settings.APP_ENV == "dev":
         return ColoredFormatter()
     else:
@@ -100,19 +244,23 @@ def setup_logging():
     log_path = Path(settings.LOG_FILE_PATH)
     log_path.mkdir(parents=True, exist_ok=True)
 
+    # 重复初始化时先停止已有的后台日志线程并关闭其处理器
+    _stop_queues(restore=False)
+
     # 获取根日志记录器
     root_logger = logging.getLogger()
     root_logger.setLevel(getattr(logging, settings.LOG_LEVEL.upper()))
     root_logger.handlers.clear()
+    handlers: list[logging.Handler] = []
 
     # 控制台处理器（使用彩色格式）
     if settings.LOG_TO_CONSOLE:
         console_handler = logging.StreamHandler(sys.stdout)
         console_handler.setLevel(logging.DEBUG if settings.DEBUG else logging.INFO)
         console_handler.setFormatter(get_formatter(for_console=True))
-        root_logger.addHandler(console_handler)
+        handlers.append(console_handler)
 
-    # 文件处理器（使用纯文本格式，避免 ANSI 转义码）
+    # 文件处理器（按 LOG_FORMAT 使用 JSON 或纯文本格式，避免 ANSI 转义码）
     if settings.LOG_TO_FILE:
         # 通用日志文件
         app_file_handler = logging.handlers.RotatingFileHandler(
@@ -122,8 +270,8 @@ def setup_logging():
             encoding='utf-8'
         )
         app_file_handler.setLevel(logging.DEBUG)
-        app_file_handler.setFormatter(PlainFormatter())  # 文件使用纯文本
-        root_logger.addHandler(app_file_handler)
+        app_file_handler.setFormatter(get_formatter())
+        handlers.append(app_file_handler)
 
         # 错误日志文件
         error_file_handler = logging.handlers.RotatingFileHandler(
@@ -133,8 +281,11 @@ def setup_logging():
             encoding='utf-8'
         )
         error_file_handler.setLevel(logging.ERROR)
-        error_file_handler.setFormatter(PlainFormatter())  # 文件使用纯文本
-        root_logger.addHandler(error_file_handler)
+        error_file_handler.setFormatter(get_formatter())
+        handlers.append(error_file_handler)
+
+    # 格式化与 I/O 在后台线程执行，日志轮转不会阻塞请求
+    _attach_handlers(root_logger, handlers)
 
     # 配置 uvicorn 日志
     configure_uvicorn_logging()
@@ -147,6 +298,12 @@ def setup_logging():
         logger.setLevel(logging.DEBUG)
         logger.propagate = True
 
+    # SQL 日志由 ENABLE_SQL_LOG 控制（SQLAlchemy 按 logger 级别决定是否输出语句）
+    sql_level = (getattr(logging, settings.SQL_LOG_LEVEL.upper())
+                 if settings.ENABLE_SQL_LOG else logging.WARNING)
+    for lib in ["sqlalchemy.engine.Engine", "sqlalchemy"]:
+        logging.getLogger(lib).setLevel(sql_level)
+
     # 生产环境减少第三方库日志
     if settings.APP_ENV == "pro":
         logging.getLogger("urllib3").setLevel(logging.WARNING)
@@ -167,15 +324,15 @@ def configure_uvicorn_logging():
     uvicorn_access_logger.propagate = True
 
     if settings.ENABLE_ACCESS_LOG and settings.LOG_TO_FILE:
-        # 访问日志单独文件（使用纯文本格式）
+        # 访问日志单独文件
         access_handler = logging.handlers.RotatingFileHandler(
             filename=settings.ACCESS_LOG_PATH,
             maxBytes=settings.LOG_FILE_MAX_BYTES,
             backupCount=settings.LOG_FILE_BACKUP_COUNT,
             encoding='utf-8'
         )
-        access_handler.setFormatter(PlainFormatter())  # 文件使用纯文本
-        uvicorn_access_logger.addHandler(access_handler)
+        access_handler.setFormatter(get_formatter())
+        _attach_handlers(uvicorn_access_logger, [access_handler])
 
 
 def get_logger(name: str) -> logging.Logger:
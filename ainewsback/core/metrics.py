@@ -0,0 +1,235 @@
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Generic, Iterable, List, Optional, \
+    Sequence, Tuple, TypeVar
+
+# 默认延迟桶（秒）
+DEFAULT_LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+class Histogram:
+    """固定桶直方图，observe 不分配内存"""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        # 最后一个桶对应 +Inf
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        """记录一个观测值"""
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def snapshot(self) -> Dict[str, object]:
+        """导出累计桶计数"""
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        buckets["+Inf"] = self.count
+        return {"count": self.count, "sum": self.sum, "buckets": buckets}
+
+
+class Counter:
+    """单调递增计数"""
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+
+class Gauge:
+    """可增减的瞬时值"""
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+ChildType = TypeVar("ChildType", Counter, Gauge, Histogram)
+
+
+class MetricFamily(Generic[ChildType]):
+    """
+    带标签的指标族
+
+    每组标签值对应一个子指标，首次使用时创建后缓存，
+    热路径上可预先取得子指标以省去查找。
+    指标只在事件循环线程中更新，无需加锁。
+    """
+
+    def __init__(self, name: str, help_text: str, kind: str,
+                 factory: Callable[[], ChildType],
+                 labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.kind = kind
+        self.labelnames = tuple(labelnames)
+        self._factory = factory
+        self._children: Dict[Tuple[str, ...], ChildType] = {}
+
+    def labels(self, *values: str) -> ChildType:
+        """按标签值取子指标"""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(
+                    f"{self.name} 需要标签 {self.labelnames}，实际 {values}")
+            child = self._children[values] = self._factory()
+        return child
+
+    def children(self) -> List[Tuple[Tuple[str, ...], ChildType]]:
+        return list(self._children.items())
+
+
+@dataclass
+class Sample:
+    """采集器导出的一个样本"""
+    labels: Dict[str, str]
+    value: float
+
+
+@dataclass
+class CollectedMetric:
+    """采集器在抓取时导出的指标（计数器或瞬时值）"""
+    name: str
+    help: str
+    kind: str
+    samples: List[Sample] = field(default_factory=list)
+
+
+Collector = Callable[[], Iterable[CollectedMetric]]
+
+
+def _escape(value: str) -> str:
+    return (value.replace("\\", "\\\\").replace("\n", "\\n")
+            .replace('"', '\\"'))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str],
+                   extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra is not None:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class MetricsRegistry:
+    """
+    指标注册表，按 Prometheus 文本格式（0.0.4）导出
+
+    指标保存在进程内，多 worker 时每次抓取只得到处理该请求的 worker 的数据；
+    通过 set_const_labels 给所有样本加上 worker 标签，各进程的序列互不覆盖。
+    """
+
+    def __init__(self):
+        self._families: Dict[str, MetricFamily] = {}
+        self._collectors: List[Collector] = []
+        self.const_labels: Dict[str, str] = {}
+
+    def _register(self, family: MetricFamily) -> MetricFamily:
+        if family.name in self._families:
+            raise ValueError(f"指标已注册: {family.name}")
+        self._families[family.name] = family
+        return family
+
+    def counter(self, name: str, help_text: str,
+                labelnames: Sequence[str] = ()) -> MetricFamily[Counter]:
+        """注册计数器（名称应以 _total 结尾）"""
+        return self._register(
+            MetricFamily(name, help_text, "counter", Counter, labelnames))
+
+    def gauge(self, name: str, help_text: str,
+              labelnames: Sequence[str] = ()) -> MetricFamily[Gauge]:
+        """注册瞬时值"""
+        return self._register(
+            MetricFamily(name, help_text, "gauge", Gauge, labelnames))
+
+    def histogram(self, name: str, help_text: str,
+                  labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS
+                  ) -> MetricFamily[Histogram]:
+        """注册直方图"""
+        return self._register(MetricFamily(
+            name, help_text, "histogram", lambda: Histogram(buckets),
+            labelnames))
+
+    def register_collector(self, collector: Collector) -> None:
+        """注册抓取时调用的采集器（连接池、缓存统计等已有数据）"""
+        self._collectors.append(collector)
+
+    def set_const_labels(self, labels: Dict[str, str]) -> None:
+        """设置附加到所有样本的标签（如 worker 进程号）"""
+        self.const_labels = dict(labels)
+
+    def _labels(self, names: Sequence[str], values: Sequence[str],
+                extra: Optional[Tuple[str, str]] = None) -> str:
+        return _format_labels((*self.const_labels, *names),
+                              (*self.const_labels.values(), *values), extra)
+
+    def render(self) -> str:
+        """导出全部指标"""
+        lines: List[str] = []
+        for family in self._families.values():
+            lines.append(f"# HELP {family.name} {family.help}")
+            lines.append(f"# TYPE {family.name} {family.kind}")
+            for values, child in family.children():
+                if isinstance(child, Histogram):
+                    self._render_histogram(lines, family, values, child)
+                else:
+                    labels = self._labels(family.labelnames, values)
+                    lines.append(f"{family.name}{labels} "
+                                 f"{_format_value(child.value)}")
+        for collector in self._collectors:
+            for metric in collector():
+                lines.append(f"# HELP {metric.name} {metric.help}")
+                lines.append(f"# TYPE {metric.name} {metric.kind}")
+                for sample in metric.samples:
+                    labels = self._labels(list(sample.labels),
+                                          list(sample.labels.values()))
+                    lines.append(f"{metric.name}{labels} "
+                                 f"{_format_value(sample.value)}")
+        lines.append("")
+        return "\n".join(lines)
+
+    def _render_histogram(self, lines: List[str], family: MetricFamily,
+                          values: Tuple[str, ...], child: Histogram) -> None:
+        cumulative = 0
+        bounds = [*child.buckets, float("inf")]
+        for bound, count in zip(bounds, child.counts):
+            cumulative += count
+            labels = self._labels(family.labelnames, values,
+                                  ("le", _format_value(bound)))
+            lines.append(f"{family.name}_bucket{labels} {cumulative}")
+        labels = self._labels(family.labelnames, values)
+        lines.append(f"{family.name}_sum{labels} {_format_value(child.sum)}")
+        lines.append(f"{family.name}_count{labels} {child.count}")
+
+
+# 应用全局指标注册表
+registry = MetricsRegistry()
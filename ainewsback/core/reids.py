@@ -1,35 +1,637 @@
+import asyncio
+import logging
+import sys
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple, \
+    Union
+
 import redis.asyncio as redis
-from typing import Optional
+from redis.asyncio.client import Pipeline
+from redis.asyncio.cluster import ClusterNode, ClusterPipeline, RedisCluster
+from redis.asyncio.connection import BlockingConnectionPool
+from redis.asyncio.retry import Retry
+from redis.asyncio.sentinel import Sentinel, SentinelConnectionPool
+from redis.backoff import ExponentialWithJitterBackoff
+
 from ainewsback.core.config import settings
+from ainewsback.core.metrics import CollectedMetric, Sample, registry
+
+logger = logging.getLogger(__name__)
+
+REDIS_LATENCY = registry.histogram(
+    "redis_command_duration_seconds", "Redis 命令耗时（管道按整体计）",
+    ("command",))
+REDIS_ERRORS = registry.counter(
+    "redis_command_errors_total", "Redis 命令失败次数", ("command",))
+
+# 命令耗时回调: (命令名, 耗时秒数, 异常或 None)
+LatencyHook = Callable[[str, float, Optional[BaseException]], None]
+_latency_hooks: List[LatencyHook] = []
+
+
+def add_latency_hook(hook: LatencyHook) -> None:
+    """注册命令耗时回调（在事件循环中同步调用，应尽量轻量）"""
+    _latency_hooks.append(hook)
+
+
+def remove_latency_hook(hook: LatencyHook) -> None:
+    if hook in _latency_hooks:
+        _latency_hooks.remove(hook)
+
+
+def _command_name(command: object) -> str:
+    if isinstance(command, bytes):
+        return command.decode("ascii", "replace").upper()
+    return str(command).upper()
+
+
+def record_command(command: str, elapsed: float,
+                   error: Optional[BaseException] = None) -> None:
+    """记录一次命令: 指标、慢命令日志与已注册的回调"""
+    REDIS_LATENCY.labels(command).observe(elapsed)
+    if error is not None:
+        REDIS_ERRORS.labels(command).inc()
+    if (settings.REDIS_SLOW_COMMAND_MS
+            and elapsed * 1000 >= settings.REDIS_SLOW_COMMAND_MS):
+        logger.warning(f"Redis 慢命令 {command}: {elapsed * 1000:.1f}ms")
+    for hook in _latency_hooks:
+        try:
+            hook(command, elapsed, error)
+        except Exception:
+            logger.exception(f"Redis 耗时回调异常: {hook!r}")
+
+
+class _NearEntry:
+    """近端缓存条目（时间均为 time.monotonic）"""
+    __slots__ = ("value", "expires_at", "stale_at", "size")
+
+    def __init__(self, value, expires_at: Optional[float], stale_at: float,
+                 size: int):
+        # value 为 None 表示 key 不存在
+        self.value = value
+        # Redis 中 key 的过期时间，None 表示不过期
+        self.expires_at = expires_at
+        self.stale_at = stale_at
+        self.size = size
+
+    def pttl(self, now: float) -> int:
+        """与 PTTL 语义一致: -2 不存在，-1 不过期"""
+        if self.value is None:
+            return -2
+        if self.expires_at is None:
+            return -1
+        return max(0, int((self.expires_at - now) * 1000))
+
+
+class NearCache:
+    """
+    Redis 近端缓存（进程内）
+
+    只缓存指定前缀的 key，一次 MULTI 读取 GET 与 PTTL，
+    同时服务 GET/TTL/PTTL；条目按 LRU 淘汰，受条目数与估算内存上限约束。
+
+    一致性依赖 RESP2 的 CLIENT TRACKING 广播模式: 专用连接订阅
+    __redis__:invalidate，另一条连接以 REDIRECT + BCAST PREFIX 开启跟踪，
+    任何客户端改写匹配前缀的 key 都会收到失效通知。失效通道断开期间
+    清空缓存并直接读 Redis，重连成功后再启用。
+    本进程的写命令在发出前先删除本地条目。
+    """
+
+    INVALIDATE_CHANNEL = "__redis__:invalidate"
+    # 失效通道空闲多久发一次 PING 检查连接（秒）
+    KEEPALIVE_SECONDS = 10.0
+    RECONNECT_BASE_SECONDS = 0.5
+    RECONNECT_MAX_SECONDS = 30.0
+    # 估算内存时每个条目的固定开销（字节）
+    ENTRY_OVERHEAD = 200
+    # 读命令不触发本地删除
+    READ_COMMANDS = frozenset({"GET", "TTL", "PTTL"})
+
+    def __init__(self, prefixes: Iterable[str], max_keys: int = 10000,
+                 max_bytes: int = 16 * 1024 * 1024,
+                 max_entry_bytes: int = 64 * 1024, ttl: float = 60.0):
+        """
+        Args:
+            prefixes: 缓存的 key 前缀
+            max_keys: 最大条目数
+            max_bytes: 估算内存上限
+            max_entry_bytes: 单个条目上限，超过不缓存
+            ttl: 条目最长存活秒数（兜底，不超过 key 在 Redis 中的 TTL）
+        """
+        self.prefixes = tuple(prefixes)
+        self.max_keys = max_keys
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, _NearEntry]" = OrderedDict()
+        self._bytes = 0
+        # 正在从 Redis 读取的 key（引用计数），读取期间收到失效的记入 _dirty，
+        # 读回的旧值不写入缓存
+        self._inflight: Dict[str, int] = {}
+        self._dirty: Set[str] = set()
+        # 清空或失效通道重连时递增，之前发起的读取结果作废
+        self._epoch = 0
+        self._ready = False
+        self._client: Optional[redis.Redis] = None
+        self._task: Optional[asyncio.Task] = None
+        self._subscriber = None
+        self._tracker = None
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.flushes = 0
+        self.evictions = 0
+        self.reconnects = 0
+
+    @property
+    def ready(self) -> bool:
+        """失效通道是否可用（不可用时所有读取直达 Redis）"""
+        return self._ready
+
+    def accepts(self, key) -> bool:
+        return (self._ready and isinstance(key, str)
+                and key.startswith(self.prefixes))
+
+    # ---- 读取 ----
+
+    async def read(self, client: redis.Redis, key: str) -> _NearEntry:
+        """读取条目，未命中时一次往返取回 GET 与 PTTL 并缓存"""
+        entry = self._lookup(key)
+        if entry is not None:
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        epoch = self._epoch
+        self._inflight[key] = self._inflight.get(key, 0) + 1
+        try:
+            async with client.pipeline(transaction=True) as pipe:
+                value, pttl = await pipe.get(key).pttl(key).execute()
+            entry = self._make_entry(key, value, pttl)
+            if (self._ready and epoch == self._epoch
+                    and key not in self._dirty):
+                self._store(key, entry)
+            return entry
+        finally:
+            remaining = self._inflight[key] - 1
+            if remaining:
+                self._inflight[key] = remaining
+            else:
+                del self._inflight[key]
+                self._dirty.discard(key)
+
+    def _lookup(self, key: str) -> Optional[_NearEntry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        now = time.monotonic()
+        if entry.stale_at <= now or (entry.expires_at is not None
+                                     and entry.expires_at <= now):
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _make_entry(self, key: str, value, pttl: int) -> _NearEntry:
+        now = time.monotonic()
+        if value is None:
+            expires_at = None
+        else:
+            expires_at = now + pttl / 1000 if pttl >= 0 else None
+        size = (self.ENTRY_OVERHEAD + sys.getsizeof(key)
+                + (sys.getsizeof(value) if value is not None else 0))
+        return _NearEntry(value, expires_at, now + self.ttl, size)
+
+    def _store(self, key: str, entry: _NearEntry) -> None:
+        if entry.size > self.max_entry_bytes:
+            return
+        self._remove(key)
+        self._entries[key] = entry
+        self._bytes += entry.size
+        while (len(self._entries) > self.max_keys
+               or self._bytes > self.max_bytes):
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.size
+            self.evictions += 1
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+    # ---- 失效 ----
+
+    def invalidate(self, key: str) -> None:
+        """删除本地条目，正在读取的结果不再写入"""
+        self._remove(key)
+        if key in self._inflight:
+            self._dirty.add(key)
+        self.invalidations += 1
+
+    def invalidate_command(self, args: tuple) -> None:
+        """写命令发出前删除其参数中匹配前缀的 key"""
+        if not self._entries and not self._inflight:
+            return
+        command = args[0]
+        if not isinstance(command, str):
+            command = _command_name(command)
+        if command.upper() in self.READ_COMMANDS:
+            return
+        for arg in args[1:]:
+            if isinstance(arg, str) and arg.startswith(self.prefixes):
+                self.invalidate(arg)
+
+    def clear(self) -> None:
+        """清空缓存，进行中的读取结果作废"""
+        self._entries.clear()
+        self._bytes = 0
+        self._epoch += 1
+
+    def _on_message(self, message) -> bool:
+        """处理失效通道消息，返回是否为 PING 的回复"""
+        kind = message[0]
+        if isinstance(kind, bytes):
+            kind = kind.decode()
+        if kind == "pong":
+            return True
+        if kind == "message":
+            keys = message[2]
+            if keys is None:
+                # FLUSHDB/FLUSHALL
+                self.flushes += 1
+                self.clear()
+            else:
+                for key in keys:
+                    if isinstance(key, bytes):
+                        key = key.decode()
+                    self.invalidate(key)
+        return False
+
+    # ---- 失效通道 ----
+
+    def start(self, client: redis.Redis) -> None:
+        """在当前事件循环启动失效通道（后台重连）"""
+        self._client = client
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """停止失效通道并清空缓存"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._client = None
+
+    async def _run(self) -> None:
+        delay = self.RECONNECT_BASE_SECONDS
+        while True:
+            try:
+                await self._connect()
+                delay = self.RECONNECT_BASE_SECONDS
+                await self._listen()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.reconnects += 1
+                logger.warning(f"近端缓存失效通道不可用，暂停本地缓存: {e}")
+            finally:
+                self._ready = False
+                self.clear()
+                await self._disconnect()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.RECONNECT_MAX_SECONDS)
+
+    async def _dedicated_connection(self):
+        """不占用连接池名额的专用连接（订阅模式下不做健康检查）"""
+        pool = self._client.connection_pool
+        connection = pool.connection_class(**{
+            **pool.connection_kwargs, "health_check_interval": 0})
+        await connection.connect()
+        return connection
+
+    async def _connect(self) -> None:
+        self._subscriber = await self._dedicated_connection()
+        await self._subscriber.send_command("CLIENT", "ID")
+        client_id = await self._subscriber.read_response()
+        await self._subscriber.send_command("SUBSCRIBE",
+                                            self.INVALIDATE_CHANNEL)
+        await self._subscriber.read_response()
+
+        self._tracker = await self._dedicated_connection()
+        prefixes = [arg for prefix in self.prefixes
+                    for arg in ("PREFIX", prefix)]
+        await self._tracker.send_command(
+            "CLIENT", "TRACKING", "ON", "REDIRECT", client_id, "BCAST",
+            *prefixes)
+        await self._tracker.read_response()
+        self._ready = True
+        logger.info(f"近端缓存已启用，前缀: {', '.join(self.prefixes)}")
+
+    async def _listen(self) -> None:
+        awaiting_pong = False
+        while True:
+            message = await self._subscriber.read_response(
+                timeout=self.KEEPALIVE_SECONDS)
+            if message is not None:
+                if self._on_message(message):
+                    awaiting_pong = False
+                continue
+            # 空闲: 上次 PING 未回复说明订阅连接已失效；跟踪连接断开时
+            # 服务端不会通知，也需要定期检查
+            if awaiting_pong:
+                raise redis.ConnectionError("失效通道 PING 无响应")
+            await self._subscriber.send_command("PING")
+            awaiting_pong = True
+            await self._tracker.send_command("PING")
+            await self._tracker.read_response()
+
+    async def _disconnect(self) -> None:
+        for connection in (self._subscriber, self._tracker):
+            if connection is not None:
+                await connection.disconnect(nowait=True)
+        self._subscriber = self._tracker = None
+
+    # ---- 统计 ----
+
+    def stats(self) -> Dict[str, object]:
+        """命中统计"""
+        lookups = self.hits + self.misses
+        return {
+            "ready": self._ready,
+            "size": len(self._entries),
+            "bytes": self._bytes,
+            "max_keys": self.max_keys,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "flushes": self.flushes,
+            "evictions": self.evictions,
+            "reconnects": self.reconnects,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+    def collect(self) -> Iterable[CollectedMetric]:
+        """导出 Prometheus 指标（注册为采集器）"""
+        for name, help_text, kind, value in (
+                ("redis_near_cache_hits_total", "近端缓存命中次数",
+                 "counter", self.hits),
+                ("redis_near_cache_misses_total", "近端缓存未命中次数",
+                 "counter", self.misses),
+                ("redis_near_cache_invalidations_total", "近端缓存失效 key 数",
+                 "counter", self.invalidations),
+                ("redis_near_cache_evictions_total", "近端缓存容量淘汰次数",
+                 "counter", self.evictions),
+                ("redis_near_cache_reconnects_total", "失效通道重连次数",
+                 "counter", self.reconnects),
+                ("redis_near_cache_size", "近端缓存条目数", "gauge",
+                 len(self._entries)),
+                ("redis_near_cache_bytes", "近端缓存估算内存（字节）", "gauge",
+                 self._bytes),
+                ("redis_near_cache_ready", "失效通道是否可用", "gauge",
+                 1 if self._ready else 0),
+        ):
+            yield CollectedMetric(name, help_text, kind, [Sample({}, value)])
+
+
+near_cache = NearCache(
+    settings.REDIS_NEAR_CACHE_PREFIXES,
+    max_keys=settings.REDIS_NEAR_CACHE_MAX_KEYS,
+    max_bytes=settings.REDIS_NEAR_CACHE_MAX_BYTES,
+    max_entry_bytes=settings.REDIS_NEAR_CACHE_MAX_ENTRY_BYTES,
+    ttl=settings.REDIS_NEAR_CACHE_TTL_SECONDS,
+)
+registry.register_collector(near_cache.collect)
+
+
+class _InstrumentedCommands:
+    """按命令记录耗时与失败次数（单机与集群客户端共用）"""
+
+    async def execute_command(self, *args, **options):
+        command = args[0]
+        if not isinstance(command, str):
+            command = _command_name(command)
+        start = time.perf_counter()
+        error = None
+        try:
+            return await super().execute_command(*args, **options)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            record_command(command, time.perf_counter() - start, error)
+
+
+class _InstrumentedExecute:
+    """记录管道整体耗时"""
+
+    async def execute(self, *args, **kwargs):
+        start = time.perf_counter()
+        error = None
+        try:
+            return await super().execute(*args, **kwargs)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            record_command("PIPELINE", time.perf_counter() - start, error)
+
+
+class InstrumentedPipeline(_InstrumentedExecute, Pipeline):
+    """记录整体耗时的管道"""
+
+    near_cache: Optional[NearCache] = None
+
+    async def execute(self, raise_on_error: bool = True):
+        if self.near_cache is not None:
+            for args, _ in self.command_stack:
+                self.near_cache.invalidate_command(args)
+        return await super().execute(raise_on_error)
+
+
+class InstrumentedClusterPipeline(_InstrumentedExecute, ClusterPipeline):
+    """记录整体耗时的集群管道"""
+
+
+class InstrumentedRedis(_InstrumentedCommands, redis.Redis):
+    """
+    按命令记录耗时与失败次数的 Redis 客户端
+
+    挂载近端缓存后，匹配前缀的 GET/TTL/PTTL 优先读本地。
+    """
+
+    near_cache: Optional[NearCache] = None
+
+    async def execute_command(self, *args, **options):
+        if self.near_cache is not None:
+            self.near_cache.invalidate_command(args)
+        return await super().execute_command(*args, **options)
+
+    async def get(self, name):
+        if self.near_cache is not None and self.near_cache.accepts(name):
+            return (await self.near_cache.read(self, name)).value
+        return await super().get(name)
+
+    async def pttl(self, name):
+        if self.near_cache is not None and self.near_cache.accepts(name):
+            entry = await self.near_cache.read(self, name)
+            return entry.pttl(time.monotonic())
+        return await super().pttl(name)
+
+    async def ttl(self, name):
+        if self.near_cache is not None and self.near_cache.accepts(name):
+            entry = await self.near_cache.read(self, name)
+            pttl = entry.pttl(time.monotonic())
+            # 与 Redis 一致按四舍五入换算为秒
+            return pttl if pttl < 0 else (pttl + 500) // 1000
+        return await super().ttl(name)
+
+    def pipeline(self, transaction: bool = True,
+                 shard_hint: Optional[str] = None) -> Pipeline:
+        pipe = InstrumentedPipeline(self.connection_pool,
+                                    self.response_callbacks, transaction,
+                                    shard_hint)
+        pipe.near_cache = self.near_cache
+        return pipe
+
+
+class InstrumentedRedisCluster(_InstrumentedCommands, RedisCluster):
+    """按命令记录耗时与失败次数的 Redis Cluster 客户端"""
+
+    def pipeline(self, transaction: Optional[bool] = None,
+                 shard_hint: Optional[str] = None) -> ClusterPipeline:
+        if shard_hint:
+            # 集群不支持 shard_hint，由父类抛出异常
+            return super().pipeline(transaction, shard_hint)
+        return InstrumentedClusterPipeline(self, transaction)
+
+
+class SentinelBlockingConnectionPool(SentinelConnectionPool,
+                                     BlockingConnectionPool):
+    """经哨兵发现主节点、连接耗尽时等待的连接池"""
+
+
+AnyRedis = Union[InstrumentedRedis, InstrumentedRedisCluster]
+
+
+def parse_nodes(nodes: List[str]) -> List[Tuple[str, int]]:
+    """["host:port", ...] -> [(host, port), ...]"""
+    result = []
+    for node in nodes:
+        host, _, port = node.rpartition(":")
+        result.append((host, int(port)))
+    return result
+
 
 class AsyncRedisClient:
     """Redis 客户端单例"""
-    _instance: Optional[redis.Redis] = None
+    _instance: Optional[AnyRedis] = None
+    _lock: Optional[asyncio.Lock] = None
+
+    @classmethod
+    def _connection_options(cls) -> dict:
+        """单机、哨兵与集群共用的连接参数"""
+        return {
+            "password": settings.REDIS_PASSWORD or None,
+            "decode_responses": settings.REDIS_DECODE_RESPONSES,
+            "socket_connect_timeout": settings.REDIS_SOCKET_CONNECT_TIMEOUT,
+            "socket_timeout": settings.REDIS_SOCKET_TIMEOUT,
+            "socket_keepalive": True,
+            "health_check_interval": settings.REDIS_HEALTH_CHECK_INTERVAL,
+            "retry": Retry(
+                ExponentialWithJitterBackoff(
+                    cap=settings.REDIS_RETRY_BACKOFF_CAP,
+                    base=settings.REDIS_RETRY_BACKOFF_BASE),
+                settings.REDIS_RETRY_ATTEMPTS),
+        }
 
     @classmethod
-    async def get_client(cls) -> redis.Redis:
-        """获取 Redis 客户端实例"""
-        if cls._instance is None:
-            cls._instance = redis.Redis(
-                host=settings.REDIS_HOST,
-                port=settings.REDIS_PORT,
+    def build(cls) -> AnyRedis:
+        """按 REDIS_MODE 创建客户端（不建立连接）"""
+        options = cls._connection_options()
+        max_connections = settings.per_worker(settings.REDIS_MAX_CONNECTIONS)
+
+        if settings.REDIS_MODE == "cluster":
+            nodes = parse_nodes(settings.REDIS_CLUSTER_NODES) or [
+                (settings.REDIS_HOST, settings.REDIS_PORT)]
+            return InstrumentedRedisCluster(
+                startup_nodes=[ClusterNode(host, port)
+                               for host, port in nodes],
+                max_connections=max_connections, **options)
+
+        if settings.REDIS_MODE == "sentinel":
+            sentinel = Sentinel(
+                parse_nodes(settings.REDIS_SENTINELS),
+                sentinel_kwargs={
+                    "password": settings.REDIS_SENTINEL_PASSWORD or None,
+                    "socket_connect_timeout":
+                        settings.REDIS_SOCKET_CONNECT_TIMEOUT,
+                    "socket_timeout": settings.REDIS_SOCKET_TIMEOUT,
+                })
+            return sentinel.master_for(
+                settings.REDIS_SENTINEL_SERVICE,
+                redis_class=InstrumentedRedis,
+                connection_pool_class=SentinelBlockingConnectionPool,
                 db=settings.REDIS_DB,
-                password=settings.REDIS_PASSWORD if settings.REDIS_PASSWORD else None,
-                decode_responses=settings.REDIS_DECODE_RESPONSES,
-                socket_connect_timeout=5,
-                socket_keepalive=True,
-                health_check_interval=30
-            )
+                max_connections=max_connections,
+                timeout=settings.REDIS_POOL_TIMEOUT,
+                **options)
+
+        pool = BlockingConnectionPool(
+            host=settings.REDIS_HOST,
+            port=settings.REDIS_PORT,
+            db=settings.REDIS_DB,
+            max_connections=max_connections,
+            timeout=settings.REDIS_POOL_TIMEOUT,
+            **options)
+        return InstrumentedRedis.from_pool(pool)
+
+    @classmethod
+    async def get_client(cls) -> AnyRedis:
+        """获取 Redis 客户端实例（并发首次调用只创建一个）"""
+        if cls._instance is not None:
+            return cls._instance
+        if cls._lock is None:
+            cls._lock = asyncio.Lock()
+        async with cls._lock:
+            if cls._instance is None:
+                client = cls.build()
+                if isinstance(client, RedisCluster):
+                    # 获取集群拓扑，失败时不缓存客户端
+                    try:
+                        await client.initialize()
+                    except Exception:
+                        await client.aclose()
+                        raise
+                if settings.REDIS_NEAR_CACHE_ENABLED:
+                    cls._attach_near_cache(client)
+                cls._instance = client
         return cls._instance
 
+    @classmethod
+    def _attach_near_cache(cls, client: AnyRedis) -> None:
+        if isinstance(client, RedisCluster):
+            logger.warning("集群模式不支持近端缓存，已忽略 "
+                           "REDIS_NEAR_CACHE_ENABLED")
+            return
+        client.near_cache = near_cache
+        near_cache.start(client)
+
     @classmethod
     async def close(cls):
         """关闭 Redis 连接"""
         if cls._instance:
-            await cls._instance.close()
+            if getattr(cls._instance, "near_cache", None) is not None:
+                await cls._instance.near_cache.stop()
+            await cls._instance.aclose()
             cls._instance = None
+        cls._lock = None
 
 
-async def get_redis() -> redis.Redis:
+async def get_redis() -> AnyRedis:
     """依赖注入函数"""
-    return await AsyncRedisClient.get_client()
\ No newline at end of file
+    return await AsyncRedisClient.get_client()
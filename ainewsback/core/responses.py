@@ -0,0 +1,91 @@
+import inspect
+from functools import lru_cache, wraps
+from typing import Any, Callable, Coroutine, Optional
+
+from fastapi.routing import APIRoute
+from pydantic import BaseModel, TypeAdapter
+from pydantic_core import SchemaSerializer
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.types import Receive, Scope, Send
+
+
+@lru_cache(maxsize=256)
+def serializer_for(cls: type) -> SchemaSerializer:
+    """按类型缓存的 pydantic-core 序列化器"""
+    if issubclass(cls, BaseModel):
+        return cls.__pydantic_serializer__
+    return TypeAdapter(cls).serializer
+
+
+def render_json(content: Any) -> bytes:
+    """
+    直接序列化为 JSON 字节（Rust 实现），跳过 jsonable_encoder
+
+    嵌套的模型、datetime 等按运行时类型推断，无法序列化的对象转为字符串。
+    """
+    return serializer_for(type(content)).to_json(content, fallback=str)
+
+
+class FastJSONResponse(JSONResponse):
+    """使用缓存序列化器渲染的 JSON 响应，可直接接收 BaseModel"""
+
+    def render(self, content: Any) -> bytes:
+        return render_json(content)
+
+
+class PrebuiltResponse(Response):
+    """
+    内容固定的响应，构造时渲染一次，可在请求间复用
+
+    每次发送复制响应头列表，中间件追加的头不会写回共享对象。
+    """
+
+    def __init__(self, content: Any, status_code: int = 200):
+        super().__init__(render_json(content), status_code=status_code,
+                         media_type="application/json")
+
+    async def __call__(self, scope: Scope, receive: Receive,
+                       send: Send) -> None:
+        await send({
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": list(self.raw_headers),
+        })
+        await send({"type": "http.response.body", "body": self.body})
+
+
+class FastJSONRoute(APIRoute):
+    """
+    未声明 response_model 的路由返回 BaseModel 时直接序列化为字节
+
+    FastAPI 默认先经 jsonable_encoder 转为 dict 再编码；声明了
+    response_model 或注入 Response 参数的路由保持原有流程。
+    """
+
+    def get_route_handler(self) -> Callable[
+            [Request], Coroutine[Any, Any, Response]]:
+        if (self.response_field is None
+                and self.dependant.response_param_name is None
+                and self.dependant.call is not None):
+            self.dependant.call = self._wrap(self.dependant.call)
+        return super().get_route_handler()
+
+    def _wrap(self, call: Callable[..., Any]) -> Callable[..., Any]:
+        status_code: Optional[int] = self.status_code
+
+        def to_response(result: Any) -> Any:
+            if isinstance(result, BaseModel):
+                return FastJSONResponse(result,
+                                        status_code=status_code or 200)
+            return result
+
+        if inspect.iscoroutinefunction(call):
+            @wraps(call)
+            async def endpoint(**values: Any) -> Any:
+                return to_response(await call(**values))
+        else:
+            @wraps(call)
+            def endpoint(**values: Any) -> Any:
+                return to_response(call(**values))
+        return endpoint
@@ -1,16 +1,22 @@
 import logging
+import os
 from contextlib import asynccontextmanager
 
-import uvicorn
 from fastapi import FastAPI
 
 from ainewsback.api.v1 import router
 from ainewsback.core.config import settings
-from ainewsback.core.database import create_db_and_tables
-from ainewsback.core.logger import setup_logging
+from ainewsback.core.database import dispose_engines
+from ainewsback.core.http_client import AsyncHttpClient
+from ainewsback.core.logger import setup_logging, shutdown_logging
+from ainewsback.core.metrics import registry
 from ainewsback.core.reids import AsyncRedisClient
-from ainewsback.middleware import AuthMiddleware
-from ainewsback.middleware.logging_middleware import LoggingMiddleware
+from ainewsback.core.responses import FastJSONResponse
+from ainewsback.middleware import RequestPipelineMiddleware
+from ainewsback.services.notification_outbox import NotificationOutbox, \
+    OutboxWorker
+from ainewsback.utils.dingtalk_robot import get_verification_notifier
+from ainewsback.utils.password import shutdown_hash_executor
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -22,17 +28,14 @@ async def lifespan(app: FastAPI):
     logger = logging.getLogger(__name__)
 
     logger.info(f"应用启动 - 环境: {settings.APP_ENV}")
+
+    # 多 worker 时指标只是当前进程的数据，加上 worker 标签区分各进程的序列
+    if settings.SERVER_WORKERS > 1:
+        registry.set_const_labels({"worker": str(os.getpid())})
     logger.info(f"当前时间: 2025-11-19 00:17:00 UTC")
     logger.info(f"当前用户: AC-DB")
 
-    logger.info("初始化数据库连接...")
-    try:
-        create_db_and_tables()
-        logger.info("数据表创建成功")
-    except Exception as e:
-        logger.error(f"数据库初始化失败: {e}")
-        raise
-
+    # 数据表由 `ainewsback migrate` 在部署时创建，启动时不再执行 DDL
     logger.info("初始化 Redis 连接...")
     redis_client = await AsyncRedisClient.get_client()
     try:
@@ -42,11 +45,29 @@ async def lifespan(app: FastAPI):
         logger.error(f"Redis 连接失败: {e}")
         raise
 
+    logger.info("初始化 HTTP 客户端...")
+    await AsyncHttpClient.get_client()
+
+    outbox_worker = None
+    if settings.NOTIFY_OUTBOX_ENABLED:
+        logger.info("启动通知发件箱投递任务...")
+        outbox_worker = OutboxWorker(NotificationOutbox(redis_client),
+                                     get_verification_notifier())
+        outbox_worker.start()
+
     yield
 
     # 关闭时
     logger.info("应用关闭，清理资源...")
+    if outbox_worker:
+        await outbox_worker.stop()
+    await get_verification_notifier().close()
     await AsyncRedisClient.close()
+    await AsyncHttpClient.close()
+    await dispose_engines()
+    shutdown_hash_executor()
+    logger.info("资源清理完成")
+    shutdown_logging()
 
 def create_app():
     _app = FastAPI(
@@ -56,13 +77,13 @@ def create_app():
         contact=settings.ADMIN_CONTACT,
         license_info=settings.APP_LICENSE,
         debug=settings.DEBUG,
-        lifespan=lifespan
+        lifespan=lifespan,
+        # 未经 FastJSONRoute 的返回值也用 pydantic-core 编码
+        default_response_class=FastJSONResponse,
     )
 
-    # 认证中间件
-    _app.add_middleware(AuthMiddleware)
-    # 日志中间件
-    _app.add_middleware(LoggingMiddleware)
+    # 请求管道中间件（请求 ID、计时、日志、认证）
+    _app.add_middleware(RequestPipelineMiddleware)
     # 注册路由
     _app.include_router(router)
 
@@ -72,6 +93,9 @@ def create_app():
 app = create_app()
 
 if __name__ == "__main__":
-    uvicorn.run("main:app", host=settings.HOST, port=settings.PORT,
-                reload=True if settings.APP_ENV == "dev" else False,
-                log_config=None)
+    import sys
+
+    from ainewsback.cli import main
+
+    sys.exit(main(["serve"] + (["--reload"]
+                               if settings.APP_ENV == "dev" else [])))
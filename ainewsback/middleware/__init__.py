@@ -1,5 +1,7 @@
 from ainewsback.middleware.auth_middleware import AuthMiddleware
+from ainewsback.middleware.request_pipeline import RequestPipelineMiddleware
 
 __all__ = [
-    "AuthMiddleware"
+    "AuthMiddleware",
+    "RequestPipelineMiddleware"
 ]
\ No newline at end of file
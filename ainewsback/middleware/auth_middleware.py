@@ -2,12 +2,55 @@ from typing import Iterable, List, Set
 
 from fastapi import Request
 from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.responses import JSONResponse
 
+from ainewsback.core.responses import PrebuiltResponse
 from ainewsback.schemas.base import resp
 from ainewsback.utils.jwt import JWTUtils
 
 
+# 无需认证的默认路径，以 * 结尾表示前缀匹配
+# /stats、/metrics 不使用用户 JWT，由 require_monitoring_access 限制来源或令牌
+DEFAULT_EXCLUDE_PATHS: List[str] = [
+    "/user/api/v1/login/*",
+    "/",
+    "/info",
+    "/stats",
+    "/metrics",
+    "/docs",
+    "/redoc",
+    "/openapi.json",
+]
+
+
+# 固定的 401 响应，启动时渲染一次
+MISSING_AUTHORIZATION = PrebuiltResponse(
+    resp(code=401, message="没有Authorization"), status_code=401)
+MISSING_BEARER = PrebuiltResponse(
+    resp(code=401, message="没有bearer信息"), status_code=401)
+UNAUTHORIZED = PrebuiltResponse(
+    resp(code=401, message="未授权"), status_code=401)
+
+
+class PathMatcher:
+    """路径匹配: 精确匹配 + 前缀匹配"""
+
+    def __init__(self, paths: Iterable[str]) -> None:
+        # 存储为集合便于快速精确匹配和前缀匹配
+        self._prefix_paths: List[str] = []
+        self._exact_paths: Set[str] = set()
+
+        for path in paths:
+            if path.endswith("*"):
+                self._prefix_paths.append(path[:-1])
+            else:
+                self._exact_paths.add(path)
+
+    def matches(self, path: str) -> bool:
+        if path in self._exact_paths:
+            return True
+        return any(path.startswith(prefix) for prefix in self._prefix_paths)
+
+
 class AuthMiddleware(BaseHTTPMiddleware):
     """认证中间件: 验证请求是否携带有效 JWT"""
 
@@ -19,30 +62,10 @@ class AuthMiddleware(BaseHTTPMiddleware):
             exclude_paths: 无需认证的路径
         """
         super().__init__(app)
-        # 存储为集合便于快速精确匹配和前缀匹配
-        default_paths: List[str] = [
-            "/user/api/v1/login/*",
-            "/",
-            "/info",
-            "/docs",
-            "/redoc",
-            "/openapi.json",
-        ]
-        path = exclude_paths or default_paths
-
-        self._prefix_paths: List[str] = []
-        self._exclude_paths: Set[str] = set()
-
-        for path in path:
-            if path.endswith("*"):
-                self._prefix_paths.append(path[:-1])
-            else:
-                self._exclude_paths.add(path)
+        self._matcher = PathMatcher(exclude_paths or DEFAULT_EXCLUDE_PATHS)
 
     def _is_excluded(self, path: str) -> bool:
-        if path in self._exclude_paths:
-            return True
-        return any(path.startswith(prefix) for prefix in self._prefix_paths)
+        return self._matcher.matches(path)
 
     async def dispatch(self, request: Request, call_next):
         path = request.url.path
@@ -51,25 +74,16 @@ class AuthMiddleware(BaseHTTPMiddleware):
 
         auth_header = request.headers.get("Authorization", "")
         if not auth_header:
-            return JSONResponse(
-                status_code=401,
-                content=resp(code=401, message="没有Authorization").model_dump()
-            )
+            return MISSING_AUTHORIZATION
 
         scheme, _, token = auth_header.partition(" ")
         if scheme.lower() != "bearer" or not token:
-            return JSONResponse(
-                status_code=401,
-                content=resp(code=401, message="没有bearer信息").model_dump()
-            )
+            return MISSING_BEARER
 
         try:
             payload = JWTUtils.verify_token(token)
         except ValueError:
-            return JSONResponse(
-                status_code=401,
-                content=resp(code=401, message="未授权").model_dump()
-            )
+            return UNAUTHORIZED
 
         # 将解析后的载荷附加到请求上下文
         request.state.jwt_payload = payload
@@ -0,0 +1,166 @@
+import logging
+import time
+import uuid
+from typing import Iterable, Optional
+
+from starlette.datastructures import URL, Headers, MutableHeaders
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ainewsback.core.metrics import registry
+from ainewsback.middleware.auth_middleware import DEFAULT_EXCLUDE_PATHS, \
+    MISSING_AUTHORIZATION, MISSING_BEARER, UNAUTHORIZED, PathMatcher
+from ainewsback.utils.jwt import JWTUtils
+
+logger = logging.getLogger(__name__)
+
+# 未匹配到路由（404、认证失败）时的路由标签，避免原始 URL 导致标签爆炸
+UNMATCHED_ROUTE = "<unmatched>"
+
+HTTP_LATENCY = registry.histogram(
+    "http_request_duration_seconds", "请求耗时（按路由模板）",
+    ("method", "route"))
+HTTP_REQUESTS = registry.counter(
+    "http_requests_total", "请求数（按路由模板与状态码）",
+    ("method", "route", "status"))
+HTTP_IN_FLIGHT = registry.gauge(
+    "http_requests_in_flight", "处理中的请求数").labels()
+
+
+def route_template(scope: Scope) -> str:
+    """路由匹配后 scope 中的路由路径模板（如 /items/{id}）"""
+    route = scope.get("route")
+    return getattr(route, "path", UNMATCHED_ROUTE)
+
+
+class RequestPipelineMiddleware:
+    """
+    纯 ASGI 请求管道: 请求 ID、计时、日志与 JWT 认证合并为一层
+
+    行为与 LoggingMiddleware + AuthMiddleware 组合一致，
+    但不创建额外任务、不包装响应，流式响应也不会被缓冲。
+    """
+
+    def __init__(self, app: ASGIApp,
+                 exclude_paths: Iterable[str] | None = None) -> None:
+        """
+        Args:
+            app: ASGI 应用
+            exclude_paths: 无需认证的路径
+        """
+        self.app = app
+        self._matcher = PathMatcher(exclude_paths or DEFAULT_EXCLUDE_PATHS)
+
+    def _authenticate(self, scope: Scope, headers: Headers,
+                      state: dict) -> Optional[Response]:
+        """认证通过返回 None，否则返回 401 响应"""
+        if self._matcher.matches(scope["path"]):
+            return None
+
+        auth_header = headers.get("Authorization", "")
+        if not auth_header:
+            return MISSING_AUTHORIZATION
+
+        scheme, _, token = auth_header.partition(" ")
+        if scheme.lower() != "bearer" or not token:
+            return MISSING_BEARER
+
+        try:
+            payload = JWTUtils.verify_token(token)
+        except ValueError:
+            return UNAUTHORIZED
+
+        # 将解析后的载荷附加到请求上下文
+        state["jwt_payload"] = payload
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive,
+                       send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # 生成请求 ID 并记录开始时间
+        request_id = str(uuid.uuid4())
+        start_time = time.time()
+
+        state = scope.setdefault("state", {})
+        state["request_id"] = request_id
+
+        headers = Headers(scope=scope)
+        method = scope["method"]
+        url = str(URL(scope=scope))
+        client = scope.get("client")
+        client_host = client[0] if client else "unknown"
+
+        # 请求开始日志
+        logger.info(
+            "请求开始",
+            extra={
+                "request_id": request_id,
+                "method": method,
+                "url": url,
+                "client_host": client_host,
+                "user_agent": headers.get("user-agent", "unknown")
+            }
+        )
+
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                # 添加自定义响应头
+                response_headers = MutableHeaders(scope=message)
+                response_headers["X-Request-ID"] = request_id
+                response_headers["X-Process-Time"] = str(
+                    time.time() - start_time)
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        try:
+            response = self._authenticate(scope, headers, state)
+            if response is not None:
+                await response(scope, receive, send_wrapper)
+            else:
+                await self.app(scope, receive, send_wrapper)
+        except Exception as e:
+            process_time = time.time() - start_time
+
+            # 错误日志
+            logger.error(
+                "请求异常",
+                extra={
+                    "request_id": request_id,
+                    "method": method,
+                    "url": url,
+                    "error": str(e),
+                    "error_type": type(e).__name__,
+                    "process_time": f"{process_time:.3f}s",
+                    "client_host": client_host
+                },
+                exc_info=True
+            )
+            raise
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            route = route_template(scope)
+            HTTP_LATENCY.labels(method, route).observe(
+                time.time() - start_time)
+            HTTP_REQUESTS.labels(method, route, str(status_code)).inc()
+
+        process_time = time.time() - start_time
+
+        # 请求完成日志
+        logger.info(
+            "请求完成",
+            extra={
+                "request_id": request_id,
+                "method": method,
+                "url": url,
+                "status_code": status_code,
+                "process_time": f"{process_time:.3f}s",
+                "client_host": client_host
+            }
+        )
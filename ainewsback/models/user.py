@@ -2,7 +2,7 @@ from datetime import datetime
 from enum import IntEnum
 from typing import Optional
 
-from sqlalchemy import Column, Integer
+from sqlalchemy import Column, DDL, Index, Integer, event
 from sqlmodel import Field, SQLModel
 
 
@@ -37,7 +37,15 @@ class ApUser(SQLModel, table=True):
     """APP用户信息表模型"""
 
     __tablename__ = "ap_user"
-    __table_args__ = {"comment": "APP用户信息表"}
+    __table_args__ = (
+        # 唯一索引；pattern_ops 同时支持等值查询与手机号前缀 LIKE
+        Index("ix_ap_user_phone", "phone", unique=True,
+              postgresql_ops={"phone": "varchar_pattern_ops"}),
+        # 三元组 GIN 索引，支持用户名 ILIKE '%关键字%' 与相似度排序
+        Index("ix_ap_user_name_trgm", "name", postgresql_using="gin",
+              postgresql_ops={"name": "gin_trgm_ops"}),
+        {"comment": "APP用户信息表"},
+    )
 
     id: Optional[int] = Field(
         default=None,
@@ -48,7 +56,7 @@ class ApUser(SQLModel, table=True):
     salt: Optional[str] = Field(
         default=None,
         max_length=32,
-        description="密码、通信等加密盐"
+        description="密码、通信等加密盐(仅历史md5密码使用)"
     )
 
     name: Optional[str] = Field(
@@ -59,8 +67,8 @@ class ApUser(SQLModel, table=True):
 
     password: Optional[str] = Field(
         default=None,
-        max_length=32,
-        description="密码,md5加密"
+        max_length=128,
+        description="密码,bcrypt/argon2加密(历史数据为md5)"
     )
 
     phone: Optional[str] = Field(
@@ -108,3 +116,12 @@ class ApUser(SQLModel, table=True):
         default_factory=datetime.now,
         description="注册时间"
     )
+
+
+# 三元组索引依赖 pg_trgm 扩展，建表前创建
+event.listen(
+    SQLModel.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(
+        dialect="postgresql"),
+)
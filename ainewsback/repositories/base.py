@@ -1,13 +1,282 @@
-from typing import Generic, List, Optional, Type, TypeVar
+import base64
+import binascii
+import uuid
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+from itertools import islice
+from typing import Any, Callable, Dict, Generic, Iterable, Iterator, List, \
+    Mapping, Optional, Sequence, Tuple, Type, TypeVar
 
+from pydantic_core import PydanticUndefined
+
+from sqlalchemy import ColumnElement, Insert, Row, Select, Table, insert, \
+    literal, select as sa_select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlmodel import SQLModel
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from ainewsback.repositories.cache import ModelCache
+from ainewsback.repositories.unit_of_work import after_commit
+from ainewsback.utils.fast_json import dumps_bytes, loads
 
 ModelType = TypeVar("ModelType", bound=SQLModel)
+T = TypeVar("T")
+
+# 批量写入默认每块行数
+DEFAULT_CHUNK_SIZE = 1000
+# 单条语句绑定参数上限（PostgreSQL 为 32767）
+MAX_BIND_PARAMS = 32000
+
+# 支持 ON CONFLICT 的方言
+_UPSERT_INSERTS = {"postgresql": pg_insert, "sqlite": sqlite_insert}
+
+
+@dataclass
+class Page(Generic[ModelType]):
+    """一页结果，next_cursor 为 None 表示没有下一页"""
+    items: List[ModelType]
+    next_cursor: Optional[str] = None
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """将排序键编码为不透明游标（base64url JSON）"""
+    payload = dumps_bytes([v.isoformat() if isinstance(v, (date, datetime))
+                           else v for v in values])
+    return base64.urlsafe_b64encode(payload).rstrip(b"=").decode("ascii")
+
+
+def _cursor_value(python_type: Optional[type], value: Any) -> Any:
+    """按排序键的 Python 类型校验并还原游标中的单个取值"""
+    # 排序键非空，None 与 JSON 数组/对象都不是合法取值
+    if value is None or isinstance(value, (list, dict)):
+        raise ValueError("无效的游标")
+    if python_type is None:
+        return value
+    if python_type in (datetime, date, uuid.UUID):
+        if not isinstance(value, str):
+            raise ValueError("无效的游标")
+        if python_type is uuid.UUID:
+            return uuid.UUID(value)
+        return python_type.fromisoformat(value)
+    if python_type is bool:
+        if not isinstance(value, bool):
+            raise ValueError("无效的游标")
+        return value
+    if isinstance(value, bool):
+        raise ValueError("无效的游标")
+    if python_type is int:
+        if not isinstance(value, int):
+            raise ValueError("无效的游标")
+        return value
+    if python_type in (float, Decimal):
+        if not isinstance(value, (int, float, str)):
+            raise ValueError("无效的游标")
+        try:
+            return python_type(str(value) if python_type is Decimal
+                               else value)
+        except InvalidOperation as e:
+            raise ValueError("无效的游标") from e
+    if not isinstance(value, python_type):
+        raise ValueError("无效的游标")
+    return value
+
+
+def decode_cursor(cursor: str,
+                  keys: Sequence[ColumnElement]) -> List[Any]:
+    """
+    解码游标并按排序键类型校验、还原取值
+
+    Raises:
+        ValueError: 游标格式错误或取值与排序键类型不符
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (binascii.Error, ValueError, UnicodeError) as e:
+        raise ValueError("无效的游标") from e
+    if not isinstance(values, list) or len(values) != len(keys):
+        raise ValueError("无效的游标")
+
+    result = []
+    for key, value in zip(keys, values):
+        try:
+            python_type = key.type.python_type
+        except NotImplementedError:
+            python_type = None
+        try:
+            result.append(_cursor_value(python_type, value))
+        except (TypeError, ValueError) as e:
+            raise ValueError("无效的游标") from e
+    return result
+
+
+def keyset_statement(model: Type[SQLModel], keys: Sequence[ColumnElement],
+                     where: Optional[ColumnElement[bool]],
+                     cursor: Optional[str], limit: int,
+                     descending: bool = False) -> Select:
+    """
+    构造游标分页查询（条件、排序与 limit + 1）
+
+    排序键需非空且最后一个唯一（通常为主键）；所有键同向排序，
+    需要反向的键可传入取负的表达式。排序键作为附加列返回用于生成下一页游标。
+    """
+    statement = select(model, *keys)
+    if where is not None:
+        statement = statement.where(where)
+    if cursor:
+        values = decode_cursor(cursor, keys)
+        row = tuple_(*keys)
+        bound = tuple_(*(literal(v, key.type) for key, v in zip(keys, values)))
+        statement = statement.where(row < bound if descending else row > bound)
+    order = [key.desc() if descending else key.asc() for key in keys]
+    return statement.order_by(*order).limit(limit + 1)
+
+
+def build_page(rows: Sequence[Any], limit: int) -> Page:
+    """根据 keyset_statement 的结果行生成分页"""
+    items = [row[0] for row in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        next_cursor = encode_cursor(tuple(rows[limit - 1][1:]))
+    return Page(items=items, next_cursor=next_cursor)
+
+
+def iter_chunks(items: Iterable[T], size: int) -> Iterator[List[T]]:
+    """按块读取可迭代对象，内存只保留一块"""
+    iterator = iter(items)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+@lru_cache
+def _field_defaults(model: Type[SQLModel]) -> Tuple[
+        Dict[str, Any], Dict[str, Callable[[], Any]]]:
+    """模型字段的默认值与默认值工厂"""
+    defaults, factories = {}, {}
+    for name, field in model.model_fields.items():
+        if field.default_factory is not None:
+            factories[name] = field.default_factory
+        elif field.default is not PydanticUndefined:
+            defaults[name] = field.default
+    return defaults, factories
+
+
+def to_row(model: Type[SQLModel],
+           item: SQLModel | Mapping[str, Any]) -> Dict[str, Any]:
+    """
+    模型或字典转为列值字典（补全默认值，未赋值的主键不写入）
+
+    不构造模型实例，批量写入时开销远低于逐个实例化。
+    """
+    if isinstance(item, SQLModel):
+        row = {name: getattr(item, name) for name in model.model_fields}
+    else:
+        defaults, factories = _field_defaults(model)
+        row = {**defaults, **item}
+        for name, factory in factories.items():
+            if name not in item:
+                row[name] = factory()
+    if row.get("id") is None:
+        row.pop("id", None)
+    return row
+
+
+def projection_statement(model: Type[SQLModel], columns: Sequence[str],
+                         where: Sequence[ColumnElement[bool]],
+                         limit: Optional[int]) -> Select:
+    """
+    只查询指定列的语句
+
+    使用 SQLAlchemy 的 select，单列时也返回行而非标量。
+    """
+    table = model.__table__
+    statement = sa_select(*(table.c[name] for name in columns)).where(*where)
+    if limit is not None:
+        statement = statement.limit(limit)
+    return statement
+
+
+def chunk_size_for(table: Table, chunk_size: int) -> int:
+    """限制每块行数，避免多行 VALUES 超出绑定参数上限"""
+    return max(1, min(chunk_size, MAX_BIND_PARAMS // len(table.columns)))
+
+
+def insert_statement(table: Table, dialect: str) -> Insert:
+    """
+    构造批量 INSERT ... RETURNING id
+
+    PostgreSQL 按参数顺序返回 id（多行 VALUES 按哨兵列排序）；
+    其他方言要求按参数顺序时会退化为逐行执行，因此不排序，
+    由 ordered_ids 还原输入顺序。
+    """
+    return insert(table).returning(
+        table.c.id, sort_by_parameter_order=dialect == "postgresql")
+
+
+def ordered_ids(dialect: str, rows: Sequence[Mapping[str, Any]],
+                returned: Iterable[int]) -> List[int]:
+    """
+    把 insert_statement 返回的 id 按输入行顺序排列
+
+    PostgreSQL 已按参数顺序返回，原样使用；其他方言（SQLite）返回顺序不确定:
+    显式传入 id 的行取输入值，其余自增 id 升序后依次对应未传 id 的行。
+    """
+    returned = list(returned)
+    if dialect == "postgresql":
+        return returned
+    explicit = {row["id"] for row in rows if "id" in row}
+    generated = iter(sorted(id for id in returned if id not in explicit))
+    return [row["id"] if "id" in row else next(generated) for row in rows]
+
+
+def dialect_insert(dialect: str, table: Table | Type[SQLModel]) -> Insert:
+    """
+    支持 ON CONFLICT 的方言专用 INSERT
+
+    Raises:
+        NotImplementedError: 方言不支持 ON CONFLICT
+    """
+    if dialect not in _UPSERT_INSERTS:
+        raise NotImplementedError(f"{dialect} 不支持 ON CONFLICT")
+    return _UPSERT_INSERTS[dialect](table)
+
+
+def upsert_statement(table: Table, dialect: str, columns: Iterable[str],
+                     conflict_columns: Sequence[str],
+                     update_columns: Optional[Sequence[str]]) -> Insert:
+    """
+    构造 INSERT ... ON CONFLICT DO UPDATE ... RETURNING id
+
+    Args:
+        table: 表
+        dialect: 数据库方言名（postgresql / sqlite）
+        columns: 写入的列
+        conflict_columns: 冲突判断列（需有唯一约束）
+        update_columns: 冲突时更新的列，默认为除冲突列与主键外的全部写入列
+
+    Raises:
+        NotImplementedError: 方言不支持 ON CONFLICT
+        ValueError: 没有可更新的列
+    """
+    if update_columns is None:
+        update_columns = [c for c in columns
+                          if c not in conflict_columns and c != "id"]
+    if not update_columns:
+        raise ValueError("upsert 至少需要一个更新列")
+
+    statement = dialect_insert(dialect, table)
+    return statement.on_conflict_do_update(
+        index_elements=list(conflict_columns),
+        set_={c: statement.excluded[c] for c in update_columns},
+    ).returning(table.c.id, sort_by_parameter_order=True)
 
 
 class BaseRepository(Generic[ModelType]):
-    """基础Repository类"""
+    """基础Repository类（同步，仅供脚本使用）"""
 
     def __init__(self, model: Type[ModelType], session: Session):
         self.model = model
@@ -22,6 +291,23 @@ class BaseRepository(Generic[ModelType]):
         statement = select(self.model).offset(skip).limit(limit)
         return list(self.session.exec(statement).all())
 
+    def find_columns(self, columns: Sequence[str],
+                     *where: ColumnElement[bool],
+                     limit: Optional[int] = None) -> List[Row]:
+        """按条件只查询指定列，参数同 AsyncBaseRepository.find_columns"""
+        statement = projection_statement(self.model, columns, where, limit)
+        return list(self.session.exec(statement).all())
+
+    def get_page(self, limit: int = 20, cursor: Optional[str] = None,
+                 order_by: Sequence[ColumnElement] = (),
+                 descending: bool = False,
+                 where: Optional[ColumnElement[bool]] = None
+                 ) -> Page[ModelType]:
+        """游标分页，参数同 AsyncBaseRepository.get_page"""
+        statement = keyset_statement(self.model, [*order_by, self.model.id],
+                                     where, cursor, limit, descending)
+        return build_page(self.session.exec(statement).all(), limit)
+
     def create(self, obj_in: ModelType) -> ModelType:
         """创建"""
         self.session.add(obj_in)
@@ -39,6 +325,47 @@ class BaseRepository(Generic[ModelType]):
         self.session.refresh(db_obj)
         return db_obj
 
+    def create_many(self, items: Iterable[ModelType | Mapping[str, Any]],
+                    chunk_size: int = DEFAULT_CHUNK_SIZE) -> List[int]:
+        """批量插入，参数同 AsyncBaseRepository.create_many"""
+        table = self.model.__table__
+        dialect = self.session.get_bind().dialect.name
+        statement = insert_statement(table, dialect)
+        ids: List[int] = []
+        for chunk in iter_chunks(items, chunk_size_for(table, chunk_size)):
+            rows = [to_row(self.model, item) for item in chunk]
+            ids.extend(ordered_ids(
+                dialect, rows,
+                self.session.exec(statement, params=rows).scalars()))
+        self.session.commit()
+        return ids
+
+    def update_many(self, rows: Iterable[Mapping[str, Any]],
+                    chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+        """按主键批量更新，参数同 AsyncBaseRepository.update_many"""
+        count = 0
+        for chunk in iter_chunks(rows, chunk_size):
+            self.session.exec(update(self.model), params=chunk)
+            count += len(chunk)
+        self.session.commit()
+        return count
+
+    def upsert_many(self, items: Iterable[ModelType | Mapping[str, Any]],
+                    conflict_columns: Sequence[str] = ("id",),
+                    update_columns: Optional[Sequence[str]] = None,
+                    chunk_size: int = DEFAULT_CHUNK_SIZE) -> List[int]:
+        """批量插入或更新，参数同 AsyncBaseRepository.upsert_many"""
+        table = self.model.__table__
+        dialect = self.session.get_bind().dialect.name
+        ids: List[int] = []
+        for chunk in iter_chunks(items, chunk_size_for(table, chunk_size)):
+            rows = [to_row(self.model, item) for item in chunk]
+            statement = upsert_statement(table, dialect, rows[0],
+                                         conflict_columns, update_columns)
+            ids.extend(self.session.exec(statement, params=rows).scalars())
+        self.session.commit()
+        return ids
+
     def delete(self, id: int) -> bool:
         """删除"""
         obj = self.get(id)
@@ -47,3 +374,278 @@ class BaseRepository(Generic[ModelType]):
             self.session.commit()
             return True
         return False
+
+
+class AsyncBaseRepository(Generic[ModelType]):
+    """
+    基础Repository类（异步）
+
+    写入方法只 flush 不提交，由 UnitOfWork 在服务边界统一提交；
+    缓存失效登记为提交后回调。
+    """
+
+    def __init__(self, model: Type[ModelType], session: AsyncSession,
+                 cache: Optional[ModelCache[ModelType]] = None):
+        """
+        Args:
+            model: 模型类
+            session: 异步会话
+            cache: 读穿缓存，写入提交后自动失效
+        """
+        self.model = model
+        self.session = session
+        self.cache = cache
+
+    async def get(self, id: int) -> Optional[ModelType]:
+        """根据ID查询"""
+        if self.cache is None:
+            return await self.session.get(self.model, id)
+        return await self.cache.get_or_load(
+            "id", id, lambda: self.session.get(self.model, id))
+
+    async def get_all(self, skip: int = 0,
+                      limit: int = 100) -> List[ModelType]:
+        """查询所有"""
+        statement = select(self.model).offset(skip).limit(limit)
+        return list((await self.session.exec(statement)).all())
+
+    async def find_columns(self, columns: Sequence[str],
+                           *where: ColumnElement[bool],
+                           limit: Optional[int] = None) -> List[Row]:
+        """
+        按条件只查询指定列（投影），不构造模型对象
+
+        Args:
+            columns: 列名
+            where: 过滤条件
+            limit: 最多返回行数
+
+        Returns:
+            行（可按列名取属性）
+        """
+        statement = projection_statement(self.model, columns, where, limit)
+        return list((await self.session.exec(statement)).all())
+
+    async def get_page(self, limit: int = 20, cursor: Optional[str] = None,
+                       order_by: Sequence[ColumnElement] = (),
+                       descending: bool = False,
+                       where: Optional[ColumnElement[bool]] = None
+                       ) -> Page[ModelType]:
+        """
+        游标分页（keyset），翻页耗时与页码无关
+
+        Args:
+            limit: 每页条数
+            cursor: 上一页返回的 next_cursor，首页为 None
+            order_by: 排序键（不含主键，主键自动追加），需非空
+            descending: 是否倒序
+            where: 过滤条件，默认查询全部
+
+        Returns:
+            当前页及下一页游标
+
+        Raises:
+            ValueError: 游标无效
+        """
+        statement = keyset_statement(self.model, [*order_by, self.model.id],
+                                     where, cursor, limit, descending)
+        rows = (await self.session.exec(statement)).all()
+        return build_page(rows, limit)
+
+    def _invalidate(self, keys: List[str]) -> None:
+        """提交成功后删除缓存键"""
+        if self.cache is not None and keys:
+            cache = self.cache
+            after_commit(self.session, lambda: cache.invalidate(keys))
+
+    def _cache_keys(self, obj: ModelType) -> List[str]:
+        return self.cache.invalidation_keys(obj) if self.cache is not None else []
+
+    async def create(self, obj_in: ModelType,
+                     refresh: bool = False) -> ModelType:
+        """
+        创建
+
+        Args:
+            obj_in: 待创建对象，flush 后主键已赋值
+            refresh: 是否重新查询（仅在需要数据库生成的其他字段时使用）
+        """
+        self.session.add(obj_in)
+        await self.session.flush()
+        if refresh:
+            await self.session.refresh(obj_in)
+        # 清除该记录可能存在的负缓存
+        self._invalidate(self._cache_keys(obj_in))
+        return obj_in
+
+    async def update(self, db_obj: ModelType, obj_in: dict,
+                     refresh: bool = False) -> ModelType:
+        """
+        更新
+
+        Args:
+            db_obj: 会话中的对象或缓存返回的游离对象
+            obj_in: 待更新字段，值为 None 的字段忽略
+            refresh: 是否重新查询（仅在需要数据库生成的字段时使用）
+        """
+        # 记录修改前的缓存键（如手机号变更时的旧键）
+        old_keys = self._cache_keys(db_obj)
+        if db_obj not in self.session:
+            # 来自缓存的游离对象，关联到会话而不重新查询
+            db_obj = await self.session.merge(db_obj, load=False)
+        for field, value in obj_in.items():
+            if value is not None:
+                setattr(db_obj, field, value)
+        self.session.add(db_obj)
+        await self.session.flush()
+        if refresh:
+            await self.session.refresh(db_obj)
+        self._invalidate(old_keys + self._cache_keys(db_obj))
+        return db_obj
+
+    async def _cached_keys_where(self, column: str,
+                                 values: Sequence[Any]) -> List[str]:
+        """查询写入前的索引字段值，用于失效旧缓存键（未启用缓存时不查询）"""
+        if self.cache is None or not values:
+            return []
+        table = self.model.__table__
+        fields = [table.c[f] for f in self.cache.index_fields]
+        statement = select(*fields).where(table.c[column].in_(values))
+        rows = (await self.session.exec(statement)).all()
+        return [key for row in rows
+                for key in self.cache.invalidation_keys(row._mapping)]
+
+    async def create_many(self, items: Iterable[ModelType | Mapping[str, Any]],
+                          chunk_size: int = DEFAULT_CHUNK_SIZE) -> List[int]:
+        """
+        批量插入（多行 INSERT ... RETURNING id），不逐行 refresh
+
+        输入按块读取，可传入生成器；与其他写入一起由 UnitOfWork 提交。
+
+        Args:
+            items: 模型对象或字段字典
+            chunk_size: 每条语句的行数
+
+        Returns:
+            按输入顺序排列的新记录 id
+        """
+        table = self.model.__table__
+        dialect = self.session.get_bind().dialect.name
+        statement = insert_statement(table, dialect)
+        ids: List[int] = []
+        keys: List[str] = []
+        for chunk in iter_chunks(items, chunk_size_for(table, chunk_size)):
+            rows = [to_row(self.model, item) for item in chunk]
+            chunk_ids = ordered_ids(dialect, rows, (await self.session.exec(
+                statement, params=rows)).scalars())
+            ids.extend(chunk_ids)
+            if self.cache is not None:
+                keys.extend(k for row, id in zip(rows, chunk_ids)
+                            for k in self.cache.invalidation_keys({**row, "id": id}))
+        self._invalidate(keys)
+        return ids
+
+    async def copy_many(self, items: Iterable[ModelType | Mapping[str, Any]],
+                        chunk_size: int = 10000) -> int:
+        """
+        PostgreSQL COPY 批量导入（最快，不返回 id、不处理冲突）
+
+        其他数据库退化为 create_many。
+
+        Returns:
+            写入行数
+        """
+        if self.session.get_bind().dialect.name != "postgresql":
+            return len(await self.create_many(items, chunk_size))
+
+        table = self.model.__table__
+        connection = await self.session.connection()
+        raw = await connection.get_raw_connection()
+        driver = raw.driver_connection  # asyncpg.Connection
+        count = 0
+        keys: List[str] = []
+        for chunk in iter_chunks(items, chunk_size):
+            rows = [to_row(self.model, item) for item in chunk]
+            columns = list(rows[0])
+            await driver.copy_records_to_table(
+                table.name, schema_name=table.schema, columns=columns,
+                records=[tuple(row[c] for c in columns) for row in rows])
+            count += len(rows)
+            if self.cache is not None:
+                keys.extend(k for row in rows
+                            for k in self.cache.invalidation_keys(row))
+        self._invalidate(keys)
+        return count
+
+    async def update_many(self, rows: Iterable[Mapping[str, Any]],
+                          chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+        """
+        按主键批量更新（executemany），不加载对象
+
+        Args:
+            rows: 含 id 与待更新字段的字典，同一块内字段需一致
+            chunk_size: 每批行数
+
+        Returns:
+            提交的行数
+        """
+        count = 0
+        keys: List[str] = []
+        for chunk in iter_chunks(rows, chunk_size):
+            keys.extend(await self._cached_keys_where(
+                "id", [row["id"] for row in chunk]))
+            await self.session.exec(update(self.model), params=chunk)
+            if self.cache is not None:
+                keys.extend(k for row in chunk
+                            for k in self.cache.invalidation_keys(row))
+            count += len(chunk)
+        self._invalidate(keys)
+        return count
+
+    async def upsert_many(self, items: Iterable[ModelType | Mapping[str, Any]],
+                          conflict_columns: Sequence[str] = ("id",),
+                          update_columns: Optional[Sequence[str]] = None,
+                          chunk_size: int = DEFAULT_CHUNK_SIZE) -> List[int]:
+        """
+        批量插入或更新（INSERT ... ON CONFLICT DO UPDATE ... RETURNING id）
+
+        Args:
+            items: 模型对象或字段字典
+            conflict_columns: 冲突判断列（需有唯一约束），如 ("phone",)
+            update_columns: 冲突时更新的列，默认为除冲突列与主键外的全部写入列
+            chunk_size: 每条语句的行数
+
+        Returns:
+            按输入顺序排列的记录 id（新插入或已存在）
+        """
+        table = self.model.__table__
+        dialect = self.session.get_bind().dialect.name
+        ids: List[int] = []
+        keys: List[str] = []
+        for chunk in iter_chunks(items, chunk_size_for(table, chunk_size)):
+            rows = [to_row(self.model, item) for item in chunk]
+            statement = upsert_statement(table, dialect, rows[0],
+                                         conflict_columns, update_columns)
+            if self.cache is not None and len(conflict_columns) == 1:
+                column = conflict_columns[0]
+                keys.extend(await self._cached_keys_where(
+                    column, [row[column] for row in rows if column in row]))
+            chunk_ids = (await self.session.exec(statement,
+                                                 params=rows)).scalars().all()
+            ids.extend(chunk_ids)
+            if self.cache is not None:
+                keys.extend(k for row, id in zip(rows, chunk_ids)
+                            for k in self.cache.invalidation_keys({**row, "id": id}))
+        self._invalidate(keys)
+        return ids
+
+    async def delete(self, id: int) -> bool:
+        """删除"""
+        obj = await self.session.get(self.model, id)
+        if obj:
+            keys = self._cache_keys(obj)
+            await self.session.delete(obj)
+            await self.session.flush()
+            self._invalidate(keys)
+            return True
+        return False
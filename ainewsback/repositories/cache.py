@@ -0,0 +1,202 @@
+import logging
+from collections import namedtuple
+from typing import Any, Awaitable, Callable, Dict, Generic, List, Mapping, \
+    Optional, Sequence, Type, TypeVar
+
+import redis.asyncio as redis
+from redis.exceptions import RedisClusterException, RedisError
+from sqlalchemy.orm import make_transient_to_detached
+from sqlmodel import SQLModel
+
+from ainewsback.utils.fast_json import dumps, loads
+
+logger = logging.getLogger(__name__)
+
+ModelType = TypeVar("ModelType", bound=SQLModel)
+
+# 负缓存标记（记录不存在）
+NEGATIVE_MARKER = ""
+# 墓碑标记（刚写入过，暂不回填）
+TOMBSTONE_MARKER = "-"
+
+
+class CacheStats:
+    """缓存命中统计（进程内累计）"""
+
+    def __init__(self):
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.errors = 0
+
+    def stats(self) -> Dict[str, object]:
+        lookups = self.hits + self.negative_hits + self.misses
+        return {
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "errors": self.errors,
+            "hit_ratio": ((self.hits + self.negative_hits) / lookups
+                          if lookups else 0.0),
+        }
+
+
+class ModelCache(Generic[ModelType]):
+    """
+    模型读穿缓存（Redis）
+
+    按索引字段（如 id、phone）各存一份紧凑序列化的记录，
+    值为按字段顺序排列的 JSON 数组；不存在的记录短暂缓存为空串。
+    指定 fields 时只缓存部分列（投影），命中返回具名元组。
+    Redis 不可用时直接回源数据库。
+
+    失效时写入短期墓碑而不是删除，回填使用 SET NX: 提交前读到旧数据的
+    并发请求无法在失效之后把旧数据写回（如改密码后仍按旧密码哈希认证）。
+    """
+
+    def __init__(self, redis_client: redis.Redis, model: Type[ModelType],
+                 prefix: str, index_fields: Sequence[str],
+                 ttl: int, negative_ttl: int, tombstone_ttl: int,
+                 stats: CacheStats,
+                 fields: Optional[Sequence[str]] = None):
+        """
+        Args:
+            redis_client: Redis 客户端
+            model: 模型类
+            prefix: 键前缀，结构变化时应更换版本号
+            index_fields: 可按其查询的唯一字段
+            ttl: 记录缓存秒数
+            negative_ttl: 不存在记录的缓存秒数
+            tombstone_ttl: 失效后墓碑保留秒数（期间回源且不回填）
+            stats: 命中统计
+            fields: 投影列（需为 JSON 原生类型），默认缓存整个模型
+        """
+        self.redis = redis_client
+        self.model = model
+        self.prefix = prefix
+        self.index_fields = tuple(index_fields)
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.tombstone_ttl = tombstone_ttl
+        self.stats = stats
+        self._fields = tuple(fields or model.model_fields)
+        self._row_type = (namedtuple(f"{model.__name__}Row", self._fields)
+                          if fields else None)
+
+    def key(self, field: str, value: object) -> str:
+        """缓存键"""
+        return f"{self.prefix}:{field}:{value}"
+
+    def keys_for(self, obj: ModelType | Mapping[str, Any]) -> List[str]:
+        """对象（或字段字典）对应的全部缓存键"""
+        keys = []
+        for field in self.index_fields:
+            if isinstance(obj, Mapping):
+                value = obj.get(field)
+            else:
+                value = getattr(obj, field, None)
+            if value is not None:
+                keys.append(self.key(field, value))
+        return keys
+
+    def invalidation_keys(self, obj: ModelType | Mapping[str, Any]
+                          ) -> List[str]:
+        """写入后需删除的缓存键，子类可追加关联缓存的键"""
+        return self.keys_for(obj)
+
+    def _dump(self, obj: Any) -> str:
+        if self._row_type is not None:
+            return dumps([getattr(obj, field) for field in self._fields])
+        data = obj.model_dump(mode="json")
+        return dumps([data[field] for field in self._fields])
+
+    def _load(self, raw: str | bytes) -> Any:
+        values = loads(raw)
+        if len(values) != len(self._fields):
+            return None
+        if self._row_type is not None:
+            return self._row_type(*values)
+        obj = self.model.model_validate(dict(zip(self._fields, values)))
+        # 标记为已持久化的游离对象，可通过 session.merge 重新关联
+        make_transient_to_detached(obj)
+        return obj
+
+    async def get_or_load(
+            self, field: str, value: object,
+            loader: Callable[[], Awaitable[Optional[ModelType]]]
+    ) -> Optional[ModelType]:
+        """
+        先查缓存，未命中时调用 loader 查询数据库并回填
+
+        Args:
+            field: 查询字段
+            value: 字段值
+            loader: 数据库查询
+
+        Returns:
+            模型对象，不存在返回 None
+        """
+        key = self.key(field, value)
+        try:
+            raw = await self.redis.get(key)
+        except (RedisError, RedisClusterException) as e:
+            self.stats.errors += 1
+            logger.warning(f"读取缓存失败 {key}: {e}")
+            return await loader()
+
+        if raw is not None:
+            # REDIS_DECODE_RESPONSES=False 时返回字节
+            if isinstance(raw, bytes):
+                raw = raw.decode("utf-8")
+            if raw == TOMBSTONE_MARKER:
+                # 刚写入过: 回源，不回填
+                self.stats.misses += 1
+                return await loader()
+            if not raw:
+                self.stats.negative_hits += 1
+                return None
+            obj = self._load(raw)
+            if obj is not None:
+                self.stats.hits += 1
+                return obj
+
+        self.stats.misses += 1
+        obj = await loader()
+        await self._fill(key, obj)
+        return obj
+
+    async def _fill(self, key: str, obj: Optional[ModelType]) -> None:
+        """
+        回填缓存，记录存在时所有索引键一并写入
+
+        只在键不存在时写入（NX），已有墓碑或更新的值时放弃。
+        """
+        try:
+            if obj is None:
+                await self.redis.set(key, NEGATIVE_MARKER,
+                                     ex=self.negative_ttl, nx=True)
+                return
+            payload = self._dump(obj)
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for k in self.keys_for(obj):
+                    pipe.set(k, payload, ex=self.ttl, nx=True)
+                await pipe.execute()
+        except (RedisError, RedisClusterException) as e:
+            self.stats.errors += 1
+            logger.warning(f"回填缓存失败 {key}: {e}")
+
+    async def invalidate(self, keys: Sequence[str]) -> None:
+        """缓存键写为墓碑（写入提交后调用），墓碑过期前不会被回填"""
+        if not keys:
+            return
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for key in set(keys):
+                    pipe.set(key, TOMBSTONE_MARKER, ex=self.tombstone_ttl)
+                await pipe.execute()
+            self.stats.invalidations += 1
+        except (RedisError, RedisClusterException) as e:
+            self.stats.errors += 1
+            logger.warning(f"删除缓存失败 {keys}: {e}")
@@ -0,0 +1,52 @@
+from typing import Awaitable, Callable, List
+
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+# session.info 中登记提交后回调的键
+AFTER_COMMIT_KEY = "after_commit"
+
+AfterCommit = Callable[[], Awaitable[None]]
+
+
+def after_commit(session: AsyncSession, callback: AfterCommit) -> None:
+    """登记提交成功后执行的回调（如缓存失效），回滚时丢弃"""
+    session.info.setdefault(AFTER_COMMIT_KEY, []).append(callback)
+
+
+class UnitOfWork:
+    """
+    请求级工作单元
+
+    仓储只 flush 不提交，服务在边界处用 `async with uow:` 一次提交，
+    多次写入在同一事务内原子生效。嵌套使用时只有最外层提交或回滚。
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+        self._depth = 0
+
+    async def __aenter__(self) -> "UnitOfWork":
+        self._depth += 1
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        self._depth -= 1
+        if self._depth:
+            return
+        if exc_type is None:
+            await self.commit()
+        else:
+            await self.rollback()
+
+    async def commit(self) -> None:
+        """提交事务并执行提交后回调"""
+        await self.session.commit()
+        callbacks: List[AfterCommit] = self.session.info.pop(
+            AFTER_COMMIT_KEY, [])
+        for callback in callbacks:
+            await callback()
+
+    async def rollback(self) -> None:
+        """回滚事务并丢弃提交后回调"""
+        await self.session.rollback()
+        self.session.info.pop(AFTER_COMMIT_KEY, None)
@@ -1,13 +1,123 @@
-from typing import List, Optional
+from typing import Any, Awaitable, Callable, Dict, List, Mapping, Optional, \
+    Tuple
 
+import redis.asyncio as redis
+from sqlalchemy import ColumnElement, Float, Row, Select, case, func
 from sqlmodel import col, select
 
+from ainewsback.core.config import settings
 from ainewsback.models.user import ApUser
-from ainewsback.repositories.base import BaseRepository
+from ainewsback.repositories.base import AsyncBaseRepository, \
+    BaseRepository, Page, dialect_insert, to_row
+from ainewsback.repositories.cache import CacheStats, ModelCache
+
+# 登录认证所需的列
+AUTH_FIELDS = ("id", "phone", "password", "salt", "status")
+
+# 用户缓存命中统计
+user_cache_stats = CacheStats()
+user_auth_cache_stats = CacheStats()
+
+
+class UserAuthCache(ModelCache[ApUser]):
+    """登录认证投影缓存，按手机号索引，仅含 AUTH_FIELDS"""
+
+    PREFIX = "cache:user_auth:v1"
+
+    def __init__(self, redis_client: redis.Redis):
+        super().__init__(
+            redis_client, ApUser, self.PREFIX, ("phone",),
+            ttl=settings.USER_CACHE_TTL_SECONDS,
+            negative_ttl=settings.USER_CACHE_NEGATIVE_TTL_SECONDS,
+            tombstone_ttl=settings.USER_CACHE_TOMBSTONE_TTL_SECONDS,
+            stats=user_auth_cache_stats,
+            fields=AUTH_FIELDS,
+        )
+
+
+class UserCache(ModelCache[ApUser]):
+    """用户读穿缓存，按 id 与手机号索引"""
+
+    # 模型结构变化时更换版本号，旧缓存自然过期
+    PREFIX = "cache:user:v1"
+
+    def __init__(self, redis_client: redis.Redis):
+        super().__init__(
+            redis_client, ApUser, self.PREFIX, ("id", "phone"),
+            ttl=settings.USER_CACHE_TTL_SECONDS,
+            negative_ttl=settings.USER_CACHE_NEGATIVE_TTL_SECONDS,
+            tombstone_ttl=settings.USER_CACHE_TOMBSTONE_TTL_SECONDS,
+            stats=user_cache_stats,
+        )
+        self.auth = UserAuthCache(redis_client)
+
+    def invalidation_keys(self, obj: ApUser | Mapping[str, Any]) -> List[str]:
+        """用户写入时认证投影缓存一并失效"""
+        return self.keys_for(obj) + self.auth.keys_for(obj)
+
+
+def build_search_query(keyword: str, dialect: str) -> Optional[
+        Tuple[ColumnElement[bool], List[ColumnElement]]]:
+    """
+    构造用户搜索条件与排序键
+
+    数字关键字匹配手机号前缀，同时匹配用户名包含关键字（通配符已转义）。
+    排序: 完全匹配 > 前缀匹配 > 包含，PostgreSQL 下再按三元组相似度降序，
+    排序键均为升序（相似度取负），可直接用于游标分页，调用方追加 id。
+
+    Args:
+        keyword: 搜索关键字
+        dialect: 数据库方言名
+
+    Returns:
+        (过滤条件, 排序键)，关键字为空时返回 None
+    """
+    keyword = keyword.strip()
+    if not keyword:
+        return None
+
+    name = col(ApUser.name)
+    phone = col(ApUser.phone)
+    condition = name.icontains(keyword, autoescape=True)
+    rank = case(
+        (func.lower(name) == keyword.lower(), 0),
+        (name.istartswith(keyword, autoescape=True), 1),
+        else_=3,
+    )
+    if keyword.isdigit():
+        condition = condition | phone.startswith(keyword, autoescape=True)
+        rank = case(
+            (phone == keyword, 0),
+            (func.lower(name) == keyword.lower(), 0),
+            (phone.startswith(keyword, autoescape=True), 1),
+            (name.istartswith(keyword, autoescape=True), 2),
+            else_=3,
+        )
+
+    keys: List[ColumnElement] = [rank]
+    if dialect == "postgresql":
+        keys.append(-func.similarity(name, keyword, type_=Float))
+    return condition, keys
+
+
+def build_search_statement(keyword: str, skip: int, limit: int,
+                           dialect: str) -> Optional[Select]:
+    """
+    构造用户搜索语句（偏移分页）
+
+    Returns:
+        查询语句，关键字为空时返回 None
+    """
+    query = build_search_query(keyword, dialect)
+    if query is None:
+        return None
+    condition, keys = query
+    return (select(ApUser).where(condition)
+            .order_by(*keys, col(ApUser.id)).offset(skip).limit(limit))
 
 
 class UserRepository(BaseRepository[ApUser]):
-    """用户数据访问层"""
+    """用户数据访问层（同步，仅供脚本使用）"""
 
     def get_by_phone(self, phone: str) -> Optional[ApUser]:
         """根据手机号查询用户"""
@@ -21,9 +131,108 @@ class UserRepository(BaseRepository[ApUser]):
 
     def search_users(self, keyword: str, skip: int = 0,
                      limit: int = 100) -> List[ApUser]:
-        """搜索用户"""
-        statement = select(ApUser).where(
-            col(ApUser.name).contains(keyword) | col(ApUser.name).contains(
-                keyword)
-        ).offset(skip).limit(limit)
+        """搜索用户（手机号前缀或用户名，按相关度排序）"""
+        statement = build_search_statement(
+            keyword, skip, limit, self.session.get_bind().dialect.name)
+        if statement is None:
+            return []
         return list(self.session.exec(statement).all())
+
+
+class AsyncUserRepository(AsyncBaseRepository[ApUser]):
+    """用户数据访问层（异步）"""
+
+    cache: Optional[UserCache]
+
+    async def get_by_phone(self, phone: str) -> Optional[ApUser]:
+        """根据手机号查询用户"""
+        if self.cache is None:
+            return await self._get_by_phone(phone)
+        return await self.cache.get_or_load(
+            "phone", phone, lambda: self._get_by_phone(phone))
+
+    async def _get_by_phone(self, phone: str) -> Optional[ApUser]:
+        statement = select(ApUser).where(ApUser.phone == phone)
+        return (await self.session.exec(statement)).first()
+
+    async def get_auth_by_phone(self, phone: str) -> Optional[Row]:
+        """
+        查询登录认证所需的列（AUTH_FIELDS），不加载完整用户
+
+        Returns:
+            含 id、phone、password、salt、status 的行，不存在返回 None
+        """
+        if self.cache is None:
+            return await self._get_auth_by_phone(phone)
+        return await self.cache.auth.get_or_load(
+            "phone", phone, lambda: self._get_auth_by_phone(phone))
+
+    async def _get_auth_by_phone(self, phone: str) -> Optional[Row]:
+        rows = await self.find_columns(AUTH_FIELDS, ApUser.phone == phone,
+                                       limit=1)
+        return rows[0] if rows else None
+
+    async def get_or_create_by_phone(
+            self, phone: str,
+            defaults: Callable[[], Awaitable[Dict[str, Any]]]
+    ) -> Tuple[ApUser, bool]:
+        """
+        按手机号获取用户，不存在时原子创建
+
+        先查询（已有用户只需一次查询或命中缓存）；不存在时执行
+        INSERT ... ON CONFLICT (phone) DO NOTHING RETURNING，
+        并发插入冲突时再查询一次已提交的记录。
+
+        Args:
+            phone: 手机号
+            defaults: 仅在需要插入时调用，返回除手机号外的字段
+
+        Returns:
+            (用户, 是否新建)
+        """
+        user = await self.get_by_phone(phone)
+        if user is not None:
+            return user, False
+
+        row = to_row(ApUser, {**await defaults(), "phone": phone})
+        statement = dialect_insert(
+            self.session.get_bind().dialect.name, ApUser
+        ).values(**row).on_conflict_do_nothing(
+            index_elements=["phone"]).returning(ApUser)
+        user = (await self.session.exec(statement)).scalars().first()
+        created = user is not None
+        if not created:
+            # 并发请求已插入，绕过（可能为负缓存的）缓存直接查询
+            user = await self._get_by_phone(phone)
+        self._invalidate(self._cache_keys(user))
+        return user, created
+
+    async def get_by_name(self, name: str) -> Optional[ApUser]:
+        """根据用户名查询"""
+        statement = select(ApUser).where(ApUser.name == name)
+        return (await self.session.exec(statement)).first()
+
+    async def search_users(self, keyword: str, skip: int = 0,
+                           limit: int = 100) -> List[ApUser]:
+        """搜索用户（手机号前缀或用户名，按相关度排序）"""
+        statement = build_search_statement(
+            keyword, skip, limit, self.session.get_bind().dialect.name)
+        if statement is None:
+            return []
+        return list((await self.session.exec(statement)).all())
+
+    async def search_page(self, keyword: str, limit: int = 20,
+                          cursor: Optional[str] = None) -> Page[ApUser]:
+        """
+        搜索用户（游标分页，排序同 search_users）
+
+        Raises:
+            ValueError: 游标无效
+        """
+        query = build_search_query(keyword,
+                                   self.session.get_bind().dialect.name)
+        if query is None:
+            return Page(items=[])
+        condition, keys = query
+        return await self.get_page(limit, cursor, order_by=keys,
+                                   where=condition)
@@ -1,4 +1,4 @@
-from typing import Any, Generic, TypeVar, Union
+from typing import Any, Generic, List, TypeVar, Union
 
 from pydantic import BaseModel
 
@@ -12,6 +12,12 @@ class BaseResponseModel(BaseModel, Generic[T]):
     data: T | None = None
 
 
+class CursorPage(BaseModel, Generic[T]):
+    """游标分页结果，next_cursor 为空表示没有下一页"""
+    items: List[T] = []
+    next_cursor: str | None = None
+
+
 def resp(code: int, data: Union[list, dict, str, Any] = None,
          message: str = 'success') -> BaseResponseModel:
     return BaseResponseModel(code=code, errorMessage=message, data=data)
@@ -1,18 +1,48 @@
-from pydantic import BaseModel
+from datetime import datetime
+from typing import Optional
 
-from ainewsback.models.user import ApUser
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+
+from ainewsback.utils.password import MAX_PASSWORD_BYTES
+
+
+class UserRead(BaseModel):
+    """登录返回的用户信息（仅 id 与手机号，不含密码、盐值）"""
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    phone: str
 
 
 class LoginAuthResponse(BaseModel):
-    user: ApUser = ApUser()
-    token: str = "token"
+    user: UserRead
+    token: str
 
 
 class LoginAuthRequest(BaseModel):
     phone: str
-    password: str
+    password: str = Field(..., min_length=1, max_length=MAX_PASSWORD_BYTES)
+
+    @field_validator("password")
+    @classmethod
+    def check_password_bytes(cls, value: str) -> str:
+        """多字节字符按 UTF-8 字节数计算长度（bcrypt 上限）"""
+        if len(value.encode("utf-8")) > MAX_PASSWORD_BYTES:
+            raise ValueError(f"密码不能超过 {MAX_PASSWORD_BYTES} 字节")
+        return value
 
 
 class LoginCodeRequest(BaseModel):
     phone: str
     code: str
+
+
+class UserPublic(BaseModel):
+    """对外展示的用户信息（不含密码、盐值、手机号）"""
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    name: Optional[str] = None
+    image: Optional[str] = None
+    flag: int = 0
+    created_time: Optional[datetime] = None
@@ -0,0 +1,327 @@
+import asyncio
+import contextlib
+import json
+import logging
+import random
+import time
+import uuid
+from typing import Optional, Set
+
+import redis.asyncio as redis
+from redis.exceptions import RedisClusterException, RedisError
+
+from ainewsback.core.config import settings
+from ainewsback.utils.dingtalk_robot import SendOutcome, \
+    VerificationNotifier
+
+logger = logging.getLogger(__name__)
+
+# 投递状态
+STATUS_PENDING = "pending"
+STATUS_SENDING = "sending"
+STATUS_RETRYING = "retrying"
+STATUS_DELIVERED = "delivered"
+STATUS_FAILED = "failed"
+STATUS_EXPIRED = "expired"
+# 读/写超时: 钉钉可能已收到，为保证至多一次不再重试
+STATUS_UNKNOWN = "unknown"
+
+
+class NotificationOutbox:
+    """
+    验证码通知发件箱（Redis 持久化队列）
+
+    send_code 保存验证码后入队即返回，由 OutboxWorker 在后台投递。
+    """
+
+    # 所有 key 共用哈希标签 {notify:outbox}，集群模式下落在同一 slot，
+    # 入队事务与 LMOVE/BLMOVE 才能跨 key 执行
+    QUEUE_KEY = "{notify:outbox}:queue"
+    RETRY_KEY = "{notify:outbox}:retry"
+    # 已登记的 worker ID，各自的处理中队列见 get_processing_key
+    WORKERS_KEY = "{notify:outbox}:workers"
+
+    def __init__(self, redis_client: redis.Redis):
+        self.redis = redis_client
+
+    @staticmethod
+    def get_status_key(message_id: str) -> str:
+        """投递状态 key"""
+        return f"{{notify:outbox}}:status:{message_id}"
+
+    @staticmethod
+    def get_processing_key(worker_id: str) -> str:
+        """worker 的处理中队列，只有该 worker 退出后才会被回收"""
+        return f"{{notify:outbox}}:processing:{worker_id}"
+
+    @staticmethod
+    def get_heartbeat_key(worker_id: str) -> str:
+        """worker 心跳 key，过期即视为该 worker 已退出"""
+        return f"{{notify:outbox}}:heartbeat:{worker_id}"
+
+    @staticmethod
+    def get_claim_key(message_id: str) -> str:
+        """发送占位 key，保证同一消息至多发送一次"""
+        return f"{{notify:outbox}}:claim:{message_id}"
+
+    async def enqueue(self, mobile: str, code: str,
+                      scene: str = "login") -> str:
+        """
+        验证码通知入队
+
+        Returns:
+            消息 ID
+        """
+        now = time.time()
+        message_id = uuid.uuid4().hex
+        message = json.dumps({
+            "id": message_id,
+            "mobile": mobile,
+            "code": code,
+            "scene": scene,
+            "attempts": 0,
+            "expires_at": now + settings.CODE_EXPIRE_SECONDS,
+        })
+
+        async with self.redis.pipeline(transaction=True) as pipe:
+            await pipe.lpush(self.QUEUE_KEY, message)
+            await self.set_status(pipe, message_id, STATUS_PENDING, 0)
+            await pipe.execute()
+        return message_id
+
+    async def get_status(self, message_id: str) -> Optional[dict]:
+        """查询消息投递状态"""
+        status = await self.redis.hgetall(self.get_status_key(message_id))
+        return status or None
+
+    async def set_status(self, client, message_id: str, status: str,
+                         attempts: int, error: str = "") -> None:
+        """写入投递状态（client 可为 Redis 客户端或 pipeline）"""
+        key = self.get_status_key(message_id)
+        await client.hset(key, mapping={
+            "status": status,
+            "attempts": attempts,
+            "error": error,
+            "updated_at": time.time(),
+        })
+        await client.expire(key, settings.NOTIFY_OUTBOX_STATUS_TTL)
+
+
+class OutboxWorker:
+    """
+    发件箱后台投递任务，随应用 lifespan 启停
+
+    每个 worker 有独立的处理中队列并定期续期心跳，启动及运行期间只回收
+    心跳已过期（进程已退出）的 worker 的处理中消息，不会抢走存活 worker
+    正在投递的消息。
+    """
+
+    def __init__(self, outbox: NotificationOutbox,
+                 notifier: VerificationNotifier):
+        self.outbox = outbox
+        self.redis = outbox.redis
+        self.notifier = notifier
+        self.worker_id = uuid.uuid4().hex
+        self.processing_key = outbox.get_processing_key(self.worker_id)
+        concurrency = settings.NOTIFY_OUTBOX_CONCURRENCY
+        if settings.DINGTALK_BATCH_ENABLED:
+            # 合并发送时需要足够多的在途消息才能凑满批次
+            concurrency = max(concurrency, settings.DINGTALK_BATCH_MAX_SIZE
+                              * len(notifier.robots))
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._inflight: Set[asyncio.Task] = set()
+        self._task: Optional[asyncio.Task] = None
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    def start(self) -> None:
+        """启动后台投递"""
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """停止拉取新消息，并等待在途消息投递完成"""
+        self._stopping = True
+        if self._task:
+            await self._task
+            self._task = None
+        if self._inflight:
+            await asyncio.wait(self._inflight, timeout=timeout)
+        if self._heartbeat_task:
+            self._heartbeat_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._heartbeat_task
+            self._heartbeat_task = None
+        await self._unregister()
+
+    async def _heartbeat(self) -> None:
+        """续期心跳并登记 worker（停顿后被回收的 worker 也会重新登记）"""
+        async with self.redis.pipeline(transaction=True) as pipe:
+            await pipe.set(self.outbox.get_heartbeat_key(self.worker_id), "1",
+                           ex=settings.NOTIFY_OUTBOX_WORKER_TTL)
+            await pipe.sadd(self.outbox.WORKERS_KEY, self.worker_id)
+            await pipe.execute()
+
+    async def _heartbeat_loop(self) -> None:
+        """每 1/3 有效期续期一次心跳，每个有效期回收一次已退出的 worker"""
+        ttl = settings.NOTIFY_OUTBOX_WORKER_TTL
+        last_recover = time.monotonic()
+        while True:
+            await asyncio.sleep(ttl / 3)
+            try:
+                await self._heartbeat()
+                if time.monotonic() - last_recover >= ttl:
+                    last_recover = time.monotonic()
+                    await self.recover_dead_workers()
+            except (RedisError, RedisClusterException) as e:
+                logger.warning(f"通知发件箱心跳失败: {e}")
+
+    async def recover_dead_workers(self) -> int:
+        """
+        心跳已过期的 worker 的处理中消息重新入队（占位 key 保证不会重复发送）
+
+        Returns:
+            重新入队的消息数
+        """
+        outbox = self.outbox
+        moved = 0
+        for worker_id in await self.redis.smembers(outbox.WORKERS_KEY):
+            if isinstance(worker_id, bytes):
+                worker_id = worker_id.decode()
+            if (worker_id == self.worker_id or await self.redis.exists(
+                    outbox.get_heartbeat_key(worker_id))):
+                continue
+            # LMOVE 逐条原子移动，多个 worker 同时回收也不会重复入队
+            while await self.redis.lmove(outbox.get_processing_key(worker_id),
+                                         outbox.QUEUE_KEY, "RIGHT", "LEFT"):
+                moved += 1
+            await self.redis.srem(outbox.WORKERS_KEY, worker_id)
+        if moved:
+            logger.warning(f"回收已退出 worker 的通知消息: {moved} 条")
+        return moved
+
+    async def _unregister(self) -> None:
+        """删除心跳；处理中队列已清空时注销，否则留给其他 worker 回收"""
+        try:
+            await self.redis.delete(
+                self.outbox.get_heartbeat_key(self.worker_id))
+            if not await self.redis.llen(self.processing_key):
+                await self.redis.srem(self.outbox.WORKERS_KEY, self.worker_id)
+        except (RedisError, RedisClusterException) as e:
+            logger.warning(f"注销通知发件箱 worker 失败: {e}")
+
+    async def _register(self) -> bool:
+        """
+        先登记自己，再回收异常退出的 worker 遗留的消息
+
+        Redis 不可用时记录日志并退避重试，直到成功或停止。
+
+        Returns:
+            是否登记成功
+        """
+        while not self._stopping:
+            try:
+                await self._heartbeat()
+                await self.recover_dead_workers()
+                return True
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"通知发件箱 worker 登记失败: {e}")
+                await asyncio.sleep(1)
+        return False
+
+    async def _run(self) -> None:
+        if not await self._register():
+            return
+        self._heartbeat_task = asyncio.create_task(self._heartbeat_loop())
+
+        while not self._stopping:
+            try:
+                await self._promote_due_retries()
+                raw = await self.redis.blmove(
+                    self.outbox.QUEUE_KEY, self.processing_key,
+                    timeout=1, src="RIGHT", dest="LEFT")
+                if raw is None:
+                    continue
+
+                await self._semaphore.acquire()
+                task = asyncio.create_task(self._handle(raw))
+                self._inflight.add(task)
+                task.add_done_callback(self._on_done)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"通知发件箱拉取失败: {e}")
+                await asyncio.sleep(1)
+
+    def _on_done(self, task: asyncio.Task) -> None:
+        self._inflight.discard(task)
+        self._semaphore.release()
+
+    async def _promote_due_retries(self) -> None:
+        """到期的重试消息移回待发送队列"""
+        due = await self.redis.zrangebyscore(self.outbox.RETRY_KEY, 0,
+                                             time.time(), start=0, num=100)
+        for raw in due:
+            # ZREM 成功者负责入队，多 worker 下不会重复
+            if await self.redis.zrem(self.outbox.RETRY_KEY, raw):
+                await self.redis.lpush(self.outbox.QUEUE_KEY, raw)
+
+    async def _handle(self, raw) -> None:
+        try:
+            await self._deliver(json.loads(raw))
+        except Exception as e:
+            logger.error(f"通知投递异常: {e}", exc_info=True)
+        finally:
+            await self.redis.lrem(self.processing_key, 1, raw)
+
+    async def _deliver(self, message: dict) -> None:
+        message_id = message["id"]
+        attempts = message["attempts"] + 1
+
+        if time.time() >= message["expires_at"]:
+            await self.outbox.set_status(self.redis, message_id,
+                                          STATUS_EXPIRED, attempts - 1)
+            return
+
+        # 占位成功才发送；占位已存在说明已发送或发送中
+        claim_key = self.outbox.get_claim_key(message_id)
+        if not await self.redis.set(claim_key, "1", nx=True,
+                                    ex=settings.NOTIFY_OUTBOX_STATUS_TTL):
+            return
+
+        await self.outbox.set_status(self.redis, message_id, STATUS_SENDING,
+                                      attempts)
+        outcome, result = await self.notifier.send_verification_code(
+            message["mobile"], message["code"], message["scene"])
+
+        if outcome is SendOutcome.SENT:
+            await self.outbox.set_status(self.redis, message_id,
+                                          STATUS_DELIVERED, attempts)
+            return
+
+        if outcome is SendOutcome.UNKNOWN:
+            # 无法确认是否送达，保留占位不再重试
+            await self.outbox.set_status(self.redis, message_id,
+                                          STATUS_UNKNOWN, attempts, result)
+            logger.warning(f"验证码通知投递结果未知: {message_id}")
+            return
+
+        # 明确失败（含连接/连接池超时）: 释放占位，按指数退避重试
+        await self.redis.delete(claim_key)
+        if attempts >= settings.NOTIFY_OUTBOX_MAX_ATTEMPTS:
+            await self.outbox.set_status(self.redis, message_id,
+                                          STATUS_FAILED, attempts, result)
+            logger.error(f"验证码通知投递失败: {message_id} {result}")
+            return
+
+        delay = min(settings.NOTIFY_OUTBOX_RETRY_BASE_SECONDS
+                    * 2 ** (attempts - 1),
+                    settings.NOTIFY_OUTBOX_RETRY_MAX_SECONDS)
+        delay *= random.uniform(0.8, 1.2)
+        message["attempts"] = attempts
+        await self.redis.zadd(self.outbox.RETRY_KEY,
+                              {json.dumps(message): time.time() + delay})
+        await self.outbox.set_status(self.redis, message_id, STATUS_RETRYING,
+                                      attempts, result)
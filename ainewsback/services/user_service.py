@@ -1,8 +1,12 @@
 from typing import Optional, Tuple
-from sqlmodel import Session
 
-from ainewsback.models.user import ApUser
-from ainewsback.repositories.user_repository import UserRepository
+from sqlalchemy import Row
+
+from ainewsback.models.user import ApUser, UserStatus
+from ainewsback.repositories.base import Page
+from ainewsback.repositories.unit_of_work import UnitOfWork
+from ainewsback.repositories.user_repository import AsyncUserRepository, \
+    UserCache
 from ainewsback.services.verification import VerificationService
 from ainewsback.utils.jwt import JWTUtils
 from ainewsback.utils.password import PasswordUtil
@@ -11,27 +15,52 @@ from ainewsback.utils.password import PasswordUtil
 class UserService:
     """用户业务逻辑层"""
 
-    def __init__(self, session: Session, verification: VerificationService):
-        self.repository = UserRepository(ApUser, session)
+    def __init__(self, uow: UnitOfWork,
+                 verification: VerificationService,
+                 cache: Optional[UserCache] = None):
+        self.uow = uow
+        self.repository = AsyncUserRepository(ApUser, uow.session, cache)
         self.verification = verification
 
-    def get_user_by_id(self, user_id: int) -> Optional[ApUser]:
+    async def get_user_by_id(self, user_id: int) -> Optional[ApUser]:
         """获取用户"""
-        return self.repository.get(user_id)
+        return await self.repository.get(user_id)
 
-    def get_user_by_phone(self, phone: str) -> Optional[ApUser]:
+    async def get_user_by_phone(self, phone: str) -> Optional[ApUser]:
         """根据手机号获取用户"""
-        return self.repository.get_by_phone(phone)
+        return await self.repository.get_by_phone(phone)
 
-    def create_user_default(self, phone: str) -> ApUser:
-        """创建默认用户"""
+    async def list_users(self, limit: int = 20,
+                         cursor: Optional[str] = None) -> Page[ApUser]:
+        """按 id 游标分页列出用户"""
+        return await self.repository.get_page(limit, cursor)
+
+    async def search_users(self, keyword: str, limit: int = 20,
+                           cursor: Optional[str] = None) -> Page[ApUser]:
+        """搜索用户（游标分页）"""
+        return await self.repository.search_page(keyword, limit, cursor)
+
+    @staticmethod
+    async def _default_user_fields() -> dict:
+        """默认用户的随机用户名与密码（仅在实际创建时生成）"""
         name = "user_" + PasswordUtil.generate_random_password(6)
         random_password = PasswordUtil.generate_random_password(8)
-        hashed_password, salt = PasswordUtil.create_password(
+        hashed_password = await PasswordUtil.hash_password_async(
             random_password)
+        return {"name": name, "password": hashed_password}
+
+    async def create_user_default(self, phone: str) -> ApUser:
+        """创建默认用户"""
+        user = ApUser(phone=phone, **await self._default_user_fields())
+        async with self.uow:
+            return await self.repository.create(user)
 
-        user = ApUser(name=name, phone=phone, password=hashed_password, salt=salt)
-        return self.repository.create(user)
+    async def get_or_create_user(self, phone: str) -> ApUser:
+        """获取用户，不存在时自动注册（并发安全）"""
+        async with self.uow:
+            user, _ = await self.repository.get_or_create_by_phone(
+                phone, self._default_user_fields)
+        return user
 
     async def send_verification_code(self, phone: str, scene: str = "login") -> Tuple[bool, str, Optional[str]]:
         """
@@ -51,22 +80,35 @@ class UserService:
         """
         return await self.verification.verify_code(phone, code, scene)
 
-    def authenticate_by_password(self, phone: str, password: str) -> tuple[
-        Optional[ApUser], Optional[str], str]:
+    async def authenticate_by_password(self, phone: str, password: str) -> tuple[
+        Optional[Row], Optional[str], str]:
         """
         密码登录认证
 
+        只查询 id、phone、password、salt、status，不加载完整用户。
+
         Returns:
-            (用户对象, token, 错误信息)
+            (认证行, token, 错误信息)
         """
-        user = self.get_user_by_phone(phone)
+        user = await self.repository.get_auth_by_phone(phone)
         if not user:
             return None, None, "用户不存在"
 
-        if not PasswordUtil.verify_password(password, user.password,
-                                            user.salt):
+        # 哈希计算在线程池中执行，不阻塞事件循环
+        ok, new_hash = await PasswordUtil.verify_and_update_async(
+            password, user.password, user.salt)
+        if not ok:
             return None, None, "密码错误"
 
+        if user.status == UserStatus.LOCKED:
+            return None, None, "用户已锁定"
+
+        # 历史 MD5 或低成本哈希在登录成功后按主键升级
+        if new_hash:
+            async with self.uow:
+                await self.repository.update_many(
+                    [{"id": user.id, "password": new_hash}])
+
         token = JWTUtils.create_token(str(user.id))
         return user, token, ""
 
@@ -83,9 +125,7 @@ class UserService:
         if not ok:
             return None, None, msg
 
-        user = self.get_user_by_phone(phone)
-        if not user:
-            user = self.create_user_default(phone)
+        user = await self.get_or_create_user(phone)
 
         token = JWTUtils.create_token(str(user.id))
         return user, token, ""
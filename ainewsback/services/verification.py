@@ -3,29 +3,87 @@ from typing import Optional, Tuple
 import redis
 
 from ainewsback.core.config import settings
+from ainewsback.services.notification_outbox import NotificationOutbox
 from ainewsback.utils.code_generator import CodeGenerator
-from ainewsback.utils.dingtalk_robot import VerificationNotifier
+from ainewsback.utils.dingtalk_robot import SendOutcome, \
+    get_verification_notifier
+
+# 发送前检查频率限制并保存验证码（原子执行）
+# KEYS: 验证码 key, 频率限制 key, 尝试次数 key
+# ARGV: 验证码, 验证码有效期, 频率限制秒数
+# 返回: 0 表示已保存，> 0 表示需等待的秒数
+SEND_CODE_SCRIPT = """
+local ttl = redis.call('TTL', KEYS[2])
+if ttl > 0 then
+    return ttl
+end
+redis.call('SETEX', KEYS[1], ARGV[2], ARGV[1])
+redis.call('SETEX', KEYS[2], ARGV[3], '1')
+redis.call('DEL', KEYS[3])
+return 0
+"""
+
+# 校验验证码、计数失败次数、超限锁定、成功后删除（原子执行）
+# KEYS: 验证码 key, 尝试次数 key
+# ARGV: 输入验证码, 最大尝试次数, 尝试次数有效期
+# 返回: {状态, 剩余次数}
+VERIFY_CODE_SCRIPT = """
+local stored = redis.call('GET', KEYS[1])
+if not stored then
+    return {0, 0}
+end
+local attempts = tonumber(redis.call('GET', KEYS[2]) or '0')
+if attempts >= tonumber(ARGV[2]) then
+    redis.call('DEL', KEYS[1])
+    return {2, 0}
+end
+if stored ~= ARGV[1] then
+    attempts = redis.call('INCR', KEYS[2])
+    redis.call('EXPIRE', KEYS[2], ARGV[3])
+    return {3, tonumber(ARGV[2]) - attempts}
+end
+redis.call('DEL', KEYS[1], KEYS[2])
+return {1, 0}
+"""
+
+# VERIFY_CODE_SCRIPT 返回的状态
+VERIFY_NOT_FOUND = 0
+VERIFY_OK = 1
+VERIFY_LOCKED = 2
+VERIFY_MISMATCH = 3
 
 
 class VerificationService:
     """验证码服务"""
 
-    def __init__(self, redis_client: redis.Redis):
+    def __init__(self, redis_client: redis.Redis,
+                 outbox: Optional[NotificationOutbox] = None):
+        """
+        Args:
+            redis_client: Redis 客户端
+            outbox: 通知发件箱(可选,不传则同步发送钉钉通知)
+        """
         self.redis = redis_client
+        self.outbox = outbox
         self.code_generator = CodeGenerator()
-        self.notifier = VerificationNotifier()
+        self.notifier = get_verification_notifier()
+        self._send_script = self.redis.register_script(SEND_CODE_SCRIPT)
+        self._verify_script = self.redis.register_script(VERIFY_CODE_SCRIPT)
+
+    # 同一手机号的 key 以 {手机号} 为哈希标签，集群模式下落在同一 slot，
+    # 脚本才能原子地同时操作
 
     def _get_code_key(self, mobile: str, scene: str) -> str:
         """生成 Redis key"""
-        return f"verification:code:{scene}:{mobile}"
+        return f"verification:code:{scene}:{{{mobile}}}"
 
     def _get_rate_limit_key(self, mobile: str) -> str:
         """生成频率限制 key"""
-        return f"verification:rate_limit:{mobile}"
+        return f"verification:rate_limit:{{{mobile}}}"
 
     def _get_attempt_key(self, mobile: str, scene: str) -> str:
         """生成尝试次数 key"""
-        return f"verification:attempts:{scene}:{mobile}"
+        return f"verification:attempts:{scene}:{{{mobile}}}"
 
     async def check_rate_limit(self, mobile: str) -> Tuple[bool, Optional[int]]:
         """
@@ -45,31 +103,29 @@ class VerificationService:
         发送验证码
         Returns: (成功状态, 消息, 验证码)
         """
-        # 检查发送频率
-        can_send, wait_time = await self.check_rate_limit(mobile)
-        if not can_send:
-            return False, f"发送过于频繁，请 {wait_time} 秒后再试", None
-
         # 生成验证码
         code = self.code_generator.generate_numeric_code()
 
-        # 保存到 Redis
         code_key = self._get_code_key(mobile, scene)
         rate_key = self._get_rate_limit_key(mobile)
-        # 重置验证尝试次数
         attempt_key = self._get_attempt_key(mobile, scene)
 
-        async with self.redis.pipeline() as pipe:
-            # 保存验证码，设置过期时间
-            await pipe.setex(code_key, settings.CODE_EXPIRE_SECONDS, code)
-            # 设置发送频率限制
-            await pipe.setex(rate_key, settings.CODE_RATE_LIMIT, "1")
-            await pipe.delete(attempt_key)
-            await pipe.execute()
+        # 一次往返完成: 检查发送频率、保存验证码、设置频率限制、重置尝试次数
+        wait_time = int(await self._send_script(
+            keys=[code_key, rate_key, attempt_key],
+            args=[code, settings.CODE_EXPIRE_SECONDS, settings.CODE_RATE_LIMIT]
+        ))
+        if wait_time > 0:
+            return False, f"发送过于频繁，请 {wait_time} 秒后再试", None
+
+        # 入队后由后台任务发送钉钉通知，接口耗时只取决于 Redis
+        if self.outbox is not None:
+            await self.outbox.enqueue(mobile, code, scene)
+            return True, "验证码发送成功", code
 
         # 发送钉钉通知
-        success, message = await self.notifier.send_verification_code(mobile, code, scene)
-        if not success:
+        outcome, message = await self.notifier.send_verification_code(mobile, code, scene)
+        if outcome is not SendOutcome.SENT:
             return False, message, None
 
         return True, "验证码发送成功", code
@@ -83,33 +139,22 @@ class VerificationService:
         code_key = self._get_code_key(mobile, scene)
         attempt_key = self._get_attempt_key(mobile, scene)
 
-        # 检查验证码是否存在
-        stored_code = await self.redis.get(code_key)
-        if not stored_code:
-            return False, "验证码不存在或已过期"
+        # 比对、失败计数、超限锁定、成功删除在服务端原子完成，避免并发猜测绕过次数限制
+        status, remaining = await self._verify_script(
+            keys=[code_key, attempt_key],
+            args=[code, settings.MAX_VERIFY_ATTEMPTS,
+                  settings.CODE_EXPIRE_SECONDS]
+        )
+        status = int(status)
 
-        # 检查验证尝试次数
-        attempts = await self.redis.get(attempt_key)
-        current_attempts = int(attempts) if attempts else 0
+        if status == VERIFY_NOT_FOUND:
+            return False, "验证码不存在或已过期"
 
-        if current_attempts >= settings.MAX_VERIFY_ATTEMPTS:
-            # 超过最大尝试次数，删除验证码
-            await self.redis.delete(code_key)
+        if status == VERIFY_LOCKED:
             return False, "验证失败次数过多，请重新获取验证码"
 
-        # 验证码比对
-        if code != stored_code:
-            # 增加尝试次数
-            await self.redis.incr(attempt_key)
-            await self.redis.expire(attempt_key, settings.CODE_EXPIRE_SECONDS)
-            remaining = settings.MAX_VERIFY_ATTEMPTS - current_attempts - 1
-            return False, f"验证码错误，还有 {remaining} 次尝试机会"
-
-        # 验证成功，删除验证码和尝试记录
-        async with self.redis.pipeline() as pipe:
-            await pipe.delete(code_key)
-            await pipe.delete(attempt_key)
-            await pipe.execute()
+        if status == VERIFY_MISMATCH:
+            return False, f"验证码错误，还有 {int(remaining)} 次尝试机会"
 
         return True, "验证成功"
 
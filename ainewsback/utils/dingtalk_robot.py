@@ -1,26 +1,81 @@
+import asyncio
+import logging
 import time
 import hmac
 import hashlib
 import base64
 import urllib.parse
-from typing import Optional
+from enum import Enum
+from typing import List, Optional, Tuple, Union
 import httpx
+from redis.exceptions import RedisClusterException, RedisError
 from ainewsback.core.config import settings
+from ainewsback.core.http_client import AsyncHttpClient
+from ainewsback.core.metrics import registry
+from ainewsback.core.reids import get_redis
+
+logger = logging.getLogger(__name__)
+
+
+class SendOutcome(Enum):
+    """钉钉发送结果，调用方据此区分是否可以安全重试"""
+    # 钉钉已确认收到
+    SENT = "sent"
+    # 请求未发出（连接/连接池超时等）或被钉钉拒绝，可以重试
+    FAILED = "failed"
+    # 请求已发出但未收到响应（读/写超时），无法确认钉钉是否已收到
+    UNKNOWN = "unknown"
+
+
+SendResult = Tuple[SendOutcome, str]
+
+
+# Redis 令牌桶（原子执行，时间取 Redis 服务器时间，各实例时钟偏差不影响额度）
+# KEYS: 令牌桶 key
+# ARGV: 桶容量, 每秒补充的令牌数
+# 返回: 0 表示已获取令牌，> 0 表示需等待的毫秒数
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local fill_rate = tonumber(ARGV[2])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+local tokens = tonumber(state[1]) or capacity
+local updated_at = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated_at) * fill_rate)
+local wait_ms = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait_ms = math.ceil((1 - tokens) / fill_rate * 1000)
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated_at', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / fill_rate * 1000) + 1000)
+return wait_ms
+"""
+
+DINGTALK_SEND_LATENCY = registry.histogram(
+    "dingtalk_send_duration_seconds", "钉钉消息发送耗时")
+DINGTALK_SENDS = registry.counter(
+    "dingtalk_send_total", "钉钉消息发送次数（按结果）", ("result",))
 
 
 class DingTalkRobot:
     """钉钉机器人工具类"""
 
-    def __init__(self, webhook_url: str, secret: Optional[str] = None):
+    def __init__(self, webhook_url: str, secret: Optional[str] = None,
+                 client: Optional[httpx.AsyncClient] = None):
         """
         初始化钉钉机器人
 
         Args:
             webhook_url: 钉钉机器人 webhook 地址
             secret: 加签密钥(可选,推荐使用)
+            client: HTTP 客户端(可选,默认使用应用共享的连接池)
         """
         self.webhook_url = webhook_url
         self.secret = secret
+        self.client = client
 
     def _get_signed_url(self) -> str:
         """生成加签后的 URL"""
@@ -43,7 +98,7 @@ class DingTalkRobot:
         return f"{self.webhook_url}&timestamp={timestamp}&sign={sign}"
 
     async def send_text(self, content: str, at_mobiles: Optional[list] = None,
-                       at_all: bool = False) -> tuple[bool, str]:
+                       at_all: bool = False) -> SendResult:
         """
         发送文本消息
 
@@ -53,7 +108,7 @@ class DingTalkRobot:
             at_all: 是否@所有人
 
         Returns:
-            (是否成功, 消息)
+            (发送结果, 消息)
         """
         data = {
             "msgtype": "text",
@@ -70,7 +125,7 @@ class DingTalkRobot:
 
     async def send_markdown(self, title: str, text: str,
                            at_mobiles: Optional[list] = None,
-                           at_all: bool = False) -> tuple[bool, str]:
+                           at_all: bool = False) -> SendResult:
         """
         发送 Markdown 消息
 
@@ -81,7 +136,7 @@ class DingTalkRobot:
             at_all: 是否@所有人
 
         Returns:
-            (是否成功, 消息)
+            (发送结果, 消息)
         """
         data = {
             "msgtype": "markdown",
@@ -97,44 +152,216 @@ class DingTalkRobot:
 
         return await self._send_request(data)
 
-    async def _send_request(self, data: dict) -> tuple[bool, str]:
+    async def _send_request(self, data: dict) -> SendResult:
         """发送请求到钉钉"""
+        start = time.perf_counter()
+        outcome = "error"
         try:
             url = self._get_signed_url()
+            client = self.client or await AsyncHttpClient.get_client()
+
+            response = await client.post(url, json=data)
+            result = response.json()
+
+            if result.get("errcode") == 0:
+                outcome = "ok"
+                return SendOutcome.SENT, "发送成功"
+            else:
+                outcome = "rejected"
+                error_msg = result.get("errmsg", "未知错误")
+                return SendOutcome.FAILED, f"发送失败: {error_msg}"
+
+        except (httpx.ConnectTimeout, httpx.PoolTimeout) as e:
+            # 未建立连接或未取得连接池中的连接，请求尚未发出
+            outcome = "timeout"
+            return SendOutcome.FAILED, f"连接超时: {type(e).__name__}"
+        except httpx.TimeoutException:
+            outcome = "timeout"
+            return SendOutcome.UNKNOWN, "发送超时"
+        except Exception as e:
+            return SendOutcome.FAILED, f"发送异常: {str(e)}"
+        finally:
+            DINGTALK_SEND_LATENCY.labels().observe(
+                time.perf_counter() - start)
+            DINGTALK_SENDS.labels(outcome).inc()
 
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    url,
-                    json=data,
-                    headers={"Content-Type": "application/json"},
-                    timeout=10.0
-                )
 
-                result = response.json()
+class TokenBucket:
+    """令牌桶限流（钉钉自定义机器人每分钟约 20 条）"""
 
-                if result.get("errcode") == 0:
-                    return True, "发送成功"
-                else:
-                    error_msg = result.get("errmsg", "未知错误")
-                    return False, f"发送失败: {error_msg}"
+    def __init__(self, rate: int, per: float = 60.0):
+        """
+        Args:
+            rate: 每个周期允许的消息数（同时也是桶容量）
+            per: 周期秒数
+        """
+        self.capacity = float(rate)
+        self.tokens = float(rate)
+        self.fill_rate = rate / per
+        self.updated_at = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity,
+                          self.tokens + (now - self.updated_at) * self.fill_rate)
+        self.updated_at = now
+
+    def try_acquire(self) -> bool:
+        """尝试获取一个令牌"""
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def wait_time(self) -> float:
+        """距离下一个可用令牌的秒数"""
+        self._refill()
+        return max(0.0, (1 - self.tokens) / self.fill_rate)
+
+    async def reserve(self) -> float:
+        """获取一个令牌，成功返回 0，否则返回需等待的秒数"""
+        return 0.0 if self.try_acquire() else self.wait_time()
+
+
+class RedisTokenBucket:
+    """
+    Redis 令牌桶: 同一机器人的额度由所有 worker 与实例共享
+
+    Redis 不可用时退化为进程内令牌桶，额度按 SERVER_WORKERS 均分。
+    """
+
+    def __init__(self, key: str, rate: int, per: float = 60.0,
+                 redis_client=None):
+        """
+        Args:
+            key: 令牌桶 key
+            rate: 每个周期允许的消息数（同时也是桶容量）
+            per: 周期秒数
+            redis_client: Redis 客户端(可选,默认首次使用时获取应用共享的客户端)
+        """
+        self.key = key
+        self.capacity = rate
+        self.fill_rate = rate / per
+        self.redis = redis_client
+        self._script = None
+        self._fallback = TokenBucket(settings.per_worker(rate), per)
+
+    async def reserve(self) -> float:
+        """获取一个令牌，成功返回 0，否则返回需等待的秒数"""
+        try:
+            if self._script is None:
+                if self.redis is None:
+                    self.redis = await get_redis()
+                self._script = self.redis.register_script(TOKEN_BUCKET_SCRIPT)
+            wait_ms = await self._script(
+                keys=[self.key], args=[self.capacity, self.fill_rate])
+        except (RedisError, RedisClusterException) as e:
+            logger.warning(f"钉钉限流 Redis 不可用，使用进程内限流: {e}")
+            return await self._fallback.reserve()
+        return int(wait_ms) / 1000
 
-        except httpx.TimeoutException:
-            return False, "发送超时"
-        except Exception as e:
-            return False, f"发送异常: {str(e)}"
+
+Bucket = Union[TokenBucket, RedisTokenBucket]
+
+
+class RobotPool:
+    """多个钉钉机器人轮询发送，每个机器人独立限流"""
+
+    def __init__(self, robots: List[DingTalkRobot], rate: int,
+                 per: float = 60.0, shared: bool = False,
+                 redis_client=None):
+        """
+        Args:
+            robots: 机器人列表
+            rate: 每个机器人每个周期允许的消息数
+            per: 周期秒数
+            shared: 是否经 Redis 在所有 worker 间共享额度
+            redis_client: Redis 客户端(可选,shared 时默认使用应用共享的客户端)
+        """
+        self._robots: List[Tuple[DingTalkRobot, Bucket]] = [
+            (robot, self._make_bucket(robot, rate, per, shared, redis_client))
+            for robot in robots
+        ]
+        self._next = 0
+
+    @staticmethod
+    def _make_bucket(robot: DingTalkRobot, rate: int, per: float,
+                     shared: bool, redis_client) -> Bucket:
+        if not shared:
+            return TokenBucket(rate, per)
+        # webhook 地址含 access_token，key 中只保留其摘要
+        digest = hashlib.sha1(robot.webhook_url.encode("utf-8")).hexdigest()
+        return RedisTokenBucket(f"dingtalk:rate_limit:{digest[:16]}", rate,
+                                per, redis_client)
+
+    def __len__(self) -> int:
+        return len(self._robots)
+
+    @classmethod
+    def from_settings(cls) -> "RobotPool":
+        """根据配置创建（DINGTALK_ROBOTS 为空时使用单个 webhook）"""
+        configs = settings.DINGTALK_ROBOTS or [{
+            "webhook_url": settings.DINGTALK_WEBHOOK_URL,
+            "secret": settings.DINGTALK_SECRET,
+        }]
+        robots = [DingTalkRobot(webhook_url=c["webhook_url"],
+                                secret=c.get("secret")) for c in configs]
+        rate = settings.DINGTALK_RATE_LIMIT_PER_MINUTE
+        if settings.DINGTALK_RATE_LIMIT_SHARED:
+            return cls(robots, rate, shared=True)
+        # 钉钉按机器人限流，多 worker 时每个进程只能使用其中一份
+        return cls(robots, settings.per_worker(rate))
+
+    async def acquire(self) -> DingTalkRobot:
+        """获取一个有剩余额度的机器人，全部耗尽时等待"""
+        while True:
+            waits = []
+            for offset in range(len(self._robots)):
+                index = (self._next + offset) % len(self._robots)
+                robot, bucket = self._robots[index]
+                wait = await bucket.reserve()
+                if wait <= 0:
+                    self._next = index + 1
+                    return robot
+                waits.append(wait)
+            await asyncio.sleep(min(waits))
+
+
+SCENE_MAP = {
+    "login": "登录",
+    "register": "注册",
+    "reset_password": "重置密码"
+}
+
+
+def format_markdown_code(mobile: str, code: str,
+                         scene: str = "login") -> Tuple[str, str]:
+    """生成 Markdown 格式的验证码通知 (标题, 正文)"""
+    scene_text = SCENE_MAP.get(scene, "操作")
+
+    title = "验证码通知"
+    text = f"""### {title}
+> **手机号:** {mobile}  
+> **验证码:** `{code}`  
+> **场景:** {scene_text}  
+> **有效期:** {settings.CODE_EXPIRE_SECONDS // 60}分钟  
+"""
+    return title, text
 
 
 class VerificationNotifier:
     """验证码通知服务"""
 
-    def __init__(self):
-        self.robot = DingTalkRobot(
-            webhook_url=settings.DINGTALK_WEBHOOK_URL,
-            secret=settings.DINGTALK_SECRET
-        )
+    def __init__(self, robots: Optional[RobotPool] = None):
+        """
+        Args:
+            robots: 机器人池(可选,默认根据配置创建)
+        """
+        self.robots = robots or RobotPool.from_settings()
 
     async def send_verification_code(self, mobile: str, code: str,
-                                    scene: str = "login") -> tuple[bool, str]:
+                                    scene: str = "login") -> SendResult:
         """
         发送验证码通知
 
@@ -144,38 +371,111 @@ class VerificationNotifier:
             scene: 场景(login/register/reset_password)
 
         Returns:
-            (是否成功, 消息)
+            (发送结果, 消息)
         """
-        scene_map = {
-            "login": "登录",
-            "register": "注册",
-            "reset_password": "重置密码"
-        }
-
-        scene_text = scene_map.get(scene, "操作")
+        scene_text = SCENE_MAP.get(scene, "操作")
 
         # 文本消息
         content = f"【验证码通知】\n手机号: {mobile}\n验证码: {code}\n场景: {scene_text}\n有效期: {settings.CODE_EXPIRE_SECONDS // 60}分钟"
 
-        return await self.robot.send_text(content)
+        robot = await self.robots.acquire()
+        return await robot.send_text(content)
 
     async def send_markdown_code(self, mobile: str, code: str,
-                                scene: str = "login") -> tuple[bool, str]:
+                                scene: str = "login") -> SendResult:
         """发送 Markdown 格式的验证码通知"""
-        scene_map = {
-            "login": "登录",
-            "register": "注册",
-            "reset_password": "重置密码"
-        }
+        title, text = format_markdown_code(mobile, code, scene)
 
-        scene_text = scene_map.get(scene, "操作")
+        robot = await self.robots.acquire()
+        return await robot.send_markdown(title, text)
+
+    async def close(self) -> None:
+        """释放资源（合并发送模式下发送剩余消息）"""
+
+
+class CoalescingNotifier(VerificationNotifier):
+    """
+    合并发送的验证码通知服务
+
+    在短时间窗口内收集待发送的验证码，合并为一条 Markdown 消息发送，
+    配合令牌桶与多机器人轮询，避免超过钉钉每分钟的消息上限。
+    """
+
+    def __init__(self, robots: Optional[RobotPool] = None,
+                 window: Optional[float] = None,
+                 max_size: Optional[int] = None):
+        """
+        Args:
+            robots: 机器人池(可选,默认根据配置创建)
+            window: 合并窗口秒数
+            max_size: 单条消息最多包含的验证码数
+        """
+        super().__init__(robots)
+        self.window = (settings.DINGTALK_BATCH_WINDOW_SECONDS
+                       if window is None else window)
+        self.max_size = max_size or settings.DINGTALK_BATCH_MAX_SIZE
+        self._pending: List[Tuple[str, str, str, asyncio.Future]] = []
+        self._full = asyncio.Event()
+        self._flusher: Optional[asyncio.Task] = None
+        self._sending: set = set()
+
+    async def send_verification_code(self, mobile: str, code: str,
+                                    scene: str = "login") -> SendResult:
+        """加入待发送批次，等待所在批次发送完成后返回结果"""
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((mobile, code, scene, future))
+        if len(self._pending) >= self.max_size:
+            self._full.set()
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush_after_window())
+        return await future
+
+    async def _flush_after_window(self) -> None:
+        while self._pending:
+            try:
+                await asyncio.wait_for(self._full.wait(), self.window)
+            except asyncio.TimeoutError:
+                pass
+            self._full.clear()
+            batch = self._pending[:self.max_size]
+            del self._pending[:self.max_size]
+            if len(self._pending) >= self.max_size:
+                self._full.set()
+            # 发送（含等待令牌）与收集下一批并行进行
+            task = asyncio.create_task(self._send_batch(batch))
+            self._sending.add(task)
+            task.add_done_callback(self._sending.discard)
+
+    async def _send_batch(self, batch) -> None:
+        sections = [format_markdown_code(mobile, code, scene)[1]
+                    for mobile, code, scene, _ in batch]
+        title = f"验证码通知({len(batch)}条)"
+        try:
+            robot = await self.robots.acquire()
+            result = await robot.send_markdown(title, "\n".join(sections))
+        except Exception as e:
+            result = (SendOutcome.FAILED, f"发送异常: {str(e)}")
+
+        for *_, future in batch:
+            if not future.done():
+                future.set_result(result)
+
+    async def close(self) -> None:
+        """立即发送剩余消息并等待完成"""
+        self._full.set()
+        if self._flusher:
+            await self._flusher
+        if self._sending:
+            await asyncio.gather(*self._sending)
+
+
+_notifier: Optional[VerificationNotifier] = None
 
-        title = "验证码通知"
-        text = f"""### {title}
-> **手机号:** {mobile}  
-> **验证码:** `{code}`  
-> **场景:** {scene_text}  
-> **有效期:** {settings.CODE_EXPIRE_SECONDS // 60}分钟  
-"""
 
-        return await self.robot.send_markdown(title, text)
\ No newline at end of file
+def get_verification_notifier() -> VerificationNotifier:
+    """获取进程内共享的验证码通知服务（限流额度与合并批次需跨请求共享）"""
+    global _notifier
+    if _notifier is None:
+        _notifier = (CoalescingNotifier() if settings.DINGTALK_BATCH_ENABLED
+                     else VerificationNotifier())
+    return _notifier
@@ -0,0 +1,34 @@
+import json
+from typing import Any
+
+# orjson 为运行时依赖；未安装（如本地未重新安装依赖）时回退到标准库 json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default(obj: Any) -> str:
+    """无法直接序列化的对象转为字符串"""
+    return str(obj)
+
+
+def dumps_bytes(obj: Any) -> bytes:
+    """序列化为 UTF-8 JSON 字节（优先使用 orjson）"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default,
+                            option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, default=_default, ensure_ascii=False,
+                      separators=(",", ":")).encode("utf-8")
+
+
+def dumps(obj: Any) -> str:
+    """序列化为 JSON 字符串"""
+    return dumps_bytes(obj).decode("utf-8")
+
+
+def loads(data: str | bytes) -> Any:
+    """反序列化 JSON"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
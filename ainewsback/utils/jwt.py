@@ -3,6 +3,15 @@ from datetime import datetime, timedelta, timezone
 import jwt
 
 from ainewsback.core.config import settings
+from ainewsback.core.metrics import registry
+from ainewsback.utils.token_cache import VerifiedTokenCache
+
+# 已验证 Token 缓存（进程内）
+token_cache = VerifiedTokenCache(
+    max_size=settings.JWT_CACHE_MAX_SIZE if settings.JWT_CACHE_ENABLED else 0,
+    ttl=settings.JWT_CACHE_TTL_SECONDS,
+)
+registry.register_collector(token_cache.collect)
 
 
 class JWTUtils:
@@ -25,7 +34,18 @@ class JWTUtils:
 
     @staticmethod
     def verify_token(token: str) -> dict:
-        """验证JWT令牌并返回载荷"""
+        """验证JWT令牌并返回载荷（优先命中已验证缓存）"""
+        payload = token_cache.get(token)
+        if payload is not None:
+            return payload
+
+        payload = JWTUtils._decode(token)
+        token_cache.put(token, payload)
+        return payload
+
+    @staticmethod
+    def _decode(token: str) -> dict:
+        """完整验签并解析载荷"""
         try:
             payload = jwt.decode(
                 jwt=token,
@@ -1,7 +1,81 @@
+import asyncio
 import hashlib
+import hmac
+import os
 import secrets
 import string
-from typing import Tuple
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+from pwdlib import PasswordHash
+from pwdlib.exceptions import HasherNotAvailable
+from pwdlib.hashers.base import HasherProtocol
+from pwdlib.hashers.bcrypt import BcryptHasher
+
+from ainewsback.core.config import settings
+
+# 历史数据使用 MD5(密码+盐)，固定 32 位十六进制
+LEGACY_HASH_LENGTH = 32
+# bcrypt 只接受 72 字节以内的密码（bcrypt 5 对更长的输入抛出 ValueError），
+# 为使各算法行为一致，统一按 UTF-8 字节数限制
+MAX_PASSWORD_BYTES = 72
+
+
+def _argon2_hasher() -> Optional[HasherProtocol]:
+    """argon2 为可选依赖(pwdlib[argon2])，未安装时返回 None"""
+    try:
+        from pwdlib.hashers.argon2 import Argon2Hasher
+    except HasherNotAvailable:
+        return None
+    return Argon2Hasher(
+        time_cost=settings.PASSWORD_ARGON2_TIME_COST,
+        memory_cost=settings.PASSWORD_ARGON2_MEMORY_COST,
+        parallelism=settings.PASSWORD_ARGON2_PARALLELISM,
+    )
+
+
+@lru_cache
+def get_password_hash() -> PasswordHash:
+    """
+    根据配置创建密码哈希器
+
+    第一个哈希器用于生成新哈希，其余仅用于验证已有哈希（验证后自动升级）。
+    """
+    bcrypt = BcryptHasher(rounds=settings.PASSWORD_BCRYPT_ROUNDS)
+    argon2 = _argon2_hasher()
+
+    if settings.PASSWORD_HASH_SCHEME == "argon2":
+        if argon2 is None:
+            raise RuntimeError("PASSWORD_HASH_SCHEME=argon2 需要安装 pwdlib[argon2]")
+        hashers: List[HasherProtocol] = [argon2, bcrypt]
+    else:
+        hashers = [bcrypt] + ([argon2] if argon2 else [])
+    return PasswordHash(hashers)
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_hash_executor() -> ThreadPoolExecutor:
+    """密码哈希线程池（bcrypt/argon2 计算时释放 GIL，不阻塞事件循环）"""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            # 未指定时按 worker 进程均分 CPU 核数
+            max_workers=settings.PASSWORD_HASH_WORKERS
+            or settings.per_worker(os.cpu_count() or 1),
+            thread_name_prefix="password-hash",
+        )
+    return _executor
+
+
+def shutdown_hash_executor() -> None:
+    """关闭密码哈希线程池"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
 
 
 class PasswordUtil:
@@ -19,12 +93,12 @@ class PasswordUtil:
             十六进制格式的盐值字符串
         """
 
-        return secrets.token_hex(length // 2)  # 每个字节对应两个十六进制字符
+        return secrets.token_hex(length)  # 每个字节对应两个十六进制字符
 
     @staticmethod
-    def hash_password(password: str, salt: str) -> str:
+    def hash_legacy_password(password: str, salt: str) -> str:
         """
-        使用盐值对密码进行哈希加密
+        使用盐值对密码进行 MD5 哈希（仅用于验证历史数据）
 
         Args:
             password: 原始密码
@@ -35,45 +109,111 @@ class PasswordUtil:
         """
 
         # 将密码和盐值组合
-        salted_password = f"{password}{salt}"
+        salted_password = f"{password}{salt or ''}"
         # 使用MD5进行哈希
-        hashed = hashlib.md5(salted_password.encode('utf-8')).hexdigest()
-        return hashed
+        return hashlib.md5(salted_password.encode('utf-8')).hexdigest()
 
     @staticmethod
-    def create_password(password: str) -> Tuple[str, str]:
+    def is_legacy_hash(hashed_password: str) -> bool:
+        """判断是否为历史 MD5 哈希"""
+        return (len(hashed_password) == LEGACY_HASH_LENGTH
+                and not hashed_password.startswith("$"))
+
+    @staticmethod
+    def is_too_long(password: str) -> bool:
+        """密码是否超过 MAX_PASSWORD_BYTES 字节"""
+        return len(password.encode("utf-8")) > MAX_PASSWORD_BYTES
+
+    @staticmethod
+    def hash_password(password: str) -> str:
         """
-        创建加密密码(生成盐值并加密)
+        使用配置的算法(bcrypt/argon2)加密密码，盐值包含在结果中
 
         Args:
             password: 原始密码
 
         Returns:
-            (加密后的密码, 盐值)
+            加密后的密码
+
+        Raises:
+            ValueError: 密码超过 MAX_PASSWORD_BYTES 字节
+        """
+
+        if PasswordUtil.is_too_long(password):
+            raise ValueError(f"密码不能超过 {MAX_PASSWORD_BYTES} 字节")
+        return get_password_hash().hash(password)
+
+    @staticmethod
+    def verify_and_update(plain_password: str, hashed_password: str,
+                          salt: Optional[str] = None) -> Tuple[
+        bool, Optional[str]]:
+        """
+        验证密码，并在需要升级时返回新哈希
+
+        Args:
+            plain_password: 用户输入的明文密码
+            hashed_password: 数据库中存储的加密密码
+            salt: 数据库中存储的盐值(仅历史 MD5 哈希使用)
+
+        Returns:
+            (密码是否匹配, 新哈希)，新哈希为 None 表示无需升级
         """
 
-        salt = PasswordUtil.generate_salt()
-        hashed_password = PasswordUtil.hash_password(password, salt)
-        return hashed_password, salt
+        # 超长密码无法设置，也无法升级为 bcrypt，一律视为不匹配
+        if not hashed_password or PasswordUtil.is_too_long(plain_password):
+            return False, None
+
+        if PasswordUtil.is_legacy_hash(hashed_password):
+            input_hashed = PasswordUtil.hash_legacy_password(plain_password,
+                                                             salt)
+            if not hmac.compare_digest(input_hashed, hashed_password):
+                return False, None
+            return True, PasswordUtil.hash_password(plain_password)
+
+        return get_password_hash().verify_and_update(plain_password,
+                                                     hashed_password)
 
     @staticmethod
-    def verify_password(plain_password: str, hashed_password: str, salt: str) -> bool:
+    def verify_password(plain_password: str, hashed_password: str,
+                        salt: Optional[str] = None) -> bool:
         """
         验证密码是否正确
 
         Args:
             plain_password: 用户输入的明文密码
             hashed_password: 数据库中存储的加密密码
-            salt: 数据库中存储的盐值
+            salt: 数据库中存储的盐值(仅历史 MD5 哈希使用)
 
         Returns:
             密码是否匹配
         """
 
-        # 使用相同的盐值对输入密码进行哈希
-        input_hashed = PasswordUtil.hash_password(plain_password, salt)
-        # 比较哈希值
-        return input_hashed == hashed_password
+        if not hashed_password or PasswordUtil.is_too_long(plain_password):
+            return False
+
+        if PasswordUtil.is_legacy_hash(hashed_password):
+            input_hashed = PasswordUtil.hash_legacy_password(plain_password,
+                                                             salt)
+            return hmac.compare_digest(input_hashed, hashed_password)
+
+        return get_password_hash().verify(plain_password, hashed_password)
+
+    @staticmethod
+    async def hash_password_async(password: str) -> str:
+        """在线程池中加密密码"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(get_hash_executor(),
+                                          PasswordUtil.hash_password, password)
+
+    @staticmethod
+    async def verify_and_update_async(
+            plain_password: str, hashed_password: str,
+            salt: Optional[str] = None) -> Tuple[bool, Optional[str]]:
+        """在线程池中验证密码，返回 (是否匹配, 新哈希)"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            get_hash_executor(), PasswordUtil.verify_and_update,
+            plain_password, hashed_password, salt)
 
     @staticmethod
     def generate_random_password(length: int = 8) -> str:
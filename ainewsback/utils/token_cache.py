@@ -0,0 +1,98 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+
+from ainewsback.core.metrics import CollectedMetric, Sample
+
+
+class VerifiedTokenCache:
+    """
+    已验证 JWT 的进程内缓存
+
+    以 Token 的 SHA-256 摘要为键，缓存验签后的载荷；
+    条目最晚在 Token 的 exp 时过期，超出容量时按 LRU 淘汰。
+    缓存只保存验签结果，不支持吊销（需要吊销时应在 Redis 中维护黑名单，
+    使所有 worker 一致）。
+    """
+
+    def __init__(self, max_size: int = 10000, ttl: float = 300.0):
+        """
+        Args:
+            max_size: 最大缓存条目数
+            ttl: 条目最长存活秒数（不超过 Token 的 exp）
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[bytes, Tuple[dict, float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode("utf-8")).digest()
+
+    def get(self, token: str) -> Optional[dict]:
+        """获取缓存的载荷，未命中或过期返回 None"""
+        key = self._key(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        payload, expires_at = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return dict(payload)
+
+    def put(self, token: str, payload: dict) -> None:
+        """缓存验签通过的载荷"""
+        if self.max_size <= 0:
+            return
+        now = time.time()
+        expires_at = min(float(payload.get("exp", now)), now + self.ttl)
+        if expires_at <= now:
+            return
+
+        key = self._key(token)
+        self._entries[key] = (dict(payload), expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """清空缓存"""
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, object]:
+        """命中统计"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+    def collect(self) -> Iterable[CollectedMetric]:
+        """导出 Prometheus 指标（注册为采集器）"""
+        for name, help_text, kind, value in (
+                ("jwt_cache_hits_total", "JWT 缓存命中次数", "counter",
+                 self.hits),
+                ("jwt_cache_misses_total", "JWT 缓存未命中次数", "counter",
+                 self.misses),
+                ("jwt_cache_evictions_total", "JWT 缓存淘汰次数", "counter",
+                 self.evictions),
+                ("jwt_cache_size", "JWT 缓存条目数", "gauge",
+                 len(self._entries)),
+        ):
+            yield CollectedMetric(name, help_text, kind, [Sample({}, value)])
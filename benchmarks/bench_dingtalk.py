@@ -0,0 +1,67 @@
+"""
+钉钉发送基准: 每条消息新建客户端 vs 应用共享连接池
+
+对本地 webhook 替身发送突发消息，输出延迟分布与建立的 TCP 连接数。
+
+用法:
+    python -m benchmarks.bench_dingtalk -n 500 -c 50 --delay 0.005
+"""
+import argparse
+import asyncio
+
+import httpx
+
+from ainewsback.utils.dingtalk_robot import DingTalkRobot, SendOutcome
+from benchmarks.common import run_concurrent
+from tests.fake_dingtalk import FakeDingTalkServer
+
+
+async def bench_per_message_client(url: str, total: int, concurrency: int):
+    """旧行为: 每条消息新建 AsyncClient"""
+
+    async def send(i: int) -> bool:
+        async with httpx.AsyncClient() as client:
+            outcome, _ = await DingTalkRobot(url, "secret", client).send_text(
+                f"msg {i}")
+        return outcome is SendOutcome.SENT
+
+    return await run_concurrent("per-message client", send, total,
+                                concurrency)
+
+
+async def bench_shared_client(url: str, total: int, concurrency: int,
+                              max_connections: int):
+    """新行为: 共享连接池"""
+    limits = httpx.Limits(max_connections=max_connections)
+    async with httpx.AsyncClient(limits=limits) as client:
+        robot = DingTalkRobot(url, "secret", client)
+
+        async def send(i: int) -> bool:
+            outcome, _ = await robot.send_text(f"msg {i}")
+            return outcome is SendOutcome.SENT
+
+        return await run_concurrent(
+            f"shared pool (max={max_connections})", send, total, concurrency)
+
+
+def main(args):
+    with FakeDingTalkServer(delay=args.delay) as server:
+        report = asyncio.run(bench_per_message_client(
+            server.url, args.requests, args.concurrency))
+        print(report, f" connections={len(server.connections)}")
+
+    with FakeDingTalkServer(delay=args.delay) as server:
+        report = asyncio.run(bench_shared_client(
+            server.url, args.requests, args.concurrency,
+            args.max_connections))
+        print(report, f" connections={len(server.connections)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--requests", type=int, default=500)
+    parser.add_argument("-c", "--concurrency", type=int, default=50)
+    parser.add_argument("--delay", type=float, default=0.005,
+                        help="webhook 替身的模拟处理耗时(秒)")
+    parser.add_argument("--max-connections", type=int, default=10)
+    main(parser.parse_args())
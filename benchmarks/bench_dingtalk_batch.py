@@ -0,0 +1,75 @@
+"""
+钉钉验证码投递吞吐量: 逐条发送 vs 合并发送
+
+机器人按每分钟 rate 条限流。为缩短运行时间，限流周期按 --time-scale 压缩
+（例如 60 表示 1 秒模拟 1 分钟），结果换算回每分钟可投递的验证码数。
+
+用法:
+    python -m benchmarks.bench_dingtalk_batch --codes 2000 --robots 1 2 3
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from ainewsback.utils.dingtalk_robot import CoalescingNotifier, \
+    DingTalkRobot, RobotPool, SendOutcome, VerificationNotifier
+from tests.fake_dingtalk import FakeDingTalkServer
+
+
+async def deliver(notifier: VerificationNotifier, codes: int) -> float:
+    """并发投递 codes 个验证码，返回耗时（秒）"""
+    start = time.perf_counter()
+    results = await asyncio.gather(*(
+        notifier.send_verification_code(f"138{i:08d}", f"{i % 1000000:06d}")
+        for i in range(codes)))
+    await notifier.close()
+    failed = [msg for outcome, msg in results
+              if outcome is not SendOutcome.SENT]
+    assert not failed, failed[:3]
+    return time.perf_counter() - start
+
+
+async def run(urls, args, batch: bool):
+    per = 60.0 / args.time_scale
+    async with httpx.AsyncClient() as client:
+        pool = RobotPool([DingTalkRobot(url, client=client) for url in urls],
+                         rate=args.rate, per=per)
+        if batch:
+            notifier = CoalescingNotifier(pool, window=args.window / args.time_scale,
+                                          max_size=args.batch_size)
+        else:
+            notifier = VerificationNotifier(pool)
+        elapsed = await deliver(notifier, args.codes)
+    simulated_minutes = elapsed * args.time_scale / 60
+    return args.codes / simulated_minutes
+
+
+def main(args):
+    for robots in args.robots:
+        servers = [FakeDingTalkServer().start() for _ in range(robots)]
+        try:
+            urls = [server.url for server in servers]
+            single = asyncio.run(run(urls, args, batch=False))
+            batched = asyncio.run(run(urls, args, batch=True))
+            messages = sum(len(server.messages) for server in servers)
+        finally:
+            for server in servers:
+                server.stop()
+        print(f"robots={robots}  per-code: {single:>8.0f} codes/min   "
+              f"batched(max={args.batch_size}): {batched:>8.0f} codes/min   "
+              f"webhook messages={messages}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--codes", type=int, default=2000)
+    parser.add_argument("--robots", type=int, nargs="+", default=[1, 2, 3])
+    parser.add_argument("--rate", type=int, default=20,
+                        help="每个机器人每分钟消息上限")
+    parser.add_argument("--batch-size", type=int, default=20)
+    parser.add_argument("--window", type=float, default=2.0,
+                        help="合并窗口(秒,按真实时间)")
+    parser.add_argument("--time-scale", type=float, default=60.0)
+    main(parser.parse_args())
@@ -0,0 +1,67 @@
+"""
+JSON 日志格式化器微基准: python-json-logger 旧实现 vs CustomJsonFormatter
+
+用法:
+    python -m benchmarks.bench_log_formatter -n 100000
+"""
+import argparse
+import logging
+from datetime import UTC, datetime
+
+from pythonjsonlogger.json import JsonFormatter
+
+from ainewsback.core.config import settings
+from ainewsback.core.logger import CustomJsonFormatter
+from benchmarks.common import bench_sync
+
+
+class LegacyJsonFormatter(JsonFormatter):
+    """改造前的实现（每条日志读取配置并调用 datetime.now）"""
+
+    def add_fields(self, log_record, record, message_dict):
+        super().add_fields(log_record, record, message_dict)
+        log_record['timestamp'] = datetime.now(UTC).isoformat()
+        log_record['level'] = record.levelname
+        log_record['logger'] = record.name
+        log_record['module'] = record.module
+        log_record['function'] = record.funcName
+        log_record['line'] = record.lineno
+        log_record['env'] = settings.APP_ENV
+        log_record['app'] = settings.APP_NAME
+        log_record['version'] = settings.APP_VERSION
+
+
+def make_record() -> logging.LogRecord:
+    """模拟 RequestPipelineMiddleware 的请求完成日志"""
+    record = logging.LogRecord(
+        "ainewsback.middleware.request_pipeline", logging.INFO, __file__, 120,
+        "请求完成", (), None)
+    record.__dict__.update({
+        "request_id": "0f8fad5b-d9cb-469f-a165-70867728950e",
+        "method": "POST",
+        "url": "http://127.0.0.1:8080/user/api/v1/login/login_auth",
+        "status_code": 200,
+        "process_time": "0.012s",
+        "client_host": "127.0.0.1",
+    })
+    return record
+
+
+def main(args):
+    record = make_record()
+    formatters = {
+        "python-json-logger (legacy)": LegacyJsonFormatter(
+            '%(timestamp)s %(level)s %(name)s %(message)s'),
+        "CustomJsonFormatter": CustomJsonFormatter(),
+    }
+    for name, formatter in formatters.items():
+        report = bench_sync(name, lambda: formatter.format(record),
+                            args.iterations)
+        print(f"{name:<32} {report.rps:>10.0f} records/s  "
+              f"mean={report.extra['mean'] * 1000:.2f}us")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--iterations", type=int, default=100000)
+    main(parser.parse_args())
@@ -0,0 +1,76 @@
+"""
+开启文件日志时的请求吞吐: 同步 handler vs 队列 + 后台线程
+
+每个请求经过 RequestPipelineMiddleware 输出两条日志，
+日志文件写入临时目录，轮转阈值调小以包含轮转开销。
+
+用法:
+    python -m benchmarks.bench_logging -n 5000 -c 20
+"""
+import argparse
+import asyncio
+import logging
+import tempfile
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from ainewsback.core.config import settings
+from ainewsback.core.logger import get_logging_stats, setup_logging, \
+    shutdown_logging
+from ainewsback.middleware import RequestPipelineMiddleware
+from benchmarks.common import run_concurrent
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(RequestPipelineMiddleware)
+
+    @app.get("/")
+    async def root():
+        return {"message": "Hello World"}
+
+    return app
+
+
+async def bench(name: str, total: int, concurrency: int):
+    transport = httpx.ASGITransport(app=build_app())
+    async with httpx.AsyncClient(transport=transport,
+                                 base_url="http://bench") as client:
+        async def call(_: int) -> bool:
+            return (await client.get("/")).status_code == 200
+
+        await run_concurrent("warmup", call, 200, concurrency)
+        return await run_concurrent(name, call, total, concurrency)
+
+
+def main(args):
+    for queue_enabled in (False, True):
+        with tempfile.TemporaryDirectory() as log_dir:
+            settings.LOG_FILE_PATH = log_dir
+            settings.ACCESS_LOG_PATH = f"{log_dir}/access.log"
+            settings.LOG_TO_CONSOLE = False
+            settings.LOG_TO_FILE = True
+            settings.LOG_LEVEL = "info"
+            settings.LOG_FILE_MAX_BYTES = args.max_bytes
+            settings.LOG_QUEUE_ENABLED = queue_enabled
+            setup_logging()
+
+            name = "queue handler" if queue_enabled else "direct handler"
+            report = asyncio.run(bench(name, args.requests, args.concurrency))
+            stats = get_logging_stats()
+            start = time.perf_counter()
+            shutdown_logging()
+            logging.getLogger().handlers.clear()
+            print(report, f" dropped={stats['dropped']}"
+                          f" drain={time.perf_counter() - start:.3f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--requests", type=int, default=5000)
+    parser.add_argument("-c", "--concurrency", type=int, default=20)
+    parser.add_argument("--max-bytes", type=int, default=1024 * 1024,
+                        help="日志轮转阈值(字节)")
+    main(parser.parse_args())
@@ -0,0 +1,81 @@
+"""
+热点函数微基准: JWTUtils / PasswordUtil / CodeGenerator / 响应序列化
+
+每项输出单次调用平均耗时，可保存为 JSON 供 benchmarks.compare 对比。
+
+用法:
+    python -m benchmarks.bench_micro -n 20000 --output benchmarks/results/micro.json
+"""
+import argparse
+import os
+
+os.environ.setdefault("SECRET_KEY", "bench-secret-key-with-at-least-32-chars")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
+os.environ.setdefault("CURRENT_ISSUER", "ainews-bench")
+os.environ.setdefault("TOKEN_AUDIENCE", '["ainews-bench"]')
+os.environ.setdefault("ACCESS_TOKEN_ISSUER", '["ainews-bench"]')
+os.environ.setdefault("CODE_LENGTH", "6")
+
+from ainewsback.core.responses import FastJSONResponse  # noqa: E402
+from ainewsback.utils.code_generator import CodeGenerator  # noqa: E402
+from ainewsback.utils.jwt import JWTUtils  # noqa: E402
+from ainewsback.utils.password import PasswordUtil  # noqa: E402
+from benchmarks.bench_response import payloads  # noqa: E402
+from benchmarks.common import bench_sync, save_results  # noqa: E402
+
+PASSWORD = "bench-password-123"
+
+
+def cases(iterations: int, hash_iterations: int):
+    """(名称, 函数, 次数)"""
+    token = JWTUtils.create_token("1")
+    hashed = PasswordUtil.hash_password(PASSWORD)
+    legacy_salt = PasswordUtil.generate_salt()
+    legacy = PasswordUtil.hash_legacy_password(PASSWORD, legacy_salt)
+
+    yield "JWTUtils.create_token", lambda: JWTUtils.create_token("1"), \
+        iterations
+    yield "JWTUtils.verify_token (cached)", \
+        lambda: JWTUtils.verify_token(token), iterations
+    yield "JWTUtils._decode (uncached)", \
+        lambda: JWTUtils._decode(token), iterations
+    yield "PasswordUtil.hash_password", \
+        lambda: PasswordUtil.hash_password(PASSWORD), hash_iterations
+    yield "PasswordUtil.verify_password", \
+        lambda: PasswordUtil.verify_password(PASSWORD, hashed), \
+        hash_iterations
+    yield "PasswordUtil.verify (legacy md5)", \
+        lambda: PasswordUtil.verify_password(PASSWORD, legacy, legacy_salt), \
+        iterations
+    yield "CodeGenerator.generate_numeric_code", \
+        CodeGenerator.generate_numeric_code, iterations
+    for name, payload in payloads().items():
+        yield f"FastJSONResponse {name}", \
+            lambda payload=payload: FastJSONResponse(payload), iterations
+
+
+def main(args):
+    reports = []
+    for name, func, iterations in cases(args.iterations,
+                                        args.hash_iterations):
+        func()  # 预热
+        report = bench_sync(name, func, iterations)
+        reports.append(report)
+        print(f"{name:<40} {report.extra['mean'] * 1000:>10.2f}us/op  "
+              f"p99={report.p99 * 1000:>10.2f}us")
+    if args.output:
+        path = save_results(args.output, "micro", reports, {
+            "iterations": args.iterations,
+            "hash_iterations": args.hash_iterations,
+        })
+        print(f"结果已保存: {path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--iterations", type=int, default=20000)
+    parser.add_argument("--hash-iterations", type=int, default=20,
+                        help="bcrypt/argon2 哈希与验证的次数")
+    parser.add_argument("--output", help="结果 JSON 路径")
+    main(parser.parse_args())
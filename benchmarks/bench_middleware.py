@@ -0,0 +1,80 @@
+"""
+中间件微基准: BaseHTTPMiddleware 组合 vs 纯 ASGI 管道
+
+在进程内通过 ASGI 直接驱动应用（不经过网络），
+对比 `/` 与需认证路由的 requests/sec。
+
+用法:
+    python -m benchmarks.bench_middleware -n 5000 -c 20
+"""
+import argparse
+import asyncio
+import os
+
+os.environ.setdefault("SECRET_KEY", "bench-secret-key-with-at-least-32-chars")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
+os.environ.setdefault("CURRENT_ISSUER", "ainews-bench")
+os.environ.setdefault("TOKEN_AUDIENCE", '["ainews-bench"]')
+os.environ.setdefault("ACCESS_TOKEN_ISSUER", '["ainews-bench"]')
+
+import httpx  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+
+from ainewsback.middleware import AuthMiddleware, \
+    RequestPipelineMiddleware  # noqa: E402
+from ainewsback.middleware.logging_middleware import \
+    LoggingMiddleware  # noqa: E402
+from ainewsback.utils.jwt import JWTUtils  # noqa: E402
+from benchmarks.common import run_concurrent  # noqa: E402
+
+
+def build_app(stack: str) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/")
+    async def root():
+        return {"message": "Hello World"}
+
+    @app.get("/private")
+    async def private():
+        return {"message": "ok"}
+
+    if stack == "legacy":
+        app.add_middleware(AuthMiddleware)
+        app.add_middleware(LoggingMiddleware)
+    else:
+        app.add_middleware(RequestPipelineMiddleware)
+    return app
+
+
+async def bench_stack(stack: str, total: int, concurrency: int):
+    token = JWTUtils.create_token("1")
+    auth = {"Authorization": f"Bearer {token}"}
+    transport = httpx.ASGITransport(app=build_app(stack))
+    async with httpx.AsyncClient(transport=transport,
+                                 base_url="http://bench") as client:
+        async def root(_: int) -> bool:
+            return (await client.get("/")).status_code == 200
+
+        async def private(_: int) -> bool:
+            return (await client.get("/private", headers=auth)
+                    ).status_code == 200
+
+        await run_concurrent("warmup", root, 200, concurrency)
+        print(await run_concurrent(f"{stack:<8} GET /", root, total,
+                                   concurrency))
+        print(await run_concurrent(f"{stack:<8} GET /private", private, total,
+                                   concurrency))
+
+
+async def main(args):
+    for stack in ("legacy", "pipeline"):
+        await bench_stack(stack, args.requests, args.concurrency)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--requests", type=int, default=5000)
+    parser.add_argument("-c", "--concurrency", type=int, default=20)
+    asyncio.run(main(parser.parse_args()))
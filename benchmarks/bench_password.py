@@ -0,0 +1,107 @@
+"""
+密码验证吞吐与事件循环阻塞: 不同哈希成本 / 内联 vs 线程池
+
+1. 每种成本下单核验证吞吐（次/秒），即单核登录上限
+2. 并发登录时事件循环心跳延迟: 内联验证 vs 线程池验证
+
+用法:
+    python -m benchmarks.bench_password -n 20 -c 8
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from pwdlib import PasswordHash
+from pwdlib.hashers.bcrypt import BcryptHasher
+
+from ainewsback.core.config import settings
+from ainewsback.utils import password as password_module
+from ainewsback.utils.password import PasswordUtil, _argon2_hasher
+from benchmarks.common import bench_sync, build_report
+
+PASSWORD = "bench-password-123"
+
+
+def cost_variants():
+    """待测的哈希器及成本"""
+    for rounds in (10, 11, 12):
+        yield f"bcrypt rounds={rounds}", BcryptHasher(rounds=rounds)
+    if _argon2_hasher() is None:
+        print("argon2 未安装(pwdlib[argon2])，跳过")
+        return
+    from pwdlib.hashers.argon2 import Argon2Hasher
+    for time_cost, memory_cost in ((2, 19456), (3, 65536)):
+        yield (f"argon2 t={time_cost} m={memory_cost // 1024}MiB",
+               Argon2Hasher(time_cost=time_cost, memory_cost=memory_cost,
+                            parallelism=1))
+
+
+async def measure_loop_lag(name: str, verify, total: int,
+                           concurrency: int):
+    """并发执行 verify，同时每 1ms 打一次心跳统计事件循环延迟"""
+    lags = []
+    running = True
+
+    async def heartbeat():
+        while running:
+            start = time.perf_counter()
+            await asyncio.sleep(0.001)
+            lags.append(time.perf_counter() - start - 0.001)
+
+    counter = iter(range(total))
+
+    async def worker():
+        for _ in counter:
+            await verify()
+
+    probe = asyncio.create_task(heartbeat())
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    running = False
+    await probe
+    report = build_report(f"{name} loop lag", lags, 0, elapsed)
+    print(report, f" logins/s={total / elapsed:.1f}")
+
+
+def main(args):
+    print(f"cpu={os.cpu_count()}")
+    for name, hasher in cost_variants():
+        hashed = hasher.hash(PASSWORD)
+        report = bench_sync(name, lambda: hasher.verify(PASSWORD, hashed),
+                            args.iterations)
+        print(f"{name:<32} verify={report.extra['mean']:>7.2f}ms  "
+              f"per-core={1000 / report.extra['mean']:>7.1f}/s")
+
+    settings.PASSWORD_HASH_SCHEME = "bcrypt"
+    settings.PASSWORD_BCRYPT_ROUNDS = args.rounds
+    settings.PASSWORD_HASH_WORKERS = args.workers
+    password_module.get_password_hash.cache_clear()
+    hashed = PasswordUtil.hash_password(PASSWORD)
+    hasher: PasswordHash = password_module.get_password_hash()
+
+    async def inline():
+        hasher.verify_and_update(PASSWORD, hashed)
+
+    async def offloaded():
+        await PasswordUtil.verify_and_update_async(PASSWORD, hashed)
+
+    asyncio.run(measure_loop_lag("inline", inline, args.requests,
+                                 args.concurrency))
+    asyncio.run(measure_loop_lag("executor", offloaded, args.requests,
+                                 args.concurrency))
+    password_module.shutdown_hash_executor()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-i", "--iterations", type=int, default=10,
+                        help="每种成本的验证次数")
+    parser.add_argument("-n", "--requests", type=int, default=20)
+    parser.add_argument("-c", "--concurrency", type=int, default=8)
+    parser.add_argument("--rounds", type=int, default=12,
+                        help="线程池对比使用的 bcrypt rounds")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="线程池大小，0 为 CPU 核数")
+    main(parser.parse_args())
@@ -0,0 +1,64 @@
+"""
+响应序列化微基准: jsonable_encoder + JSONResponse vs FastJSONResponse
+
+1. 登录响应与 20 条用户分页的单次序列化耗时
+2. 401 响应: 每次 model_dump + JSONResponse vs 预渲染 PrebuiltResponse
+
+用法:
+    python -m benchmarks.bench_response -n 20000
+"""
+import argparse
+from datetime import datetime
+
+from fastapi.encoders import jsonable_encoder
+from starlette.responses import JSONResponse
+
+from ainewsback.core.responses import FastJSONResponse, PrebuiltResponse
+from ainewsback.schemas.base import CursorPage, resp, resp_200
+from ainewsback.schemas.user import LoginAuthResponse, UserPublic, UserRead
+from benchmarks.common import bench_sync
+
+
+def payloads():
+    """待测的响应体"""
+    login = resp_200(LoginAuthResponse(
+        user=UserRead(id=1, phone="13800000000"), token="x" * 180))
+    page = resp_200(CursorPage[UserPublic](
+        items=[UserPublic(id=i, name=f"user_{i}", image=f"/img/{i}.png",
+                          created_time=datetime(2025, 1, 1, 8, i % 60))
+               for i in range(20)],
+        next_cursor="WzIwXQ"))
+    return {"login": login, "page(20)": page}
+
+
+def main(args):
+    for name, payload in payloads().items():
+        baseline = bench_sync(
+            f"{name} jsonable_encoder",
+            lambda: JSONResponse(jsonable_encoder(payload)), args.iterations)
+        fast = bench_sync(f"{name} FastJSONResponse",
+                          lambda: FastJSONResponse(payload), args.iterations)
+        for report in (baseline, fast):
+            print(f"{report.name:<36} {report.extra['mean'] * 1000:>8.2f}us"
+                  f"/response")
+
+    prebuilt = PrebuiltResponse(resp(code=401, message="未授权"),
+                                status_code=401)
+    reports = [
+        bench_sync("401 model_dump + JSONResponse",
+                   lambda: JSONResponse(
+                       status_code=401,
+                       content=resp(code=401, message="未授权").model_dump()),
+                   args.iterations),
+        bench_sync("401 PrebuiltResponse", lambda: prebuilt,
+                   args.iterations),
+    ]
+    for report in reports:
+        print(f"{report.name:<36} {report.extra['mean'] * 1000:>8.2f}us"
+              f"/response")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--iterations", type=int, default=20000)
+    main(parser.parse_args())
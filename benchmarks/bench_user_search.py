@@ -0,0 +1,95 @@
+"""
+用户查询基准: 手机号等值 / 手机号前缀 / 用户名包含
+
+需先用 benchmarks.gen_users 导入数据。每类查询分别在
+默认计划（走索引）与禁用索引扫描（模拟旧的顺序扫描）下运行，
+并打印一条 EXPLAIN ANALYZE 便于确认命中的索引。
+
+用法:
+    python -m benchmarks.bench_user_search -n 500 -c 10
+"""
+import argparse
+import asyncio
+import random
+
+from sqlalchemy import text
+
+from ainewsback.core.database import dispose_engines, \
+    get_async_session_factory
+from ainewsback.models.user import ApUser
+from ainewsback.repositories.user_repository import AsyncUserRepository, \
+    build_search_statement
+from benchmarks.common import run_concurrent
+from benchmarks.gen_users import PHONE_BASE, SYLLABLES
+
+# 禁用索引，得到改造前的顺序扫描基线
+SEQSCAN_SETTINGS = ("SET LOCAL enable_indexscan = off",
+                    "SET LOCAL enable_bitmapscan = off",
+                    "SET LOCAL enable_indexonlyscan = off")
+
+
+def keyword_sets(users: int, rng: random.Random):
+    phones = [str(PHONE_BASE + rng.randrange(users)) for _ in range(200)]
+    return {
+        "phone exact": ("get_by_phone", phones),
+        "phone prefix": ("search", [p[:7] for p in phones]),
+        "name contains": ("search", [rng.choice(SYLLABLES) + rng.choice(
+            SYLLABLES) for _ in range(200)]),
+    }
+
+
+async def query(kind: str, keyword: str, seqscan: bool) -> bool:
+    async with get_async_session_factory()() as session:
+        if seqscan:
+            for statement in SEQSCAN_SETTINGS:
+                await session.exec(text(statement))
+        repo = AsyncUserRepository(ApUser, session)
+        if kind == "get_by_phone":
+            return await repo.get_by_phone(keyword) is not None
+        await repo.search_users(keyword, limit=20)
+        return True
+
+
+async def explain(keyword: str):
+    statement = build_search_statement(keyword, 0, 20, "postgresql")
+    async with get_async_session_factory()() as session:
+        compiled = statement.compile(
+            dialect=session.get_bind().dialect,
+            compile_kwargs={"literal_binds": True})
+        rows = await session.exec(
+            text(f"EXPLAIN (ANALYZE, COSTS OFF) {compiled}"))
+        print(f"-- EXPLAIN search_users({keyword!r})")
+        for (line,) in rows:
+            print(line)
+
+
+async def main(args):
+    rng = random.Random(args.seed)
+    try:
+        for name, (kind, keywords) in keyword_sets(args.users, rng).items():
+            for seqscan in (True, False) if args.baseline else (False,):
+                label = f"{name} ({'seqscan' if seqscan else 'index'})"
+                report = await run_concurrent(
+                    label,
+                    lambda i: query(kind, keywords[i % len(keywords)],
+                                    seqscan),
+                    args.requests if not seqscan else args.baseline_requests,
+                    args.concurrency)
+                print(report)
+        await explain(str(PHONE_BASE)[:7])
+        await explain("zhang")
+    finally:
+        await dispose_engines()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--requests", type=int, default=500)
+    parser.add_argument("-c", "--concurrency", type=int, default=10)
+    parser.add_argument("--users", type=int, default=1_000_000,
+                        help="gen_users 导入的用户数")
+    parser.add_argument("--no-baseline", dest="baseline",
+                        action="store_false", help="跳过顺序扫描基线")
+    parser.add_argument("--baseline-requests", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=7)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,121 @@
+"""
+worker 进程数扩展性压测
+
+依次以不同 worker 数启动 `ainewsback serve`（独立子进程），对每次启动运行
+benchmarks.e2e 的认证流程，最后按用例输出各 worker 数的 RPS 与相对 1 个
+worker 的倍数。压测客户端与服务在同一台机器时会占用部分 CPU，
+worker 数不宜超过 CPU 核数减一。
+
+用法:
+    docker compose -f docker-compose.bench.yml up -d
+    python -m benchmarks.bench_workers --workers 1 2 4 -n 2000 -c 100 \\
+        --output benchmarks/results/workers.json
+"""
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+import httpx
+
+from benchmarks.common import LatencyReport, save_results
+from benchmarks.e2e import build_parser, configure_env, run_suite, \
+    seed_password_user
+from tests.fake_dingtalk import FakeDingTalkServer
+
+
+def free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(workers: int, port: int,
+                 timeout: float = 60.0) -> subprocess.Popen:
+    """启动 ainewsback serve 并等待端口可用"""
+    process = subprocess.Popen(
+        [sys.executable, "-m", "ainewsback", "serve", "--host", "127.0.0.1",
+         "--port", str(port), "--workers", str(workers)],
+        env=os.environ.copy())
+    deadline = time.monotonic() + timeout
+    while True:
+        if process.poll() is not None:
+            raise RuntimeError(f"服务退出，返回码 {process.returncode}")
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/", timeout=1.0)
+            return process
+        except httpx.TransportError:
+            if time.monotonic() > deadline:
+                process.terminate()
+                raise TimeoutError("服务启动超时")
+            time.sleep(0.2)
+
+
+def stop_server(process: subprocess.Popen) -> None:
+    process.terminate()
+    try:
+        process.wait(timeout=60)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def scaling_table(runs: Dict[int, List[LatencyReport]]) -> List[str]:
+    """每个用例一行: 各 worker 数的 RPS（括号内为相对最少 worker 的倍数）"""
+    counts = sorted(runs)
+    lines = [f"{'case':<20}" + "".join(f"{f'w={n}':>20}" for n in counts)]
+    for index, report in enumerate(runs[counts[0]]):
+        base = report.rps or 1.0
+        cells = []
+        for n in counts:
+            rps = runs[n][index].rps
+            cells.append(f"{f'{rps:.0f} (x{rps / base:.2f})':>20}")
+        lines.append(f"{report.name:<20}" + "".join(cells))
+    return lines
+
+
+def main(args):
+    fake = FakeDingTalkServer(port=args.dingtalk_port).start()
+    runs: Dict[int, List[LatencyReport]] = {}
+    try:
+        configure_env(args, fake.url)
+        seed_password_user()
+        for workers in args.workers:
+            port = free_port()
+            process = start_server(workers, port)
+            try:
+                runs[workers] = asyncio.run(run_suite(
+                    args, f"http://127.0.0.1:{port}", fake))
+            finally:
+                stop_server(process)
+            for report in runs[workers]:
+                print(f"[workers={workers}] {report}")
+    finally:
+        fake.stop()
+
+    print("\n".join(scaling_table(runs)))
+    if args.output:
+        reports = [
+            LatencyReport(**{**report.to_dict(),
+                             "name": f"{report.name} (workers={n})"})
+            for n, run in runs.items() for report in run
+        ]
+        path = save_results(args.output, "workers", reports, {
+            "workers": args.workers,
+            "requests": args.requests,
+            "login_requests": args.login_requests,
+            "concurrency": args.concurrency,
+            "cpu_count": os.cpu_count(),
+        })
+        print(f"结果已保存: {path}")
+
+
+if __name__ == "__main__":
+    parser = build_parser()
+    parser.description = __doc__
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4],
+                        help="依次压测的 worker 数")
+    main(parser.parse_args())
@@ -0,0 +1,150 @@
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional
+
+
+@dataclass
+class LatencyReport:
+    """一组请求的延迟统计（单位: 毫秒）"""
+    name: str
+    requests: int
+    errors: int
+    elapsed: float
+    rps: float
+    p50: float
+    p95: float
+    p99: float
+    max: float
+    extra: dict = field(default_factory=dict)
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    def __str__(self) -> str:
+        return (f"{self.name:<32} n={self.requests:<6} err={self.errors:<4} "
+                f"rps={self.rps:>9.1f}  p50={self.p50:>7.2f}ms  "
+                f"p95={self.p95:>7.2f}ms  p99={self.p99:>7.2f}ms  "
+                f"max={self.max:>7.2f}ms")
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """最近秩法计算百分位"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1,
+                       int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def build_report(name: str, latencies: List[float], errors: int,
+                 elapsed: float) -> LatencyReport:
+    """根据延迟样本(秒)生成报告"""
+    values = sorted(v * 1000 for v in latencies)
+    total = len(values) + errors
+    return LatencyReport(
+        name=name,
+        requests=total,
+        errors=errors,
+        elapsed=elapsed,
+        rps=total / elapsed if elapsed else 0.0,
+        p50=percentile(values, 50),
+        p95=percentile(values, 95),
+        p99=percentile(values, 99),
+        max=values[-1] if values else 0.0,
+        extra={"mean": statistics.fmean(values) if values else 0.0},
+    )
+
+
+async def run_concurrent(name: str, call: Callable[[int], Awaitable[bool]],
+                         total: int, concurrency: int) -> LatencyReport:
+    """
+    以固定并发执行 total 次调用
+
+    Args:
+        name: 报告名称
+        call: 异步调用，参数为序号，返回是否成功
+        total: 总调用次数
+        concurrency: 并发数
+    """
+    latencies: List[float] = []
+    errors = 0
+    counter = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            start = time.perf_counter()
+            try:
+                ok = await call(i)
+            except Exception:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return build_report(name, latencies, errors, time.perf_counter() - started)
+
+
+def bench_sync(name: str, func: Callable[[], object],
+               iterations: int) -> LatencyReport:
+    """同步函数微基准"""
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - start)
+    return build_report(name, latencies, 0, time.perf_counter() - started)
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+            text=True, check=True, timeout=5).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def save_results(path: str | Path, suite: str,
+                 reports: List[LatencyReport],
+                 params: Optional[Dict[str, object]] = None) -> Path:
+    """
+    保存基准结果（JSON），供 benchmarks.compare 对比不同版本
+
+    Args:
+        path: 输出文件
+        suite: 基准套件名
+        reports: 各项结果
+        params: 运行参数（并发数、请求数等）
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    data = {
+        "suite": suite,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "git_revision": _git_revision(),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "params": params or {},
+        "results": [report.to_dict() for report in reports],
+    }
+    path.write_text(json.dumps(data, ensure_ascii=False, indent=2),
+                    encoding="utf-8")
+    return path
+
+
+def load_results(path: str | Path) -> dict:
+    """读取 save_results 保存的结果"""
+    return json.loads(Path(path).read_text(encoding="utf-8"))
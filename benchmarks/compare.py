@@ -0,0 +1,75 @@
+"""
+对比两次基准结果（save_results 保存的 JSON），检查性能回退
+
+按名称匹配各项结果，比较平均耗时、p95 与 RPS；任一项变差超过阈值时
+返回码为 1，可用于发布前检查。
+
+用法:
+    python -m benchmarks.compare baseline.json current.json --threshold 0.1
+"""
+import argparse
+import sys
+from typing import Dict, List, Tuple
+
+from benchmarks.common import load_results
+
+
+def _change(before: float, after: float) -> float:
+    return (after - before) / before if before else 0.0
+
+
+def compare(baseline: dict, current: dict,
+            threshold: float) -> Tuple[List[str], List[str]]:
+    """
+    Returns:
+        (输出行, 回退项名称)
+    """
+    before: Dict[str, dict] = {r["name"]: r for r in baseline["results"]}
+    lines = [f"{'name':<40} {'mean':>9} {'p95':>9} {'rps':>9}"]
+    regressions = []
+    for result in current["results"]:
+        name = result["name"]
+        old = before.get(name)
+        if old is None:
+            lines.append(f"{name:<40} {'(new)':>9}")
+            continue
+        mean = _change(old["extra"].get("mean", 0.0),
+                       result["extra"].get("mean", 0.0))
+        p95 = _change(old["p95"], result["p95"])
+        rps = _change(old["rps"], result["rps"])
+        # 耗时变大、吞吐变小为变差；RPS 对微基准无意义，只看耗时
+        worse = max(mean, p95) > threshold or (
+            baseline["suite"] != "micro" and -rps > threshold)
+        if worse:
+            regressions.append(name)
+        lines.append(f"{name:<40} {mean:>+9.1%} {p95:>+9.1%} {rps:>+9.1%}"
+                     f"{'  REGRESSION' if worse else ''}")
+    return lines, regressions
+
+
+def main(args) -> int:
+    baseline = load_results(args.baseline)
+    current = load_results(args.current)
+    if baseline["suite"] != current["suite"]:
+        print(f"套件不一致: {baseline['suite']} vs {current['suite']}")
+        return 2
+    print(f"{baseline.get('git_revision')} -> {current.get('git_revision')}"
+          f"  (suite={current['suite']})")
+    if baseline.get("params") != current.get("params"):
+        print(f"注意: 运行参数不同 {baseline.get('params')} "
+              f"vs {current.get('params')}")
+    lines, regressions = compare(baseline, current, args.threshold)
+    print("\n".join(lines))
+    if regressions:
+        print(f"超过阈值 {args.threshold:.0%} 的回退: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="允许的相对变差（默认 10%%）")
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,275 @@
+"""
+认证流程端到端压测
+
+在进程内用 create_app() 启动服务（uvicorn 运行在后台线程），
+连接本地 Postgres/Redis 替身（docker-compose.bench.yml）与钉钉 webhook 替身，
+依次压测:
+
+1. GET  /login/send_code        每个请求使用不同手机号
+2. POST /login/code_login       验证码从钉钉替身收到的消息中解析（自动注册）
+3. POST /login/login_auth       预置的密码用户
+4. GET  /user/api/v1/users      携带登录得到的 Token
+
+结果输出 RPS 与 p50/p95/p99，并保存为 JSON，可用 benchmarks.compare 对比。
+客户端与服务同进程会互相争用 CPU，对比版本时应保持相同参数与机器；
+也可用 --base-url 压测独立启动的服务（其钉钉地址需指向 --dingtalk-port）。
+
+用法:
+    docker compose -f docker-compose.bench.yml up -d
+    python -m benchmarks.e2e -n 1000 -c 50 --output benchmarks/results/e2e.json
+"""
+import argparse
+import asyncio
+import os
+import random
+import re
+import socket
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+import httpx
+
+from benchmarks.common import LatencyReport, run_concurrent, save_results
+from tests.fake_dingtalk import FakeDingTalkServer
+
+API_PREFIX = "/user/api/v1"
+SEED_PHONE = "13800000000"
+SEED_PASSWORD = "bench-password-123"
+
+# 文本与 Markdown 两种通知格式中的手机号与验证码
+CODE_PATTERN = re.compile(
+    r"手机号:\**\s*(\+?\d+).*?验证码:\**\s*`?(\w+)`?", re.S)
+
+
+def configure_env(args, webhook_url: str) -> None:
+    """在导入应用前写入配置（命令行参数优先于已有环境变量）"""
+    env = {
+        "DB_SERVER": args.db_host,
+        "DB_PORT": str(args.db_port),
+        "DB_USER": args.db_user,
+        "DB_PASSWORD": args.db_password,
+        "DB_NAME": args.db_name,
+        "REDIS_HOST": args.redis_host,
+        "REDIS_PORT": str(args.redis_port),
+        "REDIS_PASSWORD": args.redis_password,
+        "DINGTALK_WEBHOOK_URL": webhook_url,
+        "DINGTALK_SECRET": "bench-secret",
+        # 替身不限流
+        "DINGTALK_RATE_LIMIT_PER_MINUTE": "1000000",
+    }
+    os.environ.update(env)
+    for key, value in {
+        "APP_ENV": "pro",
+        "LOG_LEVEL": "WARNING",
+        "CODE_LENGTH": "6",
+        "CODE_EXPIRE_SECONDS": "300",
+        "CODE_RATE_LIMIT": "60",
+        "SECRET_KEY": "bench-secret-key-with-at-least-32-chars",
+        "ALGORITHM": "HS256",
+        "ACCESS_TOKEN_EXPIRE_MINUTES": "30",
+        "CURRENT_ISSUER": "ainews-bench",
+        "TOKEN_AUDIENCE": '["ainews-bench"]',
+        "ACCESS_TOKEN_ISSUER": '["ainews-bench"]',
+    }.items():
+        os.environ.setdefault(key, value)
+
+
+class ServerThread:
+    """在后台线程运行 uvicorn，监听随机端口"""
+
+    def __init__(self, app):
+        import uvicorn
+
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._socket.bind(("127.0.0.1", 0))
+        self.server = uvicorn.Server(uvicorn.Config(
+            app, log_config=None, access_log=False, lifespan="on"))
+        self._thread = threading.Thread(
+            target=self.server.run, kwargs={"sockets": [self._socket]},
+            daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._socket.getsockname()[:2]
+        return f"http://{host}:{port}"
+
+    def start(self, timeout: float = 30.0) -> "ServerThread":
+        self._thread.start()
+        deadline = time.monotonic() + timeout
+        while not self.server.started:
+            if not self._thread.is_alive():
+                raise RuntimeError("服务启动失败，检查数据库与 Redis 是否可用")
+            if time.monotonic() > deadline:
+                raise TimeoutError("服务启动超时")
+            time.sleep(0.05)
+        return self
+
+    def stop(self) -> None:
+        self.server.should_exit = True
+        self._thread.join(timeout=30)
+        self._socket.close()
+
+
+def seed_password_user() -> None:
+    """建表（同 ainewsback migrate）并预置密码登录用户，已存在时重置密码"""
+    from sqlmodel import Session
+
+    from ainewsback.core.database import create_db_and_tables, get_engine
+    from ainewsback.models.user import ApUser
+    from ainewsback.repositories.user_repository import UserRepository
+    from ainewsback.utils.password import PasswordUtil
+
+    create_db_and_tables()
+    with Session(get_engine()) as session:
+        repository = UserRepository(ApUser, session)
+        password = PasswordUtil.hash_password(SEED_PASSWORD)
+        user = repository.get_by_phone(SEED_PHONE)
+        if user is None:
+            repository.create(ApUser(name="bench", phone=SEED_PHONE,
+                                     password=password))
+        else:
+            repository.update(user, {"password": password})
+
+
+def collect_codes(messages: Iterable[dict]) -> Dict[str, str]:
+    """从钉钉替身收到的消息中解析 手机号 -> 验证码"""
+    codes = {}
+    for body in messages:
+        text = (body.get("text", {}).get("content")
+                or body.get("markdown", {}).get("text") or "")
+        for phone, code in CODE_PATTERN.findall(text):
+            codes[phone] = code
+    return codes
+
+
+async def wait_for_codes(fake: FakeDingTalkServer, phones: List[str],
+                         timeout: float) -> Dict[str, str]:
+    """等待发件箱把验证码投递到钉钉替身"""
+    deadline = time.monotonic() + timeout
+    while True:
+        codes = collect_codes(list(fake.messages))
+        if all(phone in codes for phone in phones):
+            return codes
+        if time.monotonic() > deadline:
+            return codes
+        await asyncio.sleep(0.1)
+
+
+async def run_suite(args, base_url: str,
+                    fake: FakeDingTalkServer) -> List[LatencyReport]:
+    limits = httpx.Limits(max_connections=args.concurrency)
+    reports: List[LatencyReport] = []
+    base = random.randrange(10 ** 8)
+    phones = [f"139{(base + i) % 10 ** 8:08d}" for i in range(args.requests)]
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits,
+                                 timeout=30.0) as client:
+        def ok(response: httpx.Response) -> bool:
+            return (response.status_code == 200
+                    and response.json().get("code") == 200)
+
+        async def send_code(i: int) -> bool:
+            return ok(await client.get(
+                f"{API_PREFIX}/login/send_code", params={"phone": phones[i]}))
+
+        reports.append(await run_concurrent(
+            "GET send_code", send_code, args.requests, args.concurrency))
+
+        codes = await wait_for_codes(fake, phones, args.code_timeout)
+
+        async def code_login(i: int) -> bool:
+            code = codes.get(phones[i])
+            if code is None:
+                return False
+            return ok(await client.post(
+                f"{API_PREFIX}/login/code_login",
+                json={"phone": phones[i], "code": code}))
+
+        reports.append(await run_concurrent(
+            "POST code_login", code_login, args.requests, args.concurrency))
+
+        login_body = {"phone": SEED_PHONE, "password": SEED_PASSWORD}
+
+        async def login_auth(_: int) -> bool:
+            return ok(await client.post(
+                f"{API_PREFIX}/login/login_auth", json=login_body))
+
+        reports.append(await run_concurrent(
+            "POST login_auth", login_auth, args.login_requests,
+            args.concurrency))
+
+        response = await client.post(f"{API_PREFIX}/login/login_auth",
+                                     json=login_body)
+        token = response.json()["data"]["token"]
+        headers = {"Authorization": f"Bearer {token}"}
+
+        async def list_users(_: int) -> bool:
+            return ok(await client.get(
+                f"{API_PREFIX}/users", params={"limit": 20},
+                headers=headers))
+
+        reports.append(await run_concurrent(
+            "GET users (auth)", list_users, args.requests, args.concurrency))
+    return reports
+
+
+def main(args):
+    fake = FakeDingTalkServer(port=args.dingtalk_port).start()
+    server: Optional[ServerThread] = None
+    try:
+        configure_env(args, fake.url)
+        seed_password_user()
+        base_url = args.base_url
+        if base_url is None:
+            from ainewsback.main import create_app
+
+            server = ServerThread(create_app()).start()
+            base_url = server.base_url
+        reports = asyncio.run(run_suite(args, base_url, fake))
+    finally:
+        if server is not None:
+            server.stop()
+        fake.stop()
+
+    for report in reports:
+        print(report)
+    if args.output:
+        path = save_results(args.output, "e2e", reports, {
+            "requests": args.requests,
+            "login_requests": args.login_requests,
+            "concurrency": args.concurrency,
+            "in_process": args.base_url is None,
+        })
+        print(f"结果已保存: {path}")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument("-n", "--requests", type=int, default=1000,
+                        help="send_code/code_login/users 请求数")
+    parser.add_argument("--login-requests", type=int, default=200,
+                        help="login_auth 请求数（受密码哈希成本限制）")
+    parser.add_argument("-c", "--concurrency", type=int, default=50)
+    parser.add_argument("--output", help="结果 JSON 路径")
+    parser.add_argument("--base-url",
+                        help="压测已启动的服务，不在进程内启动")
+    parser.add_argument("--dingtalk-port", type=int, default=0,
+                        help="钉钉替身端口，0 为随机")
+    parser.add_argument("--code-timeout", type=float, default=30.0,
+                        help="等待验证码投递的秒数")
+    parser.add_argument("--db-host", default="127.0.0.1")
+    parser.add_argument("--db-port", type=int, default=55432)
+    parser.add_argument("--db-user", default="bench")
+    parser.add_argument("--db-password", default="bench")
+    parser.add_argument("--db-name", default="ainews_bench")
+    parser.add_argument("--redis-host", default="127.0.0.1")
+    parser.add_argument("--redis-port", type=int, default=56379)
+    parser.add_argument("--redis-password", default="bench")
+    return parser
+
+
+if __name__ == "__main__":
+    main(build_parser().parse_args())
@@ -0,0 +1,84 @@
+"""
+生成 ap_user 测试数据（PostgreSQL COPY 批量导入）
+
+手机号唯一且连续分布，用户名由拼音音节随机组合，
+所有用户使用同一个预先计算的密码哈希（明文见 --password）。
+
+用法:
+    python -m benchmarks.gen_users -n 1000000 --truncate
+"""
+import argparse
+import csv
+import io
+import random
+import time
+from datetime import datetime
+
+from sqlalchemy import text
+
+from ainewsback.core.database import create_db_and_tables, get_engine
+from ainewsback.utils.password import PasswordUtil
+
+SYLLABLES = (
+    "an", "bai", "chen", "da", "fang", "gao", "hua", "jin", "kai", "li",
+    "ming", "ning", "ping", "qing", "rui", "shan", "tian", "wei", "xiao",
+    "yang", "zhang", "zhou", "yu", "lin", "hao", "jun", "lei", "mei",
+)
+COLUMNS = ("name", "phone", "password", "status", "flag", "created_time")
+PHONE_BASE = 13000000000
+
+
+def random_name(rng: random.Random) -> str:
+    parts = [rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3))]
+    return ("".join(parts) + str(rng.randint(0, 9999)))[:20]
+
+
+def build_chunk(rng: random.Random, start: int, size: int,
+                password_hash: str) -> io.StringIO:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    now = datetime.now().isoformat()
+    for i in range(start, start + size):
+        writer.writerow((random_name(rng), str(PHONE_BASE + i),
+                         password_hash, 0, 0, now))
+    buf.seek(0)
+    return buf
+
+
+def main(args):
+    create_db_and_tables()
+    rng = random.Random(args.seed)
+    password_hash = PasswordUtil.hash_password(args.password)
+
+    raw = get_engine().raw_connection()
+    try:
+        cursor = raw.cursor()
+        if args.truncate:
+            cursor.execute("TRUNCATE ap_user RESTART IDENTITY")
+        started = time.perf_counter()
+        for start in range(0, args.users, args.batch):
+            size = min(args.batch, args.users - start)
+            cursor.copy_expert(
+                f"COPY ap_user ({', '.join(COLUMNS)}) FROM STDIN WITH CSV",
+                build_chunk(rng, start, size, password_hash))
+            raw.commit()
+            print(f"{start + size}/{args.users}")
+        elapsed = time.perf_counter() - started
+        print(f"导入 {args.users} 条，用时 {elapsed:.1f}s "
+              f"({args.users / elapsed:.0f} rows/s)")
+    finally:
+        raw.close()
+
+    with get_engine().begin() as conn:
+        conn.execute(text("ANALYZE ap_user"))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--users", type=int, default=1_000_000)
+    parser.add_argument("--batch", type=int, default=50_000)
+    parser.add_argument("--password", default="bench-password")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--truncate", action="store_true",
+                        help="导入前清空 ap_user")
+    main(parser.parse_args())
@@ -0,0 +1,73 @@
+"""
+/login/login_auth 并发压测
+
+对运行中的服务发起并发密码登录，同时以固定频率探测 `/`，
+用 `/` 的 p99 衡量事件循环是否被数据库查询阻塞。
+分别对改造前后的版本运行，对比两次输出即可。
+
+用法:
+    python -m benchmarks.load_login_auth --base-url http://127.0.0.1:8080 \\
+        --phone 13800000000 --password secret -n 2000 -c 50
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from benchmarks.common import build_report, run_concurrent
+
+LOGIN_PATH = "/user/api/v1/login/login_auth"
+
+
+async def probe_root(client: httpx.AsyncClient, stop: asyncio.Event,
+                     interval: float):
+    """登录压测期间持续探测 `/` 的延迟"""
+    latencies, errors = [], 0
+    started = time.perf_counter()
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            r = await client.get("/")
+            if r.status_code == 200:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors += 1
+        except httpx.HTTPError:
+            errors += 1
+        await asyncio.sleep(interval)
+    return build_report("GET / (during login load)", latencies, errors,
+                        time.perf_counter() - started)
+
+
+async def main(args):
+    limits = httpx.Limits(max_connections=args.concurrency + 1)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits,
+                                 timeout=30.0) as client:
+        body = {"phone": args.phone, "password": args.password}
+
+        async def login(_: int) -> bool:
+            r = await client.post(LOGIN_PATH, json=body)
+            return r.status_code == 200
+
+        # 预热
+        await run_concurrent("warmup", login, min(args.requests, 50),
+                             args.concurrency)
+
+        stop = asyncio.Event()
+        probe = asyncio.create_task(probe_root(client, stop, 0.01))
+        report = await run_concurrent("POST login_auth", login,
+                                      args.requests, args.concurrency)
+        stop.set()
+        print(report)
+        print(await probe)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8080")
+    parser.add_argument("--phone", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("-n", "--requests", type=int, default=2000)
+    parser.add_argument("-c", "--concurrency", type=int, default=50)
+    asyncio.run(main(parser.parse_args()))
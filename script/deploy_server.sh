@@ -15,6 +15,12 @@ docker pull "$FULL_IMAGE"
 echo "==> 停止旧服务"
 docker compose -f "$COMPOSE_FILE" down
 
+echo "==> 启动数据库与 Redis"
+docker compose -f "$COMPOSE_FILE" up -d db redis
+
+echo "==> 创建数据表"
+docker compose -f "$COMPOSE_FILE" run --rm backend ainewsback migrate
+
 echo "==> 启动服务"
 docker compose -f "$COMPOSE_FILE" up -d
 
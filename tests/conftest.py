@@ -0,0 +1,69 @@
+import asyncio
+import os
+from typing import Awaitable, Callable, Optional, TypeVar
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+import ainewsback.models.user  # noqa: F401  注册 ap_user 表
+
+T = TypeVar("T")
+
+# 测试环境默认配置（不连接真实服务，仅保证 Settings 可构建）
+os.environ.setdefault("APP_ENV", "test")
+os.environ.setdefault("DB_SERVER", "localhost")
+os.environ.setdefault("DB_PORT", "5432")
+os.environ.setdefault("DB_USER", "test")
+os.environ.setdefault("DB_PASSWORD", "test")
+os.environ.setdefault("DB_NAME", "test")
+os.environ.setdefault("SECRET_KEY", "test-secret-key-with-at-least-32-chars")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
+os.environ.setdefault("CURRENT_ISSUER", "ainews-test")
+os.environ.setdefault("TOKEN_AUDIENCE", '["ainews-test"]')
+os.environ.setdefault("ACCESS_TOKEN_ISSUER", '["ainews-test"]')
+os.environ.setdefault("CODE_LENGTH", "6")
+os.environ.setdefault("CODE_EXPIRE_SECONDS", "300")
+os.environ.setdefault("CODE_RATE_LIMIT", "60")
+os.environ.setdefault("MAX_VERIFY_ATTEMPTS", "3")
+
+
+class AsyncTestDatabase:
+    """测试用异步 SQLite 数据库: 每次 run 新建引擎并建表，结束后（含失败）释放"""
+
+    def __init__(self):
+        self.engine: Optional[AsyncEngine] = None
+
+    def session(self) -> AsyncSession:
+        """与应用的会话工厂一致，提交后不过期"""
+        return AsyncSession(self.engine, expire_on_commit=False)
+
+    def run(self, scenario: Callable[[], Awaitable[T]],
+            url: str = "sqlite+aiosqlite://") -> T:
+        """
+        在新事件循环中运行场景
+
+        Args:
+            scenario: 无参协程函数，通过 self.engine / self.session() 访问数据库
+            url: 数据库地址，默认内存库（所有会话共用一个连接）；
+                需要多个连接互相隔离时传入文件库
+        """
+
+        async def main():
+            self.engine = create_async_engine(url)
+            try:
+                async with self.engine.begin() as conn:
+                    await conn.run_sync(SQLModel.metadata.create_all)
+                return await scenario()
+            finally:
+                await self.engine.dispose()
+
+        return asyncio.run(main())
+
+
+@pytest.fixture
+def async_db() -> AsyncTestDatabase:
+    """异步 SQLite 数据库（仓储、服务层测试使用）"""
+    return AsyncTestDatabase()
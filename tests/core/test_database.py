@@ -0,0 +1,25 @@
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import QueuePool
+
+from ainewsback.core.database import PoolMonitor
+
+
+def test_pool_monitor_records_checkout_and_connect(tmp_path):
+    """测试连接池监控记录获取连接与建连耗时"""
+    monitor = PoolMonitor("test")
+    engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}",
+                           poolclass=monitor.instrument(QueuePool),
+                           pool_size=2, max_overflow=0)
+    monitor.attach(engine)
+
+    with engine.connect() as conn:
+        conn.execute(text("select 1"))
+        stats = monitor.stats()
+        assert stats["checked_out"] == 1
+
+    stats = monitor.stats()
+    assert stats["checked_out"] == 0
+    assert stats["pool_size"] == 2
+    assert stats["checkout_wait_seconds"]["count"] == 1
+    assert stats["connect_latency_seconds"]["count"] == 1
+    engine.dispose()
@@ -0,0 +1,172 @@
+import json
+import logging
+import queue
+import sys
+from datetime import UTC, datetime, timedelta
+
+import pytest
+
+from ainewsback.core import logger as logger_module
+from ainewsback.core.config import settings
+from ainewsback.core.logger import BoundedQueueHandler, \
+    CustomJsonFormatter, get_logging_stats, setup_logging, shutdown_logging
+
+
+@pytest.fixture
+def queued_logging(tmp_path, monkeypatch):
+    """通过 setup_logging 启用队列写文件日志，结束后恢复根日志记录器"""
+    monkeypatch.setattr(settings, "LOG_FILE_PATH", str(tmp_path))
+    monkeypatch.setattr(settings, "LOG_TO_CONSOLE", False)
+    monkeypatch.setattr(settings, "LOG_TO_FILE", True)
+    monkeypatch.setattr(settings, "LOG_QUEUE_ENABLED", True)
+    monkeypatch.setattr(settings, "ENABLE_ACCESS_LOG", False)
+    root = logging.getLogger()
+    saved_handlers, saved_level = root.handlers[:], root.level
+
+    def start(log_format: str):
+        monkeypatch.setattr(settings, "LOG_FORMAT", log_format)
+        setup_logging()
+
+    yield start
+    shutdown_logging()
+    for handler in root.handlers:
+        if handler not in saved_handlers:
+            handler.close()
+    root.handlers[:] = saved_handlers
+    root.setLevel(saved_level)
+
+
+def _log_exception(name: str) -> None:
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        logging.getLogger(name).exception("处理失败 %s", "order-1")
+
+
+def test_bounded_queue_handler_drops_when_full():
+    """测试队列满时丢弃日志并计数，而不是阻塞"""
+    handler = BoundedQueueHandler(queue.Queue(maxsize=2))
+    log = logging.getLogger("tests.bounded_queue")
+    log.propagate = False
+    log.addHandler(handler)
+    try:
+        for i in range(5):
+            log.warning("message %s", i)
+    finally:
+        log.removeHandler(handler)
+
+    assert handler.queue.qsize() == 2
+    assert handler.dropped == 3
+
+
+def test_shutdown_flushes_queued_records(tmp_path):
+    """测试关闭时写出队列中剩余的日志"""
+    file_handler = logging.FileHandler(tmp_path / "app.log", encoding="utf-8")
+    log = logging.getLogger("tests.queue_listener")
+    log.propagate = False
+    log.setLevel(logging.INFO)
+
+    logger_module._attach_handlers(log, [file_handler])
+    try:
+        for i in range(100):
+            log.info("record %s", i)
+        assert get_logging_stats()["dropped"] == 0
+    finally:
+        shutdown_logging()
+
+    # 关闭后原处理器挂回日志记录器，之后的日志直接写出
+    assert log.handlers == [file_handler]
+    log.info("after shutdown")
+    log.handlers.clear()
+    file_handler.close()
+
+    lines = (tmp_path / "app.log").read_text(encoding="utf-8").splitlines()
+    assert len(lines) == 101
+    assert lines[-2:] == ["record 99", "after shutdown"]
+
+
+def test_prepare_defers_formatting_to_listener():
+    """测试入队的是合并参数、带异常文本的副本，未在调用方线程格式化"""
+    handler = BoundedQueueHandler(queue.Queue())
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        record = logging.LogRecord("tests.prepare", logging.ERROR, __file__,
+                                   10, "处理失败 %s", ("order-1",),
+                                   sys.exc_info())
+    record.request_id = "abc"
+
+    prepared = handler.prepare(record)
+
+    assert prepared is not record
+    assert record.exc_info is not None  # 原记录不受影响
+    assert prepared.msg == "处理失败 order-1"
+    assert prepared.args is None
+    assert prepared.exc_info is None
+    assert "ValueError: boom" in prepared.exc_text
+    assert prepared.request_id == "abc"
+
+
+def test_queue_keeps_traceback_for_text_handlers(tmp_path, queued_logging):
+    """测试经队列写出的纯文本日志保留异常堆栈，且参数已合并"""
+    queued_logging("text")
+    _log_exception("tests.queue_text")
+    shutdown_logging()
+
+    text = (tmp_path / "error.log").read_text(encoding="utf-8")
+    assert "处理失败 order-1" in text
+    assert "Traceback (most recent call last)" in text
+    assert "ValueError: boom" in text
+
+
+def test_queue_json_error_log_has_exc_info(tmp_path, queued_logging):
+    """测试经队列写出的 JSON 错误日志带 exc_info 字段，堆栈不并入 message"""
+    queued_logging("json")
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        logging.getLogger("tests.queue_json").exception(
+            "处理失败 %s", "order-1", extra={"request_id": "abc"})
+    shutdown_logging()
+
+    lines = (tmp_path / "error.log").read_text(encoding="utf-8").splitlines()
+    assert len(lines) == 1
+    data = json.loads(lines[0])
+    assert data["message"] == "处理失败 order-1"
+    assert data["level"] == "ERROR"
+    assert data["request_id"] == "abc"
+    assert "Traceback (most recent call last)" in data["exc_info"]
+    assert "ValueError: boom" in data["exc_info"]
+    assert "exc_text" not in data
+
+
+def test_json_formatter_keeps_extra_and_static_fields():
+    """测试 JSON 格式化器保留 extra 字段并输出静态字段"""
+    record = logging.LogRecord("tests.json", logging.INFO, __file__, 10,
+                               "请求完成 %s", ("ok",), None)
+    record.request_id = "abc"
+    record.status_code = 200
+
+    data = json.loads(CustomJsonFormatter().format(record))
+
+    assert data["message"] == "请求完成 ok"
+    assert data["request_id"] == "abc"
+    assert data["status_code"] == 200
+    assert data["level"] == "INFO"
+    assert data["logger"] == "tests.json"
+    assert data["env"] == settings.APP_ENV
+    assert data["app"] == settings.APP_NAME
+    timestamp = datetime.fromisoformat(data["timestamp"])
+    expected = datetime.fromtimestamp(record.created, UTC)
+    assert abs(timestamp - expected) < timedelta(milliseconds=1)
+
+
+def test_records_after_shutdown_are_written(tmp_path, queued_logging):
+    """测试关闭后（如 uvicorn 退出日志）的日志仍写入文件，而不是留在队列中"""
+    queued_logging("text")
+    shutdown_logging()
+    logging.getLogger("uvicorn.error").warning("Application shutdown complete.")
+
+    assert get_logging_stats()["queued"] == 0
+    text = (tmp_path / "app.log").read_text(encoding="utf-8")
+    assert "Application shutdown complete." in text
@@ -0,0 +1,115 @@
+import asyncio
+
+import fakeredis
+import pytest
+import redis.asyncio as redis
+from fakeredis.aioredis import FakeAsyncRedisConnection
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from ainewsback.core.database import PoolMonitor, QUERY_LATENCY
+from ainewsback.core.metrics import CollectedMetric, MetricsRegistry, Sample
+from ainewsback.core.reids import REDIS_LATENCY, InstrumentedRedis
+from ainewsback.middleware import RequestPipelineMiddleware
+from ainewsback.middleware.request_pipeline import HTTP_IN_FLIGHT, \
+    HTTP_LATENCY, HTTP_REQUESTS
+
+
+def test_render_prometheus_text_format():
+    """测试计数器、直方图与采集器的导出格式"""
+    registry = MetricsRegistry()
+    requests = registry.counter("requests_total", "请求数", ("route",))
+    latency = registry.histogram("latency_seconds", "耗时",
+                                 buckets=(0.1, 1.0))
+    registry.register_collector(lambda: [CollectedMetric(
+        "pool_size", "连接池大小", "gauge", [Sample({"pool": "a"}, 5)])])
+
+    requests.labels('/a"b').inc()
+    requests.labels('/a"b').inc(2)
+    latency.labels().observe(0.05)
+    latency.labels().observe(0.5)
+    latency.labels().observe(3)
+
+    lines = registry.render().splitlines()
+    assert "# TYPE requests_total counter" in lines
+    assert 'requests_total{route="/a\\"b"} 3' in lines
+    assert 'latency_seconds_bucket{le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{le="1"} 2' in lines
+    assert 'latency_seconds_bucket{le="+Inf"} 3' in lines
+    assert "latency_seconds_count 3" in lines
+    assert 'pool_size{pool="a"} 5' in lines
+
+    with pytest.raises(ValueError):
+        requests.labels()
+    with pytest.raises(ValueError):
+        registry.counter("requests_total", "重复")
+
+
+def test_http_metrics_use_route_template():
+    """测试请求按路由模板而非原始 URL 统计，处理完成后在途数归零"""
+    app = FastAPI()
+    app.add_middleware(RequestPipelineMiddleware, exclude_paths=["/items/*"])
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: int):
+        return {"id": item_id}
+
+    client = TestClient(app)
+    ok = HTTP_REQUESTS.labels("GET", "/items/{item_id}", "200")
+    before = ok.value
+    histogram = HTTP_LATENCY.labels("GET", "/items/{item_id}")
+    count = histogram.count
+
+    client.get("/items/1")
+    client.get("/items/2")
+    client.get("/missing")
+
+    assert ok.value == before + 2
+    assert histogram.count == count + 2
+    assert HTTP_REQUESTS.labels("GET", "<unmatched>", "401").value >= 1
+    assert HTTP_IN_FLIGHT.value == 0
+
+
+def test_query_and_redis_latency_recorded():
+    """测试 SQL 语句与 Redis 命令耗时按类型记录"""
+    engine = create_engine("sqlite://")
+    PoolMonitor("metrics-test").attach(engine)
+    with engine.connect() as conn:
+        conn.execute(text("select 1"))
+    assert QUERY_LATENCY.labels("metrics-test", "select").count == 1
+    engine.dispose()
+
+    async def scenario():
+        pool = redis.ConnectionPool(
+            connection_class=FakeAsyncRedisConnection,
+            server=fakeredis.FakeServer())
+        client = InstrumentedRedis(connection_pool=pool)
+        get = REDIS_LATENCY.labels("GET")
+        pipeline = REDIS_LATENCY.labels("PIPELINE")
+        gets, pipelines = get.count, pipeline.count
+
+        await client.get("k")
+        async with client.pipeline() as pipe:
+            await pipe.set("k", "v").get("k").execute()
+        await client.aclose()
+        return get.count - gets, pipeline.count - pipelines
+
+    assert asyncio.run(scenario()) == (1, 1)
+
+
+def test_const_labels_added_to_all_samples():
+    """测试 worker 标签附加到计数器、直方图与采集器的每个样本"""
+    registry = MetricsRegistry()
+    registry.set_const_labels({"worker": "123"})
+    registry.counter("requests_total", "请求数", ("route",)).labels("/a").inc()
+    registry.histogram("latency_seconds", "耗时",
+                       buckets=(1.0,)).labels().observe(0.5)
+    registry.register_collector(lambda: [CollectedMetric(
+        "pool_size", "连接池大小", "gauge", [Sample({}, 5)])])
+
+    lines = registry.render().splitlines()
+    assert 'requests_total{worker="123",route="/a"} 1' in lines
+    assert 'latency_seconds_bucket{worker="123",le="1"} 1' in lines
+    assert 'latency_seconds_count{worker="123"} 1' in lines
+    assert 'pool_size{worker="123"} 5' in lines
@@ -0,0 +1,122 @@
+import asyncio
+
+import fakeredis
+import redis.asyncio as redis
+from fakeredis.aioredis import FakeAsyncRedisConnection
+
+from ainewsback.core.reids import InstrumentedRedis, NearCache, \
+    add_latency_hook, remove_latency_hook
+
+
+def _client(cache: NearCache, server=None) -> InstrumentedRedis:
+    pool = redis.ConnectionPool(connection_class=FakeAsyncRedisConnection,
+                                server=server or fakeredis.FakeServer(),
+                                decode_responses=True)
+    client = InstrumentedRedis(connection_pool=pool)
+    client.near_cache = cache
+    return client
+
+
+def _ready_cache(**kwargs) -> NearCache:
+    """跳过失效通道，直接视为可用（fakeredis 不支持 CLIENT TRACKING）"""
+    cache = NearCache(["hot:"], **kwargs)
+    cache._ready = True
+    return cache
+
+
+def test_hits_serve_get_and_ttl_locally():
+    """测试命中后 GET/TTL 不再访问 Redis，写命令先删除本地条目"""
+    cache = _ready_cache()
+
+    async def scenario():
+        client = _client(cache)
+        await client.set("hot:a", "1", ex=100)
+        await client.set("cold:b", "2")
+
+        assert await client.get("hot:a") == "1"
+        assert await client.get("hot:a") == "1"
+        assert await client.ttl("hot:a") == 100
+        assert await client.get("hot:missing") is None
+        assert await client.ttl("hot:missing") == -2
+        assert await client.get("cold:b") == "2"
+        assert (cache.hits, cache.misses) == (3, 2)
+
+        await client.set("hot:a", "3")
+        assert await client.ttl("hot:a") == -1
+        assert await client.get("hot:a") == "3"
+        await client.aclose()
+
+    asyncio.run(scenario())
+    assert cache.invalidations == 1
+
+
+def test_invalidation_during_read_is_not_cached():
+    """测试读取期间收到失效通知时，读回的值不写入缓存"""
+    cache = _ready_cache()
+
+    def invalidate_mid_flight(command, elapsed, error):
+        if command == "PIPELINE":
+            cache._on_message(["message", NearCache.INVALIDATE_CHANNEL,
+                               ["hot:a"]])
+
+    async def scenario():
+        client = _client(cache)
+        await client.set("hot:a", "1")
+        add_latency_hook(invalidate_mid_flight)
+        try:
+            assert await client.get("hot:a") == "1"
+        finally:
+            remove_latency_hook(invalidate_mid_flight)
+        await client.aclose()
+
+    asyncio.run(scenario())
+    assert cache.stats()["size"] == 0
+    assert not cache._inflight and not cache._dirty
+
+
+def test_lru_and_memory_caps():
+    """测试超过条目数或内存上限时按 LRU 淘汰，过大的值不缓存"""
+    cache = _ready_cache(max_keys=2, max_entry_bytes=1024)
+
+    async def scenario():
+        client = _client(cache)
+        for key in ("hot:a", "hot:b", "hot:c", "hot:big"):
+            await client.set(key, "x" * (4096 if key == "hot:big" else 1))
+        await client.get("hot:a")
+        await client.get("hot:b")
+        await client.get("hot:a")
+        await client.get("hot:c")
+        await client.get("hot:big")
+        await client.aclose()
+
+    asyncio.run(scenario())
+    assert list(cache._entries) == ["hot:a", "hot:c"]
+    assert cache.evictions == 1
+
+    entry_bytes = cache.stats()["bytes"] // 2
+    cache.max_bytes = entry_bytes
+    cache._store("hot:d", cache._make_entry("hot:d", "x", -1))
+    assert list(cache._entries) == ["hot:d"]
+
+    cache._on_message(["message", NearCache.INVALIDATE_CHANNEL, None])
+    assert cache.stats()["size"] == 0 and cache.flushes == 1
+
+
+def test_bypass_until_tracking_available():
+    """测试服务端不支持 CLIENT TRACKING 时缓存保持关闭，读取直达 Redis"""
+    cache = NearCache(["hot:"])
+    cache.RECONNECT_BASE_SECONDS = 0.01
+
+    async def scenario():
+        client = _client(cache)
+        await client.set("hot:a", "1")
+        cache.start(client)
+        await asyncio.sleep(0.05)
+        assert not cache.ready
+        assert await client.get("hot:a") == "1"
+        await cache.stop()
+        await client.aclose()
+
+    asyncio.run(scenario())
+    assert cache.reconnects >= 1
+    assert (cache.hits, cache.misses) == (0, 0)
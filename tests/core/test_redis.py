@@ -0,0 +1,112 @@
+import asyncio
+
+import fakeredis
+import redis.asyncio as redis
+from fakeredis.aioredis import FakeAsyncRedisConnection
+from redis.asyncio.connection import BlockingConnectionPool
+from redis.crc import key_slot
+
+from ainewsback.core.config import settings
+from ainewsback.core.reids import AsyncRedisClient, \
+    InstrumentedClusterPipeline, InstrumentedRedis, \
+    InstrumentedRedisCluster, SentinelBlockingConnectionPool, \
+    add_latency_hook, remove_latency_hook
+from ainewsback.services.notification_outbox import NotificationOutbox
+from ainewsback.services.verification import VerificationService
+
+
+def test_build_uses_blocking_pool_per_worker(monkeypatch):
+    """测试单机模式使用阻塞连接池，容量按 worker 数均分并配置重试"""
+    monkeypatch.setattr(settings, "REDIS_MODE", "standalone")
+    monkeypatch.setattr(settings, "SERVER_WORKERS", 4)
+    monkeypatch.setattr(settings, "REDIS_MAX_CONNECTIONS", 40)
+    monkeypatch.setattr(settings, "REDIS_POOL_TIMEOUT", 2.5)
+    monkeypatch.setattr(settings, "REDIS_RETRY_ATTEMPTS", 5)
+
+    client = AsyncRedisClient.build()
+    pool = client.connection_pool
+    assert isinstance(client, InstrumentedRedis)
+    assert isinstance(pool, BlockingConnectionPool)
+    assert (pool.max_connections, pool.timeout) == (10, 2.5)
+    assert pool.connection_kwargs["retry"].get_retries() == 5
+
+
+def test_build_sentinel_and_cluster(monkeypatch):
+    """测试哨兵与集群模式的客户端类型（创建时不连接）"""
+    monkeypatch.setattr(settings, "REDIS_MODE", "sentinel")
+    monkeypatch.setattr(settings, "REDIS_SENTINELS", ["127.0.0.1:26379"])
+    client = AsyncRedisClient.build()
+    assert isinstance(client, InstrumentedRedis)
+    assert isinstance(client.connection_pool, SentinelBlockingConnectionPool)
+    assert client.connection_pool.service_name == "mymaster"
+
+    monkeypatch.setattr(settings, "REDIS_MODE", "cluster")
+    monkeypatch.setattr(settings, "REDIS_CLUSTER_NODES",
+                        ["127.0.0.1:7000", "127.0.0.1:7001"])
+    client = AsyncRedisClient.build()
+    assert isinstance(client, InstrumentedRedisCluster)
+    assert isinstance(client.pipeline(), InstrumentedClusterPipeline)
+
+
+def test_concurrent_get_client_builds_once(monkeypatch):
+    """测试并发首次获取只创建一个客户端"""
+    built = []
+
+    def build():
+        built.append(1)
+        return fakeredis.FakeAsyncRedis()
+
+    monkeypatch.setattr(AsyncRedisClient, "build", build)
+
+    async def scenario():
+        clients = await asyncio.gather(
+            *(AsyncRedisClient.get_client() for _ in range(10)))
+        await AsyncRedisClient.close()
+        return clients
+
+    clients = asyncio.run(scenario())
+    assert len(built) == 1
+    assert all(c is clients[0] for c in clients)
+    assert AsyncRedisClient._instance is None
+
+
+def test_latency_hook_receives_commands():
+    """测试耗时回调收到命令名与异常"""
+    calls = []
+
+    def hook(command, elapsed, error):
+        calls.append((command, error is not None))
+
+    async def scenario():
+        pool = redis.ConnectionPool(
+            connection_class=FakeAsyncRedisConnection,
+            server=fakeredis.FakeServer())
+        client = InstrumentedRedis(connection_pool=pool)
+        await client.set("k", "v")
+        try:
+            await client.incr("k")
+        except redis.ResponseError:
+            pass
+        await client.aclose()
+
+    add_latency_hook(hook)
+    try:
+        asyncio.run(scenario())
+    finally:
+        remove_latency_hook(hook)
+    assert calls == [("SET", False), ("INCRBY", True)]
+
+
+def test_multi_key_operations_share_slot():
+    """测试脚本与事务涉及的 key 在集群模式下落在同一 slot"""
+    service = VerificationService.__new__(VerificationService)
+    keys = [service._get_code_key("13800000000", "login"),
+            service._get_rate_limit_key("13800000000"),
+            service._get_attempt_key("13800000000", "login")]
+    assert len({key_slot(k.encode()) for k in keys}) == 1
+
+    outbox = NotificationOutbox
+    keys = [outbox.QUEUE_KEY, outbox.RETRY_KEY, outbox.WORKERS_KEY,
+            outbox.get_processing_key("w"), outbox.get_heartbeat_key("w"),
+            outbox.get_status_key("id"), outbox.get_claim_key("id")]
+    assert len({key_slot(k.encode()) for k in keys}) == 1
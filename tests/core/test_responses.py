@@ -0,0 +1,72 @@
+import asyncio
+from datetime import datetime
+
+from fastapi import FastAPI, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.testclient import TestClient
+
+from ainewsback.core.responses import FastJSONResponse, FastJSONRoute, \
+    PrebuiltResponse
+from ainewsback.schemas.base import CursorPage, resp_200
+from ainewsback.schemas.user import UserPublic
+
+
+def _page():
+    return resp_200(CursorPage[UserPublic](
+        items=[UserPublic(id=1, name="张三",
+                          created_time=datetime(2025, 1, 1, 8, 0))],
+        next_cursor="abc"))
+
+
+def test_route_serializes_models_like_jsonable_encoder():
+    """测试模型返回值直接序列化，结果与 jsonable_encoder 一致"""
+    app = FastAPI(default_response_class=FastJSONResponse)
+    app.router.route_class = FastJSONRoute
+
+    @app.get("/async")
+    async def async_endpoint():
+        return _page()
+
+    @app.get("/sync", status_code=201)
+    def sync_endpoint():
+        return _page()
+
+    @app.get("/with-response")
+    async def with_response(response: Response):
+        response.headers["X-Test"] = "1"
+        return _page()
+
+    @app.get("/dict")
+    async def dict_endpoint():
+        return {"when": datetime(2025, 1, 1), "items": [1, 2]}
+
+    client = TestClient(app)
+    expected = jsonable_encoder(_page())
+
+    response = client.get("/async")
+    assert response.json() == expected
+    assert response.headers["content-type"] == "application/json"
+    assert client.get("/sync").status_code == 201
+    assert client.get("/sync").json() == expected
+    response = client.get("/with-response")
+    assert response.headers["X-Test"] == "1"
+    assert response.json() == expected
+    assert client.get("/dict").json() == {"when": "2025-01-01T00:00:00",
+                                          "items": [1, 2]}
+
+
+def test_prebuilt_response_does_not_share_header_list():
+    """测试复用的固定响应每次发送独立的响应头列表"""
+    response = PrebuiltResponse({"code": 401}, status_code=401)
+    sent = []
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            message["headers"].append((b"x-request-id", b"1"))
+        sent.append(message)
+
+    asyncio.run(response({"type": "http"}, None, send))
+    asyncio.run(response({"type": "http"}, None, send))
+
+    assert len(response.raw_headers) == 2
+    assert sent[1]["body"] == b'{"code":401}'
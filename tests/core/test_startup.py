@@ -0,0 +1,60 @@
+import os
+import re
+import subprocess
+import sys
+
+from ainewsback.core import config
+from ainewsback.core.config import PackageMetadata, get_settings, settings
+
+# 冷启动导入 ainewsback.main 的耗时上限（毫秒），慢机器可用环境变量放宽
+IMPORT_TIME_BUDGET_MS = int(os.environ.get("IMPORT_TIME_BUDGET_MS", "4000"))
+
+PROBE = """
+import sys
+import ainewsback.main
+from ainewsback.core import database
+from ainewsback.core.reids import AsyncRedisClient
+assert database._engine is None and database._async_engine is None
+assert AsyncRedisClient._instance is None
+assert "uvicorn" not in sys.modules
+"""
+
+
+def test_import_is_fast_and_side_effect_free():
+    """测试导入应用不建连接池、不连 Redis，且在导入耗时预算内"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE],
+        capture_output=True, text=True, env=os.environ.copy(), timeout=60)
+    assert result.returncode == 0, result.stderr[-2000:]
+
+    match = re.search(r"\|\s*(\d+)\s*\|\s*ainewsback\.main$",
+                      result.stderr, re.M)
+    assert match is not None
+    cumulative_ms = int(match.group(1)) / 1000
+    assert cumulative_ms < IMPORT_TIME_BUDGET_MS, \
+        f"导入 ainewsback.main 用时 {cumulative_ms:.0f}ms"
+
+
+def test_metadata_prefers_installed_distribution(monkeypatch):
+    """测试已安装时从包元数据读取，不解析 pyproject.toml"""
+    installed = {
+        "Name": "ainewsback",
+        "Version": "9.9.9",
+        "Summary": "installed",
+        "Author": "L-Win",
+        "Author-email": "a-l_l-a@outlook.com",
+        "License-Expression": "MIT",
+    }
+    monkeypatch.setattr(config, "metadata", lambda name: installed)
+    monkeypatch.setattr(PackageMetadata, "_cache", None)
+    monkeypatch.setattr(PackageMetadata, "_from_pyproject", None)
+
+    assert PackageMetadata.get_version() == "9.9.9"
+    assert PackageMetadata.get_first_author_contact() == {
+        "name": "L-Win", "email": "a-l_l-a@outlook.com"}
+    assert PackageMetadata.get_license()["name"] == "MIT"
+
+
+def test_settings_instantiated_once():
+    """测试配置只在导入时实例化一次"""
+    assert get_settings() is settings
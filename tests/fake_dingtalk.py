@@ -0,0 +1,79 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional, Set, Tuple
+
+
+class FakeDingTalkServer:
+    """
+    本地钉钉 webhook 替身
+
+    记录收到的消息与客户端连接，可模拟响应延迟与错误码，
+    用于测试与基准测试（不访问真实钉钉）。
+    """
+
+    def __init__(self, delay: float = 0.0, errcode: int = 0,
+                 errmsg: str = "ok", port: int = 0):
+        self.delay = delay
+        self.port = port
+        self.errcode = errcode
+        self.errmsg = errmsg
+        self.messages: List[dict] = []
+        self.connections: Set[Tuple[str, int]] = set()
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/robot/send?access_token=test"
+
+    def _make_handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                with fake._lock:
+                    fake.messages.append(body)
+                    fake.connections.add(self.client_address)
+                if fake.delay:
+                    time.sleep(fake.delay)
+                payload = json.dumps({"errcode": fake.errcode,
+                                      "errmsg": fake.errmsg}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "FakeDingTalkServer":
+        self._server = ThreadingHTTPServer(("127.0.0.1", self.port),
+                                           self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "FakeDingTalkServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
@@ -0,0 +1,110 @@
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from ainewsback.api.v1.base.root import router as root_router
+from ainewsback.core.config import settings
+from ainewsback.middleware import RequestPipelineMiddleware
+from ainewsback.utils.jwt import JWTUtils
+
+
+def _create_client() -> TestClient:
+    app = FastAPI()
+    app.add_middleware(RequestPipelineMiddleware)
+
+    @app.get("/")
+    async def root():
+        return {"message": "ok"}
+
+    @app.get("/private")
+    async def private(request: Request):
+        return {
+            "sub": request.state.jwt_payload["sub"],
+            "request_id": request.state.request_id,
+        }
+
+    @app.get("/private/stream")
+    async def stream():
+        return StreamingResponse(iter([b"a", b"b"]))
+
+    return TestClient(app)
+
+
+def test_excluded_path_has_tracing_headers():
+    """测试免认证路径可访问并带有请求 ID 与耗时头"""
+    response = _create_client().get("/")
+
+    assert response.status_code == 200
+    assert response.headers["X-Request-ID"]
+    assert float(response.headers["X-Process-Time"]) >= 0
+
+
+def test_missing_or_malformed_authorization():
+    """测试缺少或格式错误的 Authorization 返回 401"""
+    client = _create_client()
+
+    response = client.get("/private")
+    assert response.status_code == 401
+    assert response.json()["errorMessage"] == "没有Authorization"
+    assert response.headers["X-Request-ID"]
+
+    response = client.get("/private", headers={"Authorization": "Basic x"})
+    assert response.status_code == 401
+    assert response.json()["errorMessage"] == "没有bearer信息"
+
+    response = client.get("/private",
+                          headers={"Authorization": "Bearer invalid"})
+    assert response.status_code == 401
+    assert response.json()["errorMessage"] == "未授权"
+
+
+def test_valid_token_sets_request_state():
+    """测试有效 Token 写入 request.state"""
+    token = JWTUtils.create_token("42")
+    response = _create_client().get(
+        "/private", headers={"Authorization": f"Bearer {token}"})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["sub"] == "42"
+    assert body["request_id"] == response.headers["X-Request-ID"]
+
+
+def test_streaming_response_passes_through():
+    """测试流式响应正常透传"""
+    token = JWTUtils.create_token("42")
+    response = _create_client().get(
+        "/private/stream", headers={"Authorization": f"Bearer {token}"})
+
+    assert response.status_code == 200
+    assert response.content == b"ab"
+    assert response.headers["X-Request-ID"]
+
+
+def _monitoring_client(host: str) -> TestClient:
+    app = FastAPI()
+    app.add_middleware(RequestPipelineMiddleware)
+    app.include_router(root_router)
+    return TestClient(app, client=(host, 50000))
+
+
+def test_monitoring_endpoints_restricted(monkeypatch):
+    """测试 /metrics、/stats 只允许白名单地址或监控令牌访问"""
+    monkeypatch.setattr(settings, "MONITORING_ALLOWED_NETWORKS",
+                        ["127.0.0.1/32", "::1/128"])
+    monkeypatch.setattr(settings, "MONITORING_TOKEN", "scrape-secret")
+    public = _monitoring_client("203.0.113.7")
+
+    for path in ("/metrics", "/stats"):
+        assert public.get(path).status_code == 403
+        user_token = JWTUtils.create_token("42")
+        assert public.get(path, headers={
+            "Authorization": f"Bearer {user_token}"}).status_code == 403
+        assert public.get(path, headers={
+            "Authorization": "Bearer scrape-secret"}).status_code == 200
+        assert _monitoring_client("127.0.0.1").get(path).status_code == 200
+
+    # 未配置令牌时空令牌不能通过
+    monkeypatch.setattr(settings, "MONITORING_TOKEN", "")
+    assert public.get("/metrics", headers={
+        "Authorization": "Bearer "}).status_code == 403
@@ -0,0 +1,109 @@
+import asyncio
+
+import pytest
+from sqlalchemy import inspect
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from ainewsback.core import database
+from ainewsback.models.user import ApUser
+from ainewsback.repositories.base import AsyncBaseRepository
+from ainewsback.repositories.unit_of_work import UnitOfWork
+
+
+def test_async_crud_round_trip(async_db):
+    """测试异步仓储的增删改查"""
+
+    async def scenario():
+        async with async_db.session() as session:
+            repo = AsyncBaseRepository(ApUser, session)
+            async with UnitOfWork(session):
+                users = [await repo.create(
+                    ApUser(name=f"u{i}", phone=f"1380000000{i}"))
+                    for i in range(3)]
+            assert [u.id for u in users] == [1, 2, 3]
+
+        async with async_db.session() as session:
+            repo = AsyncBaseRepository(ApUser, session)
+            user = await repo.get(2)
+            assert user.name == "u1"
+            assert await repo.get(99) is None
+            assert [u.id for u in await repo.get_all(skip=1, limit=1)] == [2]
+
+            async with UnitOfWork(session):
+                updated = await repo.update(user, {"name": "renamed"})
+            assert updated.name == "renamed"
+
+            async with UnitOfWork(session):
+                assert await repo.delete(3) is True
+                assert await repo.delete(3) is False
+
+        async with async_db.session() as session:
+            rows = (await session.exec(
+                select(ApUser.id, ApUser.name).order_by(ApUser.id))).all()
+        assert [tuple(r) for r in rows] == [(1, "u0"), (2, "renamed")]
+
+    async_db.run(scenario)
+
+
+def test_writes_flushed_but_not_committed_until_unit_of_work_exits(
+        tmp_path, async_db):
+    """测试仓储只 flush，事务内其他会话不可见，异常时整体回滚"""
+
+    async def scenario():
+        async with async_db.session() as session, async_db.session() as other:
+            repo = AsyncBaseRepository(ApUser, session)
+            with pytest.raises(RuntimeError):
+                async with UnitOfWork(session):
+                    user = await repo.create(
+                        ApUser(name="u", phone="13800000000"))
+                    assert user.id is not None
+                    assert (await other.exec(select(ApUser))).all() == []
+                    raise RuntimeError("boom")
+
+            assert (await session.exec(select(ApUser))).all() == []
+
+    async_db.run(scenario, f"sqlite+aiosqlite:///{tmp_path / 'uow.db'}")
+
+
+def test_async_session_lifecycle(tmp_path, monkeypatch):
+    """测试会话依赖: 按需建表、请求结束关闭会话、释放引擎后重置"""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'app.db'}")
+    monkeypatch.setattr(database, "_async_engine", engine)
+    monkeypatch.setattr(database, "_async_session_factory", None)
+
+    async def scenario():
+        await database.create_db_and_tables_async()
+        async with engine.connect() as conn:
+            tables = await conn.run_sync(
+                lambda sync_conn: inspect(sync_conn).get_table_names())
+        assert "ap_user" in tables
+
+        # 请求内提交的数据对后续会话可见
+        dependency = database.get_async_session()
+        session = await anext(dependency)
+        assert isinstance(session, AsyncSession)
+        assert session.bind is engine
+        session.add(ApUser(name="u", phone="13800000000"))
+        await session.commit()
+        await dependency.aclose()
+
+        # 未提交的写入在请求结束关闭会话时回滚，连接归还连接池
+        dependency = database.get_async_session()
+        session = await anext(dependency)
+        session.add(ApUser(name="pending", phone="13800000001"))
+        await session.flush()
+        assert engine.pool.checkedout() == 1
+        with pytest.raises(StopAsyncIteration):
+            await anext(dependency)
+        assert engine.pool.checkedout() == 0
+
+        async with database.get_async_session_factory()() as other:
+            assert (await other.exec(select(ApUser.name))).all() == ["u"]
+
+        await database.dispose_engines()
+        assert database._async_engine is None
+        assert database._async_session_factory is None
+
+    asyncio.run(scenario())
@@ -0,0 +1,115 @@
+import fakeredis
+from sqlmodel import select
+
+from ainewsback.models.user import ApUser
+from ainewsback.repositories.base import iter_chunks, ordered_ids, to_row
+from ainewsback.repositories.cache import CacheStats
+from ainewsback.repositories.unit_of_work import UnitOfWork
+from ainewsback.repositories.user_repository import AsyncUserRepository, \
+    UserCache
+
+
+def test_iter_chunks_reads_lazily():
+    """测试按块读取生成器"""
+    consumed = []
+
+    def source():
+        for i in range(7):
+            consumed.append(i)
+            yield i
+
+    chunks = iter_chunks(source(), 3)
+    assert next(chunks) == [0, 1, 2]
+    assert consumed == [0, 1, 2]
+    assert list(chunks) == [[3, 4, 5], [6]]
+
+
+def test_to_row_fills_defaults():
+    """测试字典补全默认值，未赋值主键不写入"""
+    row = to_row(ApUser, {"name": "u", "phone": "13800000000"})
+
+    assert "id" not in row
+    assert row["status"] == 0 and row["flag"] == 0
+    assert row["created_time"] is not None
+    assert to_row(ApUser, ApUser(id=5, name="u"))["id"] == 5
+
+
+def test_ordered_ids_keeps_input_order():
+    """测试 PostgreSQL 原样使用返回顺序，其他方言显式 id 取输入值、自增 id 升序对应"""
+    rows = [{"id": 7}, {}, {"id": 3}, {}]
+
+    assert ordered_ids("postgresql", rows, [7, 8, 3, 9]) == [7, 8, 3, 9]
+    assert ordered_ids("sqlite", rows, [9, 3, 8, 7]) == [7, 8, 3, 9]
+    assert ordered_ids("sqlite", [{}, {}], [12, 11]) == [11, 12]
+
+
+def test_create_many_with_explicit_ids(async_db):
+    """测试显式传入非递增 id 时按输入顺序返回，并失效对应手机号的缓存"""
+
+    async def scenario():
+        cache = UserCache(fakeredis.FakeAsyncRedis(decode_responses=True))
+        cache.stats = CacheStats()
+
+        async with async_db.session() as session:
+            repo = AsyncUserRepository(ApUser, session, cache)
+            phones = {7: "13800000007", 3: "13800000003", 5: "13800000005"}
+            for phone in phones.values():
+                assert await repo.get_by_phone(phone) is None
+
+            async with UnitOfWork(session):
+                ids = await repo.create_many(
+                    {"id": id, "name": f"u{id}", "phone": phone}
+                    for id, phone in phones.items())
+            assert ids == [7, 3, 5]
+            for id, phone in phones.items():
+                assert (await repo.get_by_phone(phone)).id == id
+
+    async_db.run(scenario)
+
+
+def test_bulk_create_update_upsert(async_db):
+    """测试批量插入、更新、按手机号 upsert 及缓存失效"""
+
+    async def scenario():
+        cache = UserCache(fakeredis.FakeAsyncRedis(decode_responses=True))
+        cache.stats = CacheStats()
+
+        async with async_db.session() as session:
+            repo = AsyncUserRepository(ApUser, session, cache)
+            uow = UnitOfWork(session)
+            # 预先写入负缓存
+            assert await repo.get_by_phone("13800000003") is None
+
+            rows = ({"name": f"u{i}", "phone": f"1380000000{i}"}
+                    for i in range(5))
+            async with uow:
+                ids = await repo.create_many(rows, chunk_size=2)
+            assert len(ids) == 5 and ids == sorted(ids)
+            assert (await repo.get_by_phone("13800000003")).id == ids[3]
+
+            async with uow:
+                assert await repo.update_many(
+                    [{"id": ids[0], "name": "renamed"},
+                     {"id": ids[3], "phone": "13900000003"}]) == 2
+            assert await repo.get_by_phone("13800000003") is None
+            assert (await repo.get(ids[3])).phone == "13900000003"
+
+            async with uow:
+                upserted = await repo.upsert_many(
+                    [ApUser(name="u1-new", phone="13800000001"),
+                     ApUser(name="u9", phone="13800000009")],
+                    conflict_columns=("phone",), update_columns=("name",))
+            assert upserted[0] == ids[1]
+            assert upserted[1] not in ids
+
+            async with uow:
+                assert await repo.copy_many(
+                    [{"name": "c1", "phone": "13700000001"}]) == 1
+
+            session.expire_all()
+            names = (await session.exec(
+                select(ApUser.name).order_by(ApUser.id))).all()
+            assert names == ["renamed", "u1-new", "u2", "u3", "u4", "u9",
+                             "c1"]
+
+    async_db.run(scenario)
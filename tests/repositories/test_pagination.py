@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlmodel import col
+
+from ainewsback.models.user import ApUser
+from ainewsback.repositories.base import decode_cursor, encode_cursor
+from ainewsback.repositories.user_repository import AsyncUserRepository
+
+
+def test_cursor_round_trip():
+    """测试游标编码与按类型还原"""
+    created = datetime(2025, 1, 2, 3, 4, 5)
+    cursor = encode_cursor([created, 42])
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor, [col(ApUser.created_time),
+                                  col(ApUser.id)]) == [created, 42]
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor", [col(ApUser.id)])
+    with pytest.raises(ValueError):
+        decode_cursor(encode_cursor([1, 2]), [col(ApUser.id)])
+
+
+@pytest.mark.parametrize("values", [
+    ["2025-01-02T03:04:05", "42"],
+    ["2025-01-02T03:04:05", None],
+    ["2025-01-02T03:04:05", True],
+    ["2025-01-02T03:04:05", 4.2],
+    ["2025-01-02T03:04:05", [42]],
+    [20250102, 42],
+    ["yesterday", 42],
+    [None, 42],
+])
+def test_cursor_values_checked_against_key_types(values):
+    """测试游标取值与排序键类型不符时报无效游标，而不是在查询时出错"""
+    with pytest.raises(ValueError, match="无效的游标"):
+        decode_cursor(encode_cursor(values), [col(ApUser.created_time),
+                                              col(ApUser.id)])
+
+
+async def _collect(fetch):
+    """依次翻页直到没有 next_cursor"""
+    pages, cursor = [], None
+    while True:
+        page = await fetch(cursor)
+        pages.append([u.id for u in page.items])
+        cursor = page.next_cursor
+        if cursor is None:
+            return pages
+
+
+def test_keyset_pages_cover_all_rows_in_order(async_db):
+    """测试游标翻页不重不漏，支持倒序与自定义排序键"""
+
+    async def scenario():
+        base = datetime(2025, 1, 1)
+        async with async_db.session() as session:
+            session.add_all([
+                ApUser(name=f"user{i:02d}", phone=f"138000000{i:02d}",
+                       created_time=base + timedelta(minutes=i % 3))
+                for i in range(11)
+            ])
+            await session.commit()
+            repo = AsyncUserRepository(ApUser, session)
+
+            pages = await _collect(lambda c: repo.get_page(4, c))
+            assert pages == [[1, 2, 3, 4], [5, 6, 7, 8], [9, 10, 11]]
+
+            pages = await _collect(
+                lambda c: repo.get_page(5, c, descending=True))
+            assert sum(pages, []) == list(range(11, 0, -1))
+
+            pages = await _collect(lambda c: repo.get_page(
+                3, c, order_by=[col(ApUser.created_time)]))
+            expected = sorted(range(1, 12), key=lambda i: ((i - 1) % 3, i))
+            assert sum(pages, []) == expected
+
+            pages = await _collect(
+                lambda c: repo.search_page("user0", 2, c))
+            assert sum(pages, []) == list(range(1, 11))
+
+    async_db.run(scenario)
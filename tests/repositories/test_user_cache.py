@@ -0,0 +1,184 @@
+import asyncio
+
+import fakeredis
+import pytest
+from redis.exceptions import RedisClusterException
+
+from ainewsback.models.user import ApUser
+from ainewsback.repositories.cache import CacheStats, TOMBSTONE_MARKER
+from ainewsback.repositories.unit_of_work import UnitOfWork
+from ainewsback.repositories.user_repository import AsyncUserRepository, \
+    UserCache
+
+
+class CountingLoader:
+    """统计回源次数"""
+
+    def __init__(self, repo: AsyncUserRepository):
+        self.calls = 0
+        self._get_by_phone = repo._get_by_phone
+
+        async def counted(phone):
+            self.calls += 1
+            return await self._get_by_phone(phone)
+
+        repo._get_by_phone = counted
+
+
+@pytest.fixture
+def cache():
+    cache = UserCache(fakeredis.FakeAsyncRedis(decode_responses=True))
+    cache.stats = CacheStats()
+    return cache
+
+
+async def _expire_tombstones(cache):
+    """模拟写入后的墓碑到期"""
+    for key in await cache.redis.keys("cache:*"):
+        if await cache.redis.get(key) == TOMBSTONE_MARKER:
+            await cache.redis.delete(key)
+
+
+def test_negative_cache_cleared_on_create(async_db, cache):
+    """测试不存在的用户被短暂缓存，创建后失效"""
+
+    async def scenario():
+        async with async_db.session() as session:
+            repo = AsyncUserRepository(ApUser, session, cache)
+            loader = CountingLoader(repo)
+
+            assert await repo.get_by_phone("13800000000") is None
+            assert await repo.get_by_phone("13800000000") is None
+            assert loader.calls == 1
+            assert cache.stats.negative_hits == 1
+
+            async with UnitOfWork(session):
+                await repo.create(ApUser(name="u1", phone="13800000000"))
+            user = await repo.get_by_phone("13800000000")
+            assert user is not None and user.name == "u1"
+            assert loader.calls == 2
+
+    async_db.run(scenario)
+
+
+def test_cached_user_served_without_db_and_updatable(async_db, cache):
+    """测试命中缓存不回源，缓存对象可直接更新且旧键失效"""
+
+    async def scenario():
+        async with async_db.session() as session:
+            repo = AsyncUserRepository(ApUser, session, cache)
+            async with UnitOfWork(session):
+                user = await repo.create(
+                    ApUser(name="u2", phone="13900000000"))
+            await _expire_tombstones(cache)
+            await repo.get(user.id)  # 回填 id 与 phone 两个键
+
+        async with async_db.session() as session:
+            repo = AsyncUserRepository(ApUser, session, cache)
+            loader = CountingLoader(repo)
+
+            cached = await repo.get_by_phone("13900000000")
+            assert loader.calls == 0
+            assert cached.id == user.id
+            assert cached.created_time == user.created_time
+
+            async with UnitOfWork(session):
+                updated = await repo.update(cached, {"phone": "13900000001"})
+            assert updated.phone == "13900000001"
+
+            assert await repo.get_by_phone("13900000000") is None
+            assert (await repo.get(user.id)).phone == "13900000001"
+            assert loader.calls == 1
+
+        assert cache.stats.stats()["hit_ratio"] > 0
+
+    async_db.run(scenario)
+
+
+def test_stale_fill_cannot_outlive_invalidation(cache):
+    """测试读取回源后、回填前发生的写入失效，旧数据不会被回填"""
+
+    async def scenario():
+        auth = cache.auth
+        phone = "13600000000"
+        stale = ApUser(id=1, name="u", phone=phone, password="old-hash")
+
+        async def stale_loader():
+            # 回源读到旧密码后，并发的改密码事务提交并失效缓存
+            await auth.invalidate(auth.keys_for(stale))
+            return stale
+
+        async def fresh_loader():
+            return ApUser(id=1, name="u", phone=phone, password="new-hash")
+
+        assert (await auth.get_or_load("phone", phone,
+                                       stale_loader)).password == "old-hash"
+        assert (await auth.get_or_load("phone", phone,
+                                       fresh_loader)).password == "new-hash"
+        assert await cache.redis.get(auth.key("phone", phone)) \
+            == TOMBSTONE_MARKER
+        assert 0 < await cache.redis.ttl(auth.key("phone", phone)) \
+            <= auth.tombstone_ttl
+
+        # 墓碑到期后恢复回填
+        await _expire_tombstones(cache)
+        await auth.get_or_load("phone", phone, fresh_loader)
+        cached = await auth.get_or_load("phone", phone, stale_loader)
+        assert cached.password == "new-hash"
+
+    asyncio.run(scenario())
+
+
+def test_tombstone_and_negative_markers_with_bytes_responses():
+    """测试 Redis 返回字节（decode_responses=False）时墓碑与负缓存同样生效"""
+
+    async def scenario():
+        cache = UserCache(fakeredis.FakeAsyncRedis(decode_responses=False))
+        cache.stats = CacheStats()
+        user = ApUser(id=1, name="u", phone="13500000000")
+
+        async def load_user():
+            return user
+
+        async def load_none():
+            return None
+
+        await cache.invalidate(cache.keys_for(user))
+        assert (await cache.get_or_load("id", 1, load_user)).name == "u"
+        assert await cache.redis.get(cache.key("id", 1)) == b"-"
+
+        assert await cache.get_or_load("id", 2, load_none) is None
+        assert await cache.get_or_load("id", 2, load_user) is None
+        assert cache.stats.negative_hits == 1
+
+        await cache.redis.delete(cache.key("id", 1))
+        await cache.get_or_load("id", 1, load_user)
+        cached = await cache.get_or_load("id", 1, load_none)
+        assert cached.phone == "13500000000"
+
+    asyncio.run(scenario())
+
+
+def test_cluster_errors_fall_back_to_database():
+    """测试集群模式异常（如 slot 未覆盖）时回源数据库"""
+
+    class BrokenClusterRedis:
+        async def get(self, key):
+            raise RedisClusterException("cluster is down")
+
+        def pipeline(self, transaction=True):
+            raise RedisClusterException("cluster is down")
+
+    async def scenario():
+        cache = UserCache(BrokenClusterRedis())
+        cache.stats = CacheStats()
+        user = ApUser(id=1, name="u", phone="13500000000")
+
+        async def load_user():
+            return user
+
+        assert await cache.get_or_load("id", 1, load_user) is user
+        await cache.invalidate(cache.keys_for(user))
+        return cache.stats.errors
+
+    assert asyncio.run(scenario()) == 2
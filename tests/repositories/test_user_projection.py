@@ -0,0 +1,100 @@
+import fakeredis
+import pytest
+
+from ainewsback.models.user import ApUser, UserStatus
+from ainewsback.repositories.cache import CacheStats, TOMBSTONE_MARKER
+from ainewsback.repositories.unit_of_work import UnitOfWork
+from ainewsback.repositories.user_repository import AUTH_FIELDS, \
+    AsyncUserRepository, UserCache
+from ainewsback.schemas.user import LoginAuthResponse, UserRead
+from ainewsback.services.user_service import UserService
+from ainewsback.utils.password import PasswordUtil
+
+
+@pytest.fixture
+def cache():
+    cache = UserCache(fakeredis.FakeAsyncRedis(decode_responses=True))
+    cache.auth.stats = CacheStats()
+    return cache
+
+
+async def _expire_tombstones(cache):
+    """模拟写入后的墓碑到期"""
+    for key in await cache.redis.keys("cache:*"):
+        if await cache.redis.get(key) == TOMBSTONE_MARKER:
+            await cache.redis.delete(key)
+
+
+def test_find_columns_returns_rows_of_named_columns(async_db):
+    """测试投影只返回指定列，单列时也返回行"""
+
+    async def scenario():
+        async with async_db.session() as session:
+            repo = AsyncUserRepository(ApUser, session)
+            async with UnitOfWork(session):
+                await repo.create_many([
+                    {"name": "a", "phone": "13800000001"},
+                    {"name": "b", "phone": "13800000002"},
+                ])
+
+            rows = await repo.find_columns(("id", "phone"),
+                                           ApUser.name == "b")
+            assert len(rows) == 1
+            assert rows[0]._fields == ("id", "phone")
+            assert rows[0].phone == "13800000002"
+
+            names = await repo.find_columns(("name",), limit=1)
+            assert names[0].name == "a"
+
+    async_db.run(scenario)
+
+
+def test_auth_projection_cached_and_invalidated_on_update(async_db, cache):
+    """测试认证投影读穿缓存，用户写入后失效，响应不含密码"""
+
+    async def scenario():
+        async with async_db.session() as session:
+            repo = AsyncUserRepository(ApUser, session, cache)
+            async with UnitOfWork(session):
+                user = await repo.create(ApUser(
+                    name="u", phone="13900000000", password="old"))
+            await _expire_tombstones(cache)
+
+            first = await repo.get_auth_by_phone("13900000000")
+            cached = await repo.get_auth_by_phone("13900000000")
+            assert first._fields == AUTH_FIELDS
+            assert tuple(cached) == tuple(first)
+            assert cache.auth.stats.hits == 1
+
+            async with UnitOfWork(session):
+                await repo.update_many([{"id": user.id, "password": "new"}])
+            assert (await repo.get_auth_by_phone(
+                "13900000000")).password == "new"
+
+            body = LoginAuthResponse(user=UserRead.model_validate(cached),
+                                     token="t").model_dump()
+            assert body["user"] == {"id": user.id, "phone": "13900000000"}
+
+    async_db.run(scenario)
+
+
+def test_locked_user_cannot_login(async_db, cache):
+    """测试锁定用户密码正确也拒绝登录"""
+
+    async def scenario():
+        async with async_db.session() as session:
+            session.add(ApUser(
+                name="locked", phone="13700000000",
+                status=UserStatus.LOCKED,
+                password=PasswordUtil.hash_password("secret")))
+            await session.commit()
+
+            service = UserService(UnitOfWork(session), verification=None,
+                                  cache=cache)
+            user, token, error = await service.authenticate_by_password(
+                "13700000000", "secret")
+
+        assert user is None and token is None
+        assert error == "用户已锁定"
+
+    async_db.run(scenario)
@@ -0,0 +1,52 @@
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateIndex
+
+from ainewsback.models.user import ApUser
+from ainewsback.repositories.user_repository import AsyncUserRepository, \
+    build_search_statement
+
+
+def test_indexes_compile_for_postgresql():
+    """测试手机号唯一索引与用户名三元组索引"""
+    ddl = {index.name: str(CreateIndex(index).compile(
+        dialect=postgresql.dialect())) for index in ApUser.__table__.indexes}
+
+    assert "CREATE UNIQUE INDEX" in ddl["ix_ap_user_phone"]
+    assert "varchar_pattern_ops" in ddl["ix_ap_user_phone"]
+    assert "USING gin (name gin_trgm_ops)" in ddl["ix_ap_user_name_trgm"]
+
+
+def test_search_statement_uses_ilike_and_similarity():
+    """测试 PostgreSQL 下使用 ILIKE 并按相似度排序"""
+    statement = build_search_statement("138", 0, 20, "postgresql")
+    sql = str(statement.compile(dialect=postgresql.dialect()))
+
+    assert sql.count("ILIKE") >= 1
+    assert "similarity(ap_user.name" in sql
+    assert build_search_statement("  ", 0, 20, "postgresql") is None
+
+
+def test_search_users_matches_phone_prefix_and_ranks(async_db):
+    """测试按手机号前缀与用户名搜索，并按相关度排序、转义通配符"""
+
+    async def scenario():
+        async with async_db.session() as session:
+            session.add_all([
+                ApUser(name="xx_alice", phone="13900000001"),
+                ApUser(name="alice", phone="13900000002"),
+                ApUser(name="alice_w", phone="13900000003"),
+                ApUser(name="bob", phone="13800000004"),
+                ApUser(name="a%b", phone="13700000005"),
+            ])
+            await session.commit()
+
+            repo = AsyncUserRepository(ApUser, session)
+            names = [u.name for u in await repo.search_users("alice")]
+            assert names == ["alice", "alice_w", "xx_alice"]
+
+            phones = [u.phone for u in await repo.search_users("1380")]
+            assert phones == ["13800000004"]
+
+            assert [u.name for u in await repo.search_users("%")] == ["a%b"]
+
+    async_db.run(scenario)
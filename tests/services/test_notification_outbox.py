@@ -0,0 +1,237 @@
+import asyncio
+import json
+import logging
+import time
+
+import fakeredis
+import pytest
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from ainewsback.core.config import settings
+from ainewsback.services.notification_outbox import NotificationOutbox, \
+    OutboxWorker, STATUS_DELIVERED, STATUS_EXPIRED, STATUS_FAILED, \
+    STATUS_RETRYING, STATUS_UNKNOWN
+from ainewsback.utils.dingtalk_robot import SendOutcome
+
+
+class FakeNotifier:
+    """按顺序返回预设结果的通知器，记录发送次数"""
+
+    def __init__(self, *results, delay: float = 0.0):
+        self.robots = []
+        self.results = list(results)
+        self.delay = delay
+        self.sent = []
+
+    async def send_verification_code(self, mobile, code, scene):
+        self.sent.append((mobile, code, scene))
+        await asyncio.sleep(self.delay)
+        return (self.results.pop(0) if self.results
+                else (SendOutcome.SENT, "ok"))
+
+
+@pytest.fixture(autouse=True)
+def outbox_settings(monkeypatch):
+    monkeypatch.setattr(settings, "DINGTALK_BATCH_ENABLED", False)
+    monkeypatch.setattr(settings, "CODE_EXPIRE_SECONDS", 300)
+    monkeypatch.setattr(settings, "NOTIFY_OUTBOX_MAX_ATTEMPTS", 3)
+    monkeypatch.setattr(settings, "NOTIFY_OUTBOX_RETRY_BASE_SECONDS", 10.0)
+    monkeypatch.setattr(settings, "NOTIFY_OUTBOX_RETRY_MAX_SECONDS", 15.0)
+    monkeypatch.setattr(settings, "NOTIFY_OUTBOX_WORKER_TTL", 30)
+
+
+def make_worker(notifier: FakeNotifier):
+    client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    blmove = client.blmove
+
+    async def blocking_blmove(*args, **kwargs):
+        # fakeredis 的 BLMOVE 不会阻塞等待，队列为空时让出事件循环
+        result = await blmove(*args, **kwargs)
+        if result is None:
+            await asyncio.sleep(0.01)
+        return result
+
+    client.blmove = blocking_blmove
+    outbox = NotificationOutbox(client)
+    return client, outbox, OutboxWorker(outbox, notifier)
+
+
+def make_message(expires_in: float = 300.0, attempts: int = 0) -> dict:
+    return {"id": "m1", "mobile": "13800000000", "code": "123456",
+            "scene": "login", "attempts": attempts,
+            "expires_at": time.time() + expires_in}
+
+
+def test_failed_send_retries_with_backoff():
+    """测试明确失败（含连接池超时）时释放占位并按指数退避重试，超过次数后标记失败"""
+    async def scenario():
+        notifier = FakeNotifier((SendOutcome.FAILED, "err1"),
+                                (SendOutcome.FAILED, "连接超时: PoolTimeout"),
+                                (SendOutcome.FAILED, "err3"))
+        client, outbox, worker = make_worker(notifier)
+
+        message = make_message()
+        delays = []
+        for _ in range(2):
+            now = time.time()
+            await worker._deliver(message)
+            [(raw, due)] = await client.zrange(outbox.RETRY_KEY, 0, -1,
+                                               withscores=True)
+            await client.zrem(outbox.RETRY_KEY, raw)
+            delays.append(due - now)
+            message = json.loads(raw)
+            assert not await client.exists(outbox.get_claim_key("m1"))
+            status = await outbox.get_status("m1")
+            assert status["status"] == STATUS_RETRYING
+            assert status["attempts"] == str(message["attempts"])
+
+        await worker._deliver(message)
+        status = await outbox.get_status("m1")
+        retry = await client.zcard(outbox.RETRY_KEY)
+        await client.aclose()
+        return delays, status, retry, len(notifier.sent)
+
+    delays, status, retry, sent = asyncio.run(scenario())
+    # 基数 10 秒、上限 15 秒，±20% 抖动
+    assert 8.0 <= delays[0] <= 12.5
+    assert 12.0 <= delays[1] <= 18.5
+    assert status["status"] == STATUS_FAILED
+    assert status["error"] == "err3"
+    assert retry == 0
+    assert sent == 3
+
+
+def test_claim_sends_at_most_once():
+    """测试同一消息被并发投递时只发送一次"""
+    async def scenario():
+        notifier = FakeNotifier(delay=0.05)
+        client, outbox, worker = make_worker(notifier)
+        message = make_message()
+        await asyncio.gather(worker._deliver(dict(message)),
+                             worker._deliver(dict(message)))
+        await worker._deliver(dict(message))
+        status = await outbox.get_status("m1")
+        await client.aclose()
+        return len(notifier.sent), status["status"]
+
+    assert asyncio.run(scenario()) == (1, STATUS_DELIVERED)
+
+
+def test_expired_message_not_sent():
+    """测试过期消息不再发送"""
+    async def scenario():
+        notifier = FakeNotifier()
+        client, outbox, worker = make_worker(notifier)
+        await worker._deliver(make_message(expires_in=-1, attempts=2))
+        status = await outbox.get_status("m1")
+        await client.aclose()
+        return len(notifier.sent), status
+
+    sent, status = asyncio.run(scenario())
+    assert sent == 0
+    assert status["status"] == STATUS_EXPIRED
+    assert status["attempts"] == "2"
+
+
+def test_timeout_marks_unknown_without_retry():
+    """测试读/写超时标记为未知，保留占位且不重试"""
+    async def scenario():
+        notifier = FakeNotifier((SendOutcome.UNKNOWN, "发送超时"))
+        client, outbox, worker = make_worker(notifier)
+        await worker._deliver(make_message())
+        await worker._deliver(make_message())
+        status = await outbox.get_status("m1")
+        claimed = await client.exists(outbox.get_claim_key("m1"))
+        retry = await client.zcard(outbox.RETRY_KEY)
+        await client.aclose()
+        return len(notifier.sent), status["status"], claimed, retry
+
+    assert asyncio.run(scenario()) == (1, STATUS_UNKNOWN, 1, 0)
+
+
+def test_recovers_only_dead_workers():
+    """测试只回收心跳过期 worker 的处理中消息，不影响存活 worker"""
+    async def scenario():
+        client, outbox, worker = make_worker(FakeNotifier())
+        await client.sadd(outbox.WORKERS_KEY, "dead", "alive")
+        await client.lpush(outbox.get_processing_key("dead"), "a", "b")
+        await client.lpush(outbox.get_processing_key("alive"), "c")
+        await client.set(outbox.get_heartbeat_key("alive"), "1", ex=30)
+
+        moved = await worker.recover_dead_workers()
+        queue = await client.lrange(outbox.QUEUE_KEY, 0, -1)
+        alive = await client.lrange(outbox.get_processing_key("alive"), 0, -1)
+        workers = await client.smembers(outbox.WORKERS_KEY)
+        await client.aclose()
+        return moved, sorted(queue), alive, workers
+
+    assert asyncio.run(scenario()) == (2, ["a", "b"], ["c"], {"alive"})
+
+
+def test_worker_start_does_not_steal_inflight_messages():
+    """测试新 worker 启动时只回收崩溃 worker 的消息，不抢存活 worker 的消息"""
+    async def scenario():
+        slow = FakeNotifier(delay=0.3)
+        client, outbox, first = make_worker(slow)
+        first.start()
+        await outbox.enqueue("13800000001", "111111")
+        while not slow.sent:
+            await asyncio.sleep(0.01)
+
+        # 崩溃的 worker: 已登记但没有心跳，处理中队列遗留一条消息
+        crashed = make_message()
+        crashed["id"] = "crashed"
+        await client.sadd(outbox.WORKERS_KEY, "crashed-worker")
+        await client.lpush(outbox.get_processing_key("crashed-worker"),
+                           json.dumps(crashed))
+
+        fast = FakeNotifier()
+        second = OutboxWorker(outbox, fast)
+        second.start()
+        while not fast.sent:
+            await asyncio.sleep(0.01)
+        await first.stop()
+        await second.stop()
+
+        leftovers = [await client.llen(outbox.get_processing_key(w.worker_id))
+                     for w in (first, second)]
+        workers = await client.smembers(outbox.WORKERS_KEY)
+        await client.aclose()
+        return slow.sent, fast.sent, leftovers, workers
+
+    slow_sent, fast_sent, leftovers, workers = asyncio.run(scenario())
+    assert [mobile for mobile, _, _ in slow_sent] == ["13800000001"]
+    assert [mobile for mobile, _, _ in fast_sent] == ["13800000000"]
+    assert leftovers == [0, 0]
+    assert workers == set()
+
+
+def test_worker_start_retries_when_redis_unavailable(caplog):
+    """测试启动时 Redis 不可用会记录日志并重试，恢复后正常投递"""
+    async def scenario():
+        notifier = FakeNotifier()
+        client, outbox, worker = make_worker(notifier)
+        heartbeat = worker._heartbeat
+        failures = []
+
+        async def flaky_heartbeat():
+            if not failures:
+                failures.append(1)
+                raise RedisConnectionError("Connection refused")
+            await heartbeat()
+
+        worker._heartbeat = flaky_heartbeat
+        worker.start()
+        await outbox.enqueue("13800000000", "123456")
+        for _ in range(500):
+            if notifier.sent:
+                break
+            await asyncio.sleep(0.01)
+        await worker.stop()
+        await client.aclose()
+        return notifier.sent
+
+    with caplog.at_level(logging.ERROR):
+        sent = asyncio.run(scenario())
+    assert [mobile for mobile, _, _ in sent] == ["13800000000"]
+    assert "Connection refused" in caplog.text
@@ -0,0 +1,139 @@
+import pytest
+from sqlalchemy import event
+from sqlmodel import select
+
+from ainewsback.models.user import ApUser
+from ainewsback.repositories.unit_of_work import UnitOfWork, after_commit
+from ainewsback.repositories.user_repository import AsyncUserRepository
+from ainewsback.services.user_service import UserService
+from ainewsback.utils.password import PasswordUtil
+
+
+class StatementCounter:
+    """统计引擎执行的 SQL 语句与提交次数"""
+
+    def __init__(self, engine):
+        self.statements = []
+        self.commits = 0
+        event.listen(engine.sync_engine, "before_cursor_execute",
+                     self._on_execute)
+        event.listen(engine.sync_engine, "commit", self._on_commit)
+
+    def _on_execute(self, conn, cursor, statement, *args):
+        self.statements.append(statement.split()[0].upper())
+
+    def _on_commit(self, conn):
+        self.commits += 1
+
+    def reset(self):
+        self.statements.clear()
+        self.commits = 0
+
+
+def test_password_login_upgrade_commits_once_without_refresh(async_db):
+    """测试登录升级密码哈希: 一次查询 + 一次更新，一次提交，无 refresh"""
+
+    async def scenario():
+        salt = PasswordUtil.generate_salt()
+        async with async_db.session() as session:
+            session.add(ApUser(
+                name="legacy", phone="13800000000", salt=salt,
+                password=PasswordUtil.hash_legacy_password("secret", salt)))
+            await session.commit()
+
+        counter = StatementCounter(async_db.engine)
+        async with async_db.session() as session:
+            service = UserService(UnitOfWork(session), verification=None)
+            user, token, error = await service.authenticate_by_password(
+                "13800000000", "secret")
+
+        assert error == "" and token
+        assert counter.statements == ["SELECT", "UPDATE"]
+        assert counter.commits == 1
+        async with async_db.session() as session:
+            stored = (await session.exec(select(ApUser.password))).one()
+        assert not PasswordUtil.is_legacy_hash(stored)
+
+    async_db.run(scenario)
+
+
+def test_unit_of_work_is_atomic_and_nests(async_db):
+    """测试嵌套只在最外层提交，异常时整体回滚且不执行提交后回调"""
+
+    async def scenario():
+        counter = StatementCounter(async_db.engine)
+        called = []
+
+        async def callback():
+            called.append(True)
+
+        async with async_db.session() as session:
+            uow = UnitOfWork(session)
+            repo = AsyncUserRepository(ApUser, session)
+
+            with pytest.raises(RuntimeError):
+                async with uow:
+                    await repo.create(ApUser(name="a", phone="13800000001"))
+                    after_commit(session, callback)
+                    raise RuntimeError("boom")
+            assert counter.commits == 0 and not called
+
+            async with uow:
+                async with uow:
+                    await repo.create(ApUser(name="b", phone="13800000002"))
+                    after_commit(session, callback)
+                assert counter.commits == 0
+                await repo.create(ApUser(name="c", phone="13800000003"))
+            assert counter.commits == 1 and called == [True]
+
+            names = (await session.exec(select(ApUser.name))).all()
+            assert sorted(names) == ["b", "c"]
+
+    async_db.run(scenario)
+
+
+def test_code_login_get_or_create_is_race_free(async_db):
+    """测试已有用户只查询一次；并发插入冲突时回退查询且不重复创建"""
+
+    async def scenario():
+        calls = []
+
+        async def defaults():
+            calls.append(True)
+            return {"name": "new_user", "password": "x"}
+
+        async with async_db.session() as session:
+            session.add(ApUser(name="old", phone="13800000000"))
+            await session.commit()
+
+        counter = StatementCounter(async_db.engine)
+        async with async_db.session() as session:
+            repo = AsyncUserRepository(ApUser, session)
+            async with UnitOfWork(session):
+                user, created = await repo.get_or_create_by_phone(
+                    "13800000000", defaults)
+        assert (user.name, created) == ("old", False)
+        assert counter.statements == ["SELECT"] and not calls
+
+        async with async_db.session() as session:
+            repo = AsyncUserRepository(ApUser, session)
+            async with UnitOfWork(session):
+                user, created = await repo.get_or_create_by_phone(
+                    "13900000000", defaults)
+            assert (user.name, created) == ("new_user", True)
+            assert user.id is not None and len(calls) == 1
+
+            # 模拟另一请求在查询之后、插入之前完成注册
+            async def stale_lookup(phone):
+                return None
+
+            repo.get_by_phone = stale_lookup
+            async with UnitOfWork(session):
+                again, created = await repo.get_or_create_by_phone(
+                    "13900000000", defaults)
+            assert (again.id, created) == (user.id, False)
+
+            phones = (await session.exec(select(ApUser.phone))).all()
+            assert sorted(phones) == ["13800000000", "13900000000"]
+
+    async_db.run(scenario)
@@ -0,0 +1,119 @@
+import asyncio
+
+import fakeredis
+import pytest
+
+from ainewsback.services.notification_outbox import NotificationOutbox
+from ainewsback.services.verification import VerificationService
+
+# SEND_CODE_SCRIPT / VERIFY_CODE_SCRIPT 需要 fakeredis 的 Lua 支持
+pytest.importorskip("lupa")
+
+MOBILE = "13800000000"
+
+
+def run_with_service(scenario):
+    """在 fakeredis 上运行场景（验证码经发件箱入队，不调用钉钉）"""
+    async def run():
+        client = fakeredis.FakeAsyncRedis(decode_responses=True)
+        try:
+            return await scenario(
+                client, VerificationService(client, NotificationOutbox(client)))
+        finally:
+            await client.aclose()
+
+    return asyncio.run(run())
+
+
+def wrong_code(code: str) -> str:
+    return "".join(str((int(c) + 1) % 10) for c in code)
+
+
+def test_send_code_rate_limited():
+    """测试频率限制内重复发送被拒绝，且不覆盖已保存的验证码"""
+    async def scenario(client, service):
+        first = await service.send_code(MOBILE)
+        second = await service.send_code(MOBILE)
+        stored = await client.get(service._get_code_key(MOBILE, "login"))
+        allowed, wait = await service.check_rate_limit(MOBILE)
+        queued = await client.llen(NotificationOutbox.QUEUE_KEY)
+        return first, second, stored, allowed, wait, queued
+
+    first, second, stored, allowed, wait, queued = run_with_service(scenario)
+    assert first[0] is True and len(first[2]) == 6
+    assert second[0] is False and "发送过于频繁" in second[1]
+    assert stored == first[2]
+    assert allowed is False and 0 < wait <= 60
+    assert queued == 1
+
+
+def test_resend_resets_attempts():
+    """测试频率限制过后重新发送会清零失败次数"""
+    async def scenario(client, service):
+        _, _, code = await service.send_code(MOBILE)
+        await service.verify_code(MOBILE, wrong_code(code))
+        await client.delete(service._get_rate_limit_key(MOBILE))
+        _, _, code = await service.send_code(MOBILE)
+        return await client.exists(service._get_attempt_key(MOBILE, "login"))
+
+    assert run_with_service(scenario) == 0
+
+
+def test_wrong_code_counts_attempts_then_locks():
+    """测试错误验证码计数，超过次数后锁定并删除验证码"""
+    async def scenario(client, service):
+        _, _, code = await service.send_code(MOBILE)
+        results = [await service.verify_code(MOBILE, wrong_code(code))
+                   for _ in range(3)]
+        results.append(await service.verify_code(MOBILE, code))
+        results.append(await service.verify_code(MOBILE, code))
+        return results
+
+    results = run_with_service(scenario)
+    assert [ok for ok, _ in results] == [False] * 5
+    assert [message for _, message in results[:3]] == [
+        "验证码错误，还有 2 次尝试机会",
+        "验证码错误，还有 1 次尝试机会",
+        "验证码错误，还有 0 次尝试机会",
+    ]
+    assert results[3][1] == "验证失败次数过多，请重新获取验证码"
+    assert results[4][1] == "验证码不存在或已过期"
+
+
+def test_code_is_single_use():
+    """测试验证成功后验证码与失败次数一并删除"""
+    async def scenario(client, service):
+        _, _, code = await service.send_code(MOBILE)
+        await service.verify_code(MOBILE, wrong_code(code))
+        first = await service.verify_code(MOBILE, code)
+        second = await service.verify_code(MOBILE, code)
+        leftover = await client.exists(
+            service._get_code_key(MOBILE, "login"),
+            service._get_attempt_key(MOBILE, "login"))
+        return first, second, leftover
+
+    first, second, leftover = run_with_service(scenario)
+    assert first == (True, "验证成功")
+    assert second == (False, "验证码不存在或已过期")
+    assert leftover == 0
+
+
+def test_concurrent_verify():
+    """测试并发验证: 正确验证码只成功一次，并发猜测不超过最大次数"""
+    async def scenario(client, service):
+        _, _, code = await service.send_code(MOBILE)
+        correct = await asyncio.gather(
+            *(service.verify_code(MOBILE, code) for _ in range(10)))
+
+        await client.delete(service._get_rate_limit_key(MOBILE))
+        _, _, code = await service.send_code(MOBILE)
+        guesses = await asyncio.gather(
+            *(service.verify_code(MOBILE, wrong_code(code))
+              for _ in range(10)))
+        after = await service.verify_code(MOBILE, code)
+        return correct, guesses, after
+
+    correct, guesses, after = run_with_service(scenario)
+    assert sum(ok for ok, _ in correct) == 1
+    assert sum("验证码错误" in message for _, message in guesses) == 3
+    assert after[0] is False
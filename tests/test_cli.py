@@ -0,0 +1,133 @@
+import os
+import subprocess
+import sys
+
+import uvicorn
+from sqlalchemy import create_engine, inspect
+
+from ainewsback import cli
+from ainewsback.core import database
+from ainewsback.core.config import settings
+
+
+def test_serve_passes_server_options(monkeypatch):
+    """测试 serve 把进程数与调优参数交给 uvicorn，并通过环境变量告知 worker"""
+    calls = []
+    monkeypatch.setattr(uvicorn, "run",
+                        lambda app, **options: calls.append((app, options)))
+    monkeypatch.setattr(settings, "SERVER_WORKERS", settings.SERVER_WORKERS)
+    monkeypatch.delenv("SERVER_WORKERS", raising=False)
+
+    assert cli.main(["serve", "--workers", "4", "--backlog", "4096",
+                     "--keep-alive", "15", "--limit-concurrency", "500",
+                     "--graceful-timeout", "10", "--loop", "asyncio",
+                     "--http", "h11"]) == 0
+
+    app, options = calls[0]
+    assert app == "ainewsback.main:app"
+    assert options["workers"] == 4
+    assert options["backlog"] == 4096
+    assert options["timeout_keep_alive"] == 15
+    assert options["limit_concurrency"] == 500
+    assert options["timeout_graceful_shutdown"] == 10
+    assert (options["loop"], options["http"]) == ("asyncio", "h11")
+    assert os.environ["SERVER_WORKERS"] == "4"
+    assert settings.SERVER_WORKERS == 4
+
+    assert cli.main(["serve", "--workers", "2", "--reload"]) == 2
+    assert len(calls) == 1
+
+
+def test_resolve_implementation_falls_back():
+    """测试 auto 时按模块是否安装选择实现"""
+    assert cli.resolve_implementation("auto", "json", "asyncio") == "json"
+    assert cli.resolve_implementation(
+        "auto", "not_installed_module", "asyncio") == "asyncio"
+    assert cli.resolve_implementation("h11", "httptools", "h11") == "h11"
+
+
+def test_pool_budget_split_across_workers(monkeypatch):
+    """测试 DB_MAX_CONNECTIONS 按 worker 数均分到每个进程的连接池"""
+    monkeypatch.setattr(settings, "SERVER_WORKERS", 4)
+    monkeypatch.setattr(settings, "DB_POOL_SIZE", 10)
+    monkeypatch.setattr(settings, "DB_MAX_OVERFLOW", 10)
+    monkeypatch.setattr(settings, "DB_MAX_CONNECTIONS", 24)
+
+    options = database._engine_options()
+    assert (options["pool_size"], options["max_overflow"]) == (6, 0)
+
+    monkeypatch.setattr(settings, "DB_MAX_CONNECTIONS", 0)
+    options = database._engine_options()
+    assert (options["pool_size"], options["max_overflow"]) == (10, 10)
+
+
+MIGRATE_PROBE = """
+import sys
+from sqlalchemy import create_engine
+from ainewsback import cli
+from ainewsback.core import database
+database._engine = create_engine(sys.argv[1])
+assert "ainewsback.models.user" not in sys.modules
+sys.exit(cli.main(["migrate"]))
+"""
+
+
+def test_migrate_creates_tables(tmp_path):
+    """测试 migrate 在全新进程中（未预先导入模型）也会建表"""
+    url = f"sqlite:///{tmp_path / 'migrate.db'}"
+    result = subprocess.run(
+        [sys.executable, "-c", MIGRATE_PROBE, url], capture_output=True,
+        text=True, env=os.environ.copy(), timeout=60)
+    assert result.returncode == 0, result.stderr[-2000:]
+
+    engine = create_engine(url)
+    assert "ap_user" in inspect(engine).get_table_names()
+    engine.dispose()
+
+
+def test_widen_legacy_password_column(tmp_path):
+    """测试对历史库 password varchar(32) 生成放宽到模型长度的语句"""
+    from ainewsback.models.user import ApUser
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            "CREATE TABLE ap_user (id INTEGER PRIMARY KEY, "
+            "name VARCHAR(20), password VARCHAR(32), phone VARCHAR(11))")
+        columns = inspect(conn).get_columns("ap_user")
+    engine.dispose()
+
+    assert database.widen_column_statements(ApUser.__table__, columns) == [
+        "ALTER TABLE ap_user ALTER COLUMN password TYPE varchar(128)"]
+    current = [{"name": c.name, "type": c.type}
+               for c in ApUser.__table__.columns]
+    assert database.widen_column_statements(ApUser.__table__, current) == []
+
+
+def test_migrate_adds_indexes_to_existing_table(tmp_path, monkeypatch,
+                                                capsys):
+    """测试 migrate 为已有表补建索引，手机号重复时报错退出"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            "CREATE TABLE ap_user (id INTEGER PRIMARY KEY, "
+            "name VARCHAR(20), password VARCHAR(32), phone VARCHAR(11))")
+        conn.exec_driver_sql(
+            "INSERT INTO ap_user (name, phone) VALUES "
+            "('a', '13800000000'), ('b', '13800000000'), ('c', NULL), "
+            "('d', NULL)")
+    monkeypatch.setattr(database, "_engine", engine)
+
+    assert cli.main(["migrate"]) == 1
+    assert "ix_ap_user_phone" in capsys.readouterr().err
+    assert inspect(engine).get_indexes("ap_user") == []
+
+    with engine.begin() as conn:
+        conn.exec_driver_sql("DELETE FROM ap_user WHERE name = 'b'")
+    assert cli.main(["migrate"]) == 0
+    assert cli.main(["migrate"]) == 0
+    indexes = {index["name"]: index["unique"]
+               for index in inspect(engine).get_indexes("ap_user")}
+    engine.dispose()
+    assert indexes == {"ix_ap_user_phone": True,
+                       "ix_ap_user_name_trgm": False}
@@ -0,0 +1,183 @@
+import asyncio
+
+import fakeredis
+import httpx
+import pytest
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from ainewsback.core.config import settings
+from ainewsback.utils.dingtalk_robot import CoalescingNotifier, \
+    DingTalkRobot, RedisTokenBucket, RobotPool, SendOutcome, TokenBucket
+from tests.fake_dingtalk import FakeDingTalkServer
+
+
+def test_shared_client_reuses_connection():
+    """测试共享客户端通过长连接复用同一个 TCP 连接"""
+
+    async def run(url: str):
+        async with httpx.AsyncClient() as client:
+            robot = DingTalkRobot(url, secret="secret", client=client)
+            return [await robot.send_text(f"msg {i}") for i in range(10)]
+
+    with FakeDingTalkServer() as server:
+        results = asyncio.run(run(server.url))
+
+        assert all(outcome is SendOutcome.SENT for outcome, _ in results)
+        assert len(server.messages) == 10
+        assert len(server.connections) == 1
+
+
+def test_concurrency_capped_by_pool_limit():
+    """测试突发发送时并发连接数不超过连接池上限"""
+
+    async def run(url: str):
+        limits = httpx.Limits(max_connections=3)
+        async with httpx.AsyncClient(limits=limits) as client:
+            robot = DingTalkRobot(url, client=client)
+            return await asyncio.gather(
+                *(robot.send_text(f"msg {i}") for i in range(30)))
+
+    with FakeDingTalkServer(delay=0.01) as server:
+        results = asyncio.run(run(server.url))
+
+        assert all(outcome is SendOutcome.SENT for outcome, _ in results)
+        assert len(server.connections) <= 3
+
+
+def test_error_code_reported():
+    """测试钉钉返回错误码时返回失败信息"""
+
+    async def run(url: str):
+        async with httpx.AsyncClient() as client:
+            return await DingTalkRobot(url, client=client).send_text("msg")
+
+    with FakeDingTalkServer(errcode=660026, errmsg="send too fast") as server:
+        outcome, message = asyncio.run(run(server.url))
+
+    assert outcome is SendOutcome.FAILED
+    assert "send too fast" in message
+
+
+@pytest.mark.parametrize("error, expected", [
+    (httpx.ConnectTimeout("connect"), SendOutcome.FAILED),
+    (httpx.PoolTimeout("pool"), SendOutcome.FAILED),
+    (httpx.ReadTimeout("read"), SendOutcome.UNKNOWN),
+    (httpx.WriteTimeout("write"), SendOutcome.UNKNOWN),
+])
+def test_timeout_outcome(error, expected):
+    """测试请求未发出的超时可重试，已发出未收到响应的超时结果未知"""
+
+    def handler(request):
+        raise error
+
+    async def run():
+        transport = httpx.MockTransport(handler)
+        async with httpx.AsyncClient(transport=transport) as client:
+            return await DingTalkRobot("http://dingtalk.test/send",
+                                       client=client).send_text("msg")
+
+    outcome, _ = asyncio.run(run())
+    assert outcome is expected
+
+
+def test_token_bucket_limits_burst():
+    """测试令牌桶在周期内最多放行 rate 个请求"""
+    bucket = TokenBucket(rate=3, per=60)
+
+    assert [bucket.try_acquire() for _ in range(4)] == [True, True, True,
+                                                        False]
+    assert bucket.wait_time() > 0
+
+
+def test_coalescing_notifier_batches_codes():
+    """测试窗口内的验证码合并为一条 Markdown 消息"""
+
+    async def run(url: str):
+        async with httpx.AsyncClient() as client:
+            pool = RobotPool([DingTalkRobot(url, client=client)], rate=20)
+            notifier = CoalescingNotifier(pool, window=0.05, max_size=20)
+            results = await asyncio.gather(*(
+                notifier.send_verification_code(f"1380000000{i}", f"00000{i}")
+                for i in range(10)))
+            await notifier.close()
+            return results
+
+    with FakeDingTalkServer() as server:
+        results = asyncio.run(run(server.url))
+
+        assert all(outcome is SendOutcome.SENT for outcome, _ in results)
+        assert len(server.messages) == 1
+        text = server.messages[0]["markdown"]["text"]
+        assert all(f"`00000{i}`" in text for i in range(10))
+
+
+def test_robot_pool_spreads_load_when_limited():
+    """测试单个机器人额度耗尽后轮换到其他机器人"""
+
+    async def run(urls):
+        async with httpx.AsyncClient() as client:
+            pool = RobotPool([DingTalkRobot(url, client=client)
+                              for url in urls], rate=2)
+            for i in range(4):
+                robot = await pool.acquire()
+                await robot.send_text(f"msg {i}")
+
+    with FakeDingTalkServer() as first, FakeDingTalkServer() as second:
+        asyncio.run(run([first.url, second.url]))
+
+        assert len(first.messages) == 2
+        assert len(second.messages) == 2
+
+
+def test_shared_bucket_limits_across_workers():
+    """测试经 Redis 共享额度时，多个 worker 合计不超过 rate"""
+    pytest.importorskip("lupa")
+
+    async def run():
+        client = fakeredis.FakeAsyncRedis(decode_responses=True)
+        robots = [DingTalkRobot("http://robot/a")]
+        workers = [RobotPool(robots, rate=3, shared=True, redis_client=client)
+                   for _ in range(2)]
+        waits = [await workers[i % 2]._robots[0][1].reserve()
+                 for i in range(4)]
+        await client.aclose()
+        return waits
+
+    waits = asyncio.run(run())
+    assert waits[:3] == [0.0, 0.0, 0.0]
+    # 每分钟 3 个令牌，约 20 秒补充一个
+    assert 19.0 < waits[3] <= 20.0
+
+
+class BrokenRedis:
+    def register_script(self, script):
+        raise RedisConnectionError("connection refused")
+
+
+def test_redis_bucket_falls_back_to_per_worker_share(monkeypatch):
+    """测试 Redis 不可用时退化为按 worker 均分的进程内限流"""
+    monkeypatch.setattr(settings, "SERVER_WORKERS", 2)
+    bucket = RedisTokenBucket("dingtalk:rate_limit:test", rate=4,
+                              redis_client=BrokenRedis())
+
+    async def run():
+        return [await bucket.reserve() for _ in range(3)]
+
+    waits = asyncio.run(run())
+
+    assert waits[:2] == [0.0, 0.0]
+    assert waits[2] > 0
+
+
+def test_unshared_pool_splits_rate_per_worker(monkeypatch):
+    """测试不共享额度时每个 worker 只使用 rate / SERVER_WORKERS"""
+    monkeypatch.setattr(settings, "DINGTALK_RATE_LIMIT_SHARED", False)
+    monkeypatch.setattr(settings, "DINGTALK_RATE_LIMIT_PER_MINUTE", 20)
+    monkeypatch.setattr(settings, "SERVER_WORKERS", 4)
+    monkeypatch.setattr(settings, "DINGTALK_ROBOTS", [])
+
+    pool = RobotPool.from_settings()
+
+    [(_, bucket)] = pool._robots
+    assert isinstance(bucket, TokenBucket)
+    assert bucket.capacity == 5
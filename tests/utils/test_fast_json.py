@@ -0,0 +1,34 @@
+import json
+
+import pytest
+
+from ainewsback.utils import fast_json
+
+
+@pytest.fixture(params=["orjson", "json"])
+def backend(request, monkeypatch):
+    """分别使用 orjson 与标准库 json 两种实现"""
+    if request.param == "orjson":
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(fast_json, "orjson", None)
+    return request.param
+
+
+def test_dumps_compact_utf8(backend):
+    """测试输出紧凑、中文不转义，非字符串键与未知类型转为字符串"""
+    data = {"msg": "处理失败", 1: [1.5, None, True], "obj": object}
+
+    text = fast_json.dumps(data)
+
+    assert text.startswith('{"msg":"处理失败","1":[1.5,null,true],"obj":"')
+    assert json.loads(text)["obj"] == str(object)
+    assert fast_json.dumps_bytes(data) == text.encode("utf-8")
+
+
+def test_loads_round_trip(backend):
+    """测试字符串与字节均可反序列化"""
+    data = {"id": 1, "name": "张三", "tags": ["a", "b"]}
+
+    assert fast_json.loads(fast_json.dumps(data)) == data
+    assert fast_json.loads(fast_json.dumps_bytes(data)) == data
@@ -1,4 +1,10 @@
-from ainewsback.utils.password import PasswordUtil
+import asyncio
+
+import pytest
+from pydantic import ValidationError
+
+from ainewsback.schemas.user import LoginAuthRequest
+from ainewsback.utils.password import MAX_PASSWORD_BYTES, PasswordUtil
 
 
 def test_generate_salt():
@@ -10,38 +16,70 @@ def test_generate_salt():
     assert salt1 != salt2  # 每次生成的盐值应该不同
 
 
-def test_hash_password():
-    """测试密码哈希"""
+def test_hash_legacy_password():
+    """测试历史 MD5 密码哈希"""
     password = "test123"
     salt = "abc123"
 
-    hashed1 = PasswordUtil.hash_password(password, salt)
-    hashed2 = PasswordUtil.hash_password(password, salt)
+    hashed1 = PasswordUtil.hash_legacy_password(password, salt)
+    hashed2 = PasswordUtil.hash_legacy_password(password, salt)
 
     assert hashed1 == hashed2  # 相同密码和盐值应产生相同哈希
-    assert len(hashed1) == 64  # SHA-256 = 64个十六进制字符
+    assert len(hashed1) == 32  # MD5 = 32个十六进制字符
+    assert PasswordUtil.is_legacy_hash(hashed1)
 
 
-def test_create_password():
-    """测试创建密码"""
+def test_hash_password():
+    """测试密码哈希"""
     password = "mypassword"
-    hashed, salt = PasswordUtil.create_password(password)
+    hashed1 = PasswordUtil.hash_password(password)
+    hashed2 = PasswordUtil.hash_password(password)
 
-    assert len(hashed) == 64
-    assert len(salt) == 32
+    assert hashed1.startswith("$")
+    assert hashed1 != hashed2  # 盐值随机，结果不同
+    assert not PasswordUtil.is_legacy_hash(hashed1)
 
 
 def test_verify_password():
     """测试密码验证"""
     password = "correct_password"
-    hashed, salt = PasswordUtil.create_password(password)
+    hashed = PasswordUtil.hash_password(password)
 
     # 正确密码应验证通过
-    assert PasswordUtil.verify_password(password, hashed, salt) is True
+    assert PasswordUtil.verify_password(password, hashed) is True
 
     # 错误密码应验证失败
-    assert PasswordUtil.verify_password("wrong_password", hashed,
-                                        salt) is False
+    assert PasswordUtil.verify_password("wrong_password", hashed) is False
+
+
+def test_verify_and_update_upgrades_legacy_hash():
+    """测试历史 MD5 哈希验证成功后返回升级后的哈希"""
+    password = "legacy_password"
+    salt = PasswordUtil.generate_salt()
+    legacy = PasswordUtil.hash_legacy_password(password, salt)
+
+    ok, new_hash = PasswordUtil.verify_and_update("wrong", legacy, salt)
+    assert ok is False
+    assert new_hash is None
+
+    ok, new_hash = PasswordUtil.verify_and_update(password, legacy, salt)
+    assert ok is True
+    assert PasswordUtil.verify_password(password, new_hash) is True
+
+    ok, new_hash = PasswordUtil.verify_and_update(password, new_hash)
+    assert ok is True
+    assert new_hash is None
+
+
+def test_verify_and_update_async():
+    """测试在线程池中验证密码"""
+    hashed = PasswordUtil.hash_password("async_password")
+
+    ok, new_hash = asyncio.run(
+        PasswordUtil.verify_and_update_async("async_password", hashed))
+
+    assert ok is True
+    assert new_hash is None
 
 
 def test_generate_random_password():
@@ -51,3 +89,34 @@ def test_generate_random_password():
 
     assert len(pwd1) == 10
     assert pwd1 != pwd2
+
+
+def test_long_password_rejected():
+    """超过 bcrypt 72 字节上限的密码: 哈希报错，验证返回不匹配而不是抛异常"""
+    long_password = "a" * (MAX_PASSWORD_BYTES + 1)
+    hashed = PasswordUtil.hash_password("a" * MAX_PASSWORD_BYTES)
+
+    with pytest.raises(ValueError):
+        PasswordUtil.hash_password(long_password)
+    assert PasswordUtil.verify_password(long_password, hashed) is False
+    assert PasswordUtil.verify_and_update(long_password, hashed) == (False, None)
+
+
+def test_long_password_legacy_hash_not_upgraded():
+    """历史 MD5 用户使用超长密码时不再在升级哈希时崩溃"""
+    long_password = "密" * 25  # 75 字节
+    salt = PasswordUtil.generate_salt()
+    legacy = PasswordUtil.hash_legacy_password(long_password, salt)
+
+    assert PasswordUtil.verify_and_update(long_password, legacy, salt) == (
+        False, None)
+
+
+def test_login_request_password_byte_limit():
+    """登录请求按 UTF-8 字节数校验密码长度"""
+    LoginAuthRequest(phone="13800000000", password="a" * MAX_PASSWORD_BYTES)
+    with pytest.raises(ValidationError):
+        LoginAuthRequest(phone="13800000000",
+                         password="a" * (MAX_PASSWORD_BYTES + 1))
+    with pytest.raises(ValidationError):
+        LoginAuthRequest(phone="13800000000", password="密" * 25)
@@ -0,0 +1,60 @@
+import time
+
+import pytest
+
+from ainewsback.utils.jwt import JWTUtils, token_cache
+from ainewsback.utils.token_cache import VerifiedTokenCache
+
+
+def test_hit_and_miss_counters():
+    """测试命中与未命中计数"""
+    cache = VerifiedTokenCache(max_size=10, ttl=60)
+    payload = {"sub": "1", "jti": "a", "exp": time.time() + 60}
+
+    assert cache.get("token") is None
+    cache.put("token", payload)
+    assert cache.get("token") == payload
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+
+def test_entry_expires_at_token_exp():
+    """测试条目不晚于 Token 的 exp 过期"""
+    cache = VerifiedTokenCache(max_size=10, ttl=60)
+    cache.put("expired", {"jti": "a", "exp": time.time() - 1})
+    assert cache.get("expired") is None
+
+    cache.put("short", {"jti": "b", "exp": time.time() + 0.05})
+    assert cache.get("short") is not None
+    time.sleep(0.06)
+    assert cache.get("short") is None
+
+
+def test_lru_eviction():
+    """测试超出容量时淘汰最久未使用的条目"""
+    cache = VerifiedTokenCache(max_size=2, ttl=60)
+    exp = time.time() + 60
+    cache.put("a", {"jti": "a", "exp": exp})
+    cache.put("b", {"jti": "b", "exp": exp})
+    cache.get("a")
+    cache.put("c", {"jti": "c", "exp": exp})
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_verify_token_served_from_cache():
+    """测试验签通过的 Token 第二次从缓存命中，篡改的 Token 仍被拒绝"""
+    token_cache.clear()
+    hits = token_cache.hits
+    token = JWTUtils.create_token("7")
+
+    assert JWTUtils.verify_token(token)["sub"] == "7"
+    assert JWTUtils.verify_token(token)["sub"] == "7"
+    assert token_cache.hits == hits + 1
+    with pytest.raises(ValueError):
+        JWTUtils.verify_token(token[:-2] + "xx")
+    token_cache.clear()